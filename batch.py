@@ -0,0 +1,68 @@
+"""Parallel batch self-play across a process pool.
+
+Games are split into chunks that run in worker processes. Every game is
+seeded from the batch seed and its index, so a batch gives the same results
+regardless of the number of workers. Workers only send back aggregated
+SimulationStats, never game objects."""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, Union
+from catan import CatanMap
+from simulator import Agent, RandomAgent, Simulator, SimulationStats
+import os
+import random
+import time
+
+AgentFactory = Callable[[random.Random], Agent]
+
+
+def game_seed(seed: int, index: int) -> str:
+    """Returns the seed of a single game. Strings are seeded via SHA-512,
+    so the seed does not depend on hash randomization."""
+    return f"{seed}:{index}"
+
+
+def play_chunk(start: int, stop: int, seed: int, num_players: int,
+               agent_factory: AgentFactory, map_class: type[CatanMap],
+               max_turns: int) -> SimulationStats:
+    """Plays the games with indices start..stop-1 and returns their stats."""
+    simulator = Simulator([], map_class, max_turns=max_turns)
+    t0 = time.perf_counter()
+    for index in range(start, stop):
+        simulator.agents = [agent_factory(random.Random(f"{game_seed(seed, index)}:{player}"))
+                            for player in range(num_players)]
+        simulator.stats.add(simulator.play_game(game_seed(seed, index)))
+    simulator.stats.seconds = time.perf_counter() - t0
+    return simulator.stats
+
+
+def iter_batch(num_games: int, seed: int = 0, num_players: int = 3,
+               agent_factory: AgentFactory = RandomAgent, map_class: type[CatanMap] = CatanMap,
+               max_turns: int = 500, workers: Union[int, None] = None,
+               chunk_size: int = 50) -> Iterator[SimulationStats]:
+    """Yields the stats of each chunk of games as soon as it is finished.
+    agent_factory and map_class must be picklable, i.e. module level."""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(play_chunk, start, min(start + chunk_size, num_games), seed,
+                                   num_players, agent_factory, map_class, max_turns)
+                   for start in range(0, num_games, chunk_size)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(num_games: int, **kwargs) -> SimulationStats:
+    """Runs a batch and merges the chunk stats. seconds is the wall clock
+    time of the batch, phase_seconds the summed time of all workers."""
+    t0 = time.perf_counter()
+    stats = SimulationStats()
+    for chunk_stats in iter_batch(num_games, **kwargs):
+        stats.merge(chunk_stats)
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+if __name__ == "__main__":
+    for workers in (1, os.cpu_count() or 1):
+        print(f"{workers} workers")
+        print(run_batch(400, workers=workers).report())
@@ -0,0 +1,78 @@
+"""Compares the CatanMap backends on legality checks and whole games.
+
+Run from the repository root with python -m benchmarks.catan_maps."""
+from __future__ import annotations
+from catan import CatanMap, Player
+from catan_bitboard import BitboardCatanMap
+from catan_indexed import IndexedCatanMap
+from simulator import RandomAgent, Simulator
+import random
+import timeit
+
+
+def mid_game_map(map_class: type[CatanMap], players: list[Player], seed: int = 0) -> CatanMap:
+    """Returns a map with two settlements and ten streets per player."""
+    rng = random.Random(seed)
+    map = map_class(random.Random(seed))
+    map.init_map()
+    for player in players * 2:
+        vertex = rng.choice(sorted(map.legal_settlement_spots(player), key=map.topology.vertex_ids.get))
+        map.build_settlement(player.settlements.pop(), vertex)
+        edges = [e for e in vertex.get_adjacent_edges() if map.may_build_street(player, e)]
+        map.build_street(player.streets.pop(), rng.choice(edges))
+    map.is_start = False
+    for _ in range(8):
+        for player in players:
+            spots = sorted(map.legal_street_spots(player), key=map.topology.edge_ids.get)
+            if spots:
+                map.build_street(player.streets.pop(), rng.choice(spots))
+    return map
+
+
+def check_all(map: CatanMap, players: list[Player]) -> None:
+    vertices = map.topology.vertices
+    edges = map.topology.edges
+    for player in players:
+        for v in vertices:
+            map.may_build_settlement(player, v)
+        for e in edges:
+            map.may_build_street(player, e)
+
+
+def check_all_ids(map: IndexedCatanMap, players: list[Player]) -> None:
+    num_vertices = map.topology.num_vertices
+    num_edges = map.topology.num_edges
+    for player in players:
+        for v in range(num_vertices):
+            map.may_build_settlement_id(player.id, v)
+        for e in range(num_edges):
+            map.may_build_street_id(player.id, e)
+
+
+def legal_masks(map: BitboardCatanMap, players: list[Player]) -> None:
+    for player in players:
+        map.legal_settlement_mask(player.id)
+        map.legal_street_mask(player.id)
+
+
+def best_of(function, *args, number: int = 200) -> float:
+    return min(timeit.repeat(lambda: function(*args), number=number, repeat=5)) / number
+
+
+if __name__ == "__main__":
+    players = [Player(i, f"Player {i}", "black") for i in range(3)]
+    maps = {cls: mid_game_map(cls, [Player(i, f"Player {i}", "black") for i in range(3)])
+            for cls in (CatanMap, IndexedCatanMap, BitboardCatanMap)}
+    base = best_of(check_all, maps[CatanMap], players)
+    print("all legality checks of 3 players on a mid-game board")
+    for name, seconds in (("CatanMap", base),
+                          ("IndexedCatanMap", best_of(check_all, maps[IndexedCatanMap], players)),
+                          ("IndexedCatanMap ids", best_of(check_all_ids, maps[IndexedCatanMap], players)),
+                          ("BitboardCatanMap ids", best_of(check_all_ids, maps[BitboardCatanMap], players)),
+                          ("BitboardCatanMap masks", best_of(legal_masks, maps[BitboardCatanMap], players))):
+        print(f"  {name:<24} {seconds * 1e6:8.1f} us  {base / seconds:5.1f}x")
+    print("whole simulated games")
+    for cls in (CatanMap, IndexedCatanMap, BitboardCatanMap):
+        simulator = Simulator([RandomAgent(random.Random(i)) for i in range(3)], cls)
+        stats = simulator.run(100)
+        print(f"  {cls.__name__:<24} {stats.games_per_second:8.1f} games/s")
@@ -0,0 +1,49 @@
+"""Forking a GameState and applying a roll and a street, against undoing
+the same events through a GameHistory and against copy.deepcopy of the game.
+
+Run from the repository root with python -m benchmarks.game_state."""
+from __future__ import annotations
+from events import GameHistory
+from game_state import GameState
+from simulator import Simulator, RandomAgent
+import copy
+import random
+import time
+
+
+if __name__ == "__main__":
+    simulator = Simulator([RandomAgent(random.Random(i)) for i in range(4)])
+    game = simulator.new_game(0)
+    simulator.setup(game)
+    state = GameState.from_game(game)
+    player = game.current_player
+    edge = min(game.map.legal_street_spots(player), key=game.map.topology.edge_ids.get)
+    edge_id = game.map.topology.edge_ids[edge]
+
+    def fork_apply_discard():
+        child = state.fork()
+        child.roll(8)
+        child.build_street(player.id, edge_id)
+
+    def deepcopy_apply():
+        child = copy.deepcopy(game)
+        child.distribute_resources(8)
+        child.map.build_street(child.current_player.streets.pop(), edge)
+
+    history = GameHistory(game, checkpoint_interval=0)
+
+    def apply_undo():
+        mark = len(history)
+        history.roll(8)
+        history.build_street(player, edge)
+        history.undo_to(mark)
+
+    for name, function, n in (("fork + apply + discard", fork_apply_discard, 20000),
+                              ("GameHistory apply + undo", apply_undo, 5000),
+                              ("deepcopy + apply", deepcopy_apply, 200),
+                              ("fork only", state.fork, 100000)):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            function()
+        seconds = (time.perf_counter() - t0) / n
+        print(f"{name:<26} {seconds * 1e6:9.2f} us")
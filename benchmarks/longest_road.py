@@ -0,0 +1,80 @@
+"""Incremental longest road against a full search after every build, on
+dense late-game boards.
+
+Run from the repository root with python -m benchmarks.longest_road."""
+from __future__ import annotations
+from hex import Hex
+from longest_road import LongestRoad
+from topology import BoardTopology
+import random
+import time
+
+
+def dense_board(topology: BoardTopology, rng, num_players: int = 4,
+                streets: int = 15, settlements: int = 4) -> list[tuple[str, int, int]]:
+    """Returns the builds of a late game board: every player grows a road
+    network of up to 15 streets and places settlements along it."""
+    edge_owner: dict[int, int] = {}
+    vertex_owner: dict[int, int] = {}
+    builds = []
+    frontier = {p: set() for p in range(num_players)}
+    for p in range(num_players):
+        v = rng.choice([v for v in range(topology.num_vertices) if v not in vertex_owner])
+        vertex_owner[v] = p
+        builds.append(("settlement", p, v))
+        frontier[p].update(e for e in topology.vertex_edges[v] if e not in edge_owner)
+    for _ in range(streets):
+        for p in range(num_players):
+            candidates = sorted(e for e in frontier[p] if e not in edge_owner)
+            if not candidates:
+                continue
+            e = rng.choice(candidates)
+            edge_owner[e] = p
+            builds.append(("street", p, e))
+            for v in topology.edge_vertices[e]:
+                if vertex_owner.get(v, p) == p:
+                    frontier[p].update(topology.vertex_edges[v])
+    for p in range(num_players):
+        spots = [v for e, owner in edge_owner.items() if owner == p
+                 for v in topology.edge_vertices[e] if v not in vertex_owner]
+        for v in rng.sample(spots, min(settlements, len(spots))):
+            if v not in vertex_owner:
+                vertex_owner[v] = p
+                builds.append(("settlement", p, v))
+    return builds
+
+
+if __name__ == "__main__":
+    topology = BoardTopology(Hex(0, 0, 0).hexes_in_range(2))
+    boards = [dense_board(topology, random.Random(seed)) for seed in range(200)]
+    num_players = 4
+
+    t0 = time.perf_counter()
+    for builds in boards:
+        roads = LongestRoad(topology)
+        for kind, p, id in builds:
+            if kind == "street":
+                roads.add_street(p, id)
+            else:
+                roads.add_settlement(p, id)
+            for q in range(num_players):
+                roads.length(q)
+    incremental = time.perf_counter() - t0
+
+    # Baseline: a full search over all streets of every player after every build
+    t0 = time.perf_counter()
+    for builds in boards:
+        roads = LongestRoad(topology)
+        for kind, p, id in builds:
+            if kind == "street":
+                roads.edge_owner[id] = p
+            else:
+                roads.vertex_owner[id] = p
+            for q in range(num_players):
+                roads._longest_trail(q, {e for e, owner in roads.edge_owner.items() if owner == q})
+    full = time.perf_counter() - t0
+
+    num_builds = sum(len(builds) for builds in boards)
+    print(f"{len(boards)} boards, {num_builds} builds, longest road of every player after every build")
+    print(f"incremental: {incremental:.3f}s ({num_builds / incremental:.0f} builds/s)")
+    print(f"full search: {full:.3f}s ({num_builds / full:.0f} builds/s)")
@@ -0,0 +1,20 @@
+"""Plays an MCTS agent against random agents, with one worker and with one
+per core, and reports rollouts per second.
+
+Run from the repository root with python -m benchmarks.mcts."""
+from __future__ import annotations
+from mcts import MCTSAgent
+from simulator import RandomAgent, Simulator
+import os
+import random
+
+
+if __name__ == "__main__":
+    for workers in sorted({1, os.cpu_count() or 1}):
+        agent = MCTSAgent(random.Random(0), time_limit=0.05, workers=workers)
+        simulator = Simulator([agent, RandomAgent(random.Random(1)), RandomAgent(random.Random(2))],
+                              max_turns=300)
+        stats = simulator.run(4)
+        agent.close()
+        print(f"{workers} workers: MCTS won {stats.wins.get(0, 0)} of {stats.games} games")
+        print("  " + agent.stats.report())
@@ -0,0 +1,26 @@
+"""Picking 10000 random screen positions with the grid index against
+Vertex.from_point and Edge.from_point.
+
+Run from the repository root with python -m benchmarks.picking."""
+from __future__ import annotations
+from hex import ORIENTATION_POINTY, Edge, Hex, Layout, Point, Vertex
+from picking import get_picking_index
+from topology import get_topology
+import random
+import timeit
+
+
+if __name__ == "__main__":
+    layout = Layout(ORIENTATION_POINTY, Point(50, 50), Point(400, 300))
+    topology = get_topology(Hex(0, 0, 0).hexes_in_range(2))
+    picking = get_picking_index(layout, topology)
+    rng = random.Random(0)
+    positions = [(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(10000)]
+    for name, stmt in [
+        ("Vertex.from_point", lambda: [Vertex.from_point(layout, Point(x, y)) for x, y in positions]),
+        ("Edge.from_point", lambda: [Edge.from_point(layout, Point(x, y)) for x, y in positions]),
+        ("vertices_at", lambda: picking.vertices_at(positions)),
+        ("edges_at", lambda: picking.edges_at(positions)),
+    ]:
+        seconds = min(timeit.repeat(stmt, number=1, repeat=3))
+        print(f"{name:20} {seconds / len(positions) * 1e6:6.2f} us/point")
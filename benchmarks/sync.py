@@ -0,0 +1,42 @@
+"""Sizes and speed of sync deltas against full snapshots, on random games
+played through server tables.
+
+Run from the repository root with python -m benchmarks.sync."""
+from __future__ import annotations
+from client import choose_action
+from protocol import Phase
+from server import Table
+from sync import decode_delta, encode_delta
+from types import SimpleNamespace
+import random
+import snapshot
+import timeit
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    deltas = []
+    snapshots = []
+    num_events = 0
+    for table_id in range(20):
+        table = Table(table_id, 3, random.Random(table_id), max_turns=200)
+        client = SimpleNamespace(game=table.game)
+        while table.phase != Phase.OVER:
+            client.phase = table.phase
+            assert table.act(table.game.current_player.id, *choose_action(client, rng)) is None
+            num_events += len(table.sync.pending)
+            deltas.append(table.sync.commit())
+        snapshots.append(table.sync.snapshot()[1])
+    decoded = [decode_delta(delta) for delta in deltas]
+    print(f"{len(deltas)} actions, {num_events / len(deltas):.2f} events per action")
+    print(f"full snapshot  {sum(map(len, snapshots)) / len(snapshots):6.1f} bytes per action")
+    print(f"packed events  {8 * num_events / len(deltas):6.1f} bytes per action")
+    print(f"delta          {sum(map(len, deltas)) / len(deltas):6.1f} bytes per action")
+    seconds = min(timeit.repeat(lambda: [encode_delta(s, events) for s, events in decoded], number=1, repeat=5))
+    print(f"delta encode   {seconds / len(deltas) * 1e6:6.2f} us")
+    seconds = min(timeit.repeat(lambda: [decode_delta(delta) for delta in deltas], number=1, repeat=5))
+    print(f"delta decode   {seconds / len(deltas) * 1e6:6.2f} us")
+    seconds = min(timeit.repeat(lambda: [snapshot.encode(table.game)], number=100, repeat=5)) / 100
+    print(f"snapshot encode {seconds * 1e6:5.2f} us")
+    seconds = min(timeit.repeat(lambda: [snapshot.decode(snapshots[-1])], number=20, repeat=3)) / 20
+    print(f"snapshot decode {seconds * 1e6:5.2f} us")
@@ -3,6 +3,10 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Union
 from hex import Hex, Edge, Vertex
+from topology import get_topology
+from longest_road import LongestRoad
+from zobrist import zobrist_key, resource_key, development_cards_key, map_hash, \
+                    SETTLEMENT, STREET, ROBBER, TURN
 from catan_constants import ResourceType
 import random
 
@@ -17,18 +21,44 @@ class State(Enum):
 
 class CatanGame:
 
-    def __init__(self, players: list[Player]) -> None:
+    def __init__(self, players: list[Player], map_class: Union[type[CatanMap], None] = None,
+                 rng: Union[random.Random, None] = None, dice_block_size: int = 0,
+                 hexes: Union[dict[Hex, CatanHex], None] = None) -> None:
         self.players = players
         self.current_player = players[0]
-        self.dice = Dice(2)
+        self.rng = rng or random.Random()
+        self.dice = Dice(2, self.rng, dice_block_size)
         self.state = State.GAME_START
-        self.map = CatanMap()
+        self.map = (map_class or CatanMap)(self.rng)
+        if hexes is not None:
+            # Play on a given board instead of a random one. The hexes are
+            # copied, the game changes them, e.g. when the robber moves.
+            self.map.catan_hexes = {hex: CatanHex(h.number_token, h.resource_type, h.has_robber)
+                                    for hex, h in hexes.items()}
         self.map.init_map()
         self.game_start()
 
     def game_start(self) -> None:
         pass
 
+    def distribute_resources(self, number: int) -> dict[int, dict[ResourceType, int]]:
+        """Hands out the resources produced by a dice roll and returns them
+        per player id."""
+        deltas = self.map.get_production(number)
+        for player in self.players:
+            if player.id in deltas:
+                for resource_type, amount in deltas[player.id].items():
+                    player.gain(resource_type, amount)
+        return deltas
+
+    def state_hash(self) -> int:
+        """Returns the Zobrist hash of the game: the map, the resources and
+        development cards of every player and the player to move."""
+        h = self.map.zobrist ^ zobrist_key(TURN, self.current_player.id)
+        for player in self.players:
+            h ^= player.zobrist
+        return h
+
     def next_player(self) -> None:
         self.current_player = self.players[(self.current_player.id + 1) % len(self.players)]
 
@@ -76,22 +106,160 @@ class CatanVertex:
 
 class CatanMap:
 
-    def __init__(self) -> None:
+    def __init__(self, rng: Union[random.Random, None] = None) -> None:
+        self.rng = rng or random.Random()
         self.is_start = True
+        self.robber: Union[Hex, None] = None
         self.catan_hexes: dict[Hex, CatanHex] = {}
         self.catan_edges: dict[Edge, CatanEdge] = {}
         self.catan_vertices: dict[Vertex, CatanVertex] = {}
+        # Legal move sets, kept up to date by every build and removal.
+        # free_* hold the spots that are legal during the start phase, the
+        # per player dicts the spots connected to the player's streets.
+        self.free_vertices: set[Vertex] = set()
+        self.free_edges: set[Edge] = set()
+        self.settlement_spots: dict[int, set[Vertex]] = {}
+        self.street_spots: dict[int, set[Edge]] = {}
+        # Vertices with a settlement per player id, i.e. the legal city spots
+        self.city_spots: dict[int, set[Vertex]] = {}
+        # Production per number token, as amounts per (player id, resource).
+        # Only contains buildings that currently produce.
+        self.production: dict[int, dict[tuple[int, ResourceType], int]] = {}
+        self.roads: Union[LongestRoad, None] = None
+        # Zobrist hash of the map, see zobrist.py
+        self.zobrist = 0
 
     def init_map(self) -> None:
-        self.create_random_map()
+        if not self.catan_hexes:
+            self.create_random_map()
         self.create_edges()
         self.create_vertices()
-
-    def build_settlement(self, settlement: Settlement, vertex: Vertex) -> None:
-        self.catan_vertices[vertex].set_building(settlement)
+        self.topology = get_topology(self.catan_hexes)
+        self.free_vertices = set(self.catan_vertices)
+        self.free_edges = set(self.catan_edges)
+        self.production = {number: {} for number in range(2, 13)}
+        self.roads = LongestRoad(self.topology)
+        self.zobrist = map_hash(self)
+
+    def build_settlement(self, settlement: Union[Settlement, City], vertex: Vertex) -> None:
+        catan_vertex = self.catan_vertices[vertex]
+        if catan_vertex.has_building():
+            self._update_production(vertex, -1)
+            self.zobrist ^= self._building_key(vertex, catan_vertex.building)
+            self.city_spots.setdefault(catan_vertex.building.player.id, set()).discard(vertex)
+        catan_vertex.set_building(settlement)
+        if isinstance(settlement, Settlement):
+            self.city_spots.setdefault(settlement.player.id, set()).add(vertex)
+        self._update_production(vertex, 1)
+        self.zobrist ^= self._building_key(vertex, settlement)
+        self.roads.add_settlement(settlement.player.id, self.topology.vertex_ids[vertex])
+        for v in (vertex, *vertex.get_adjacent_vertices()):
+            self.free_vertices.discard(v)
+            for spots in self.settlement_spots.values():
+                spots.discard(v)
 
     def build_street(self, street: Street, edge: Edge) -> None:
         self.catan_edges[edge].set_building(street)
+        self.zobrist ^= zobrist_key(STREET, self.topology.edge_ids[edge], street.player.id)
+        self.roads.add_street(street.player.id, self.topology.edge_ids[edge])
+        self.free_edges.discard(edge)
+        for spots in self.street_spots.values():
+            spots.discard(edge)
+        player_id = street.player.id
+        if player_id in self.street_spots:
+            self.street_spots[player_id].update(
+                e for e in edge.get_adjacent_edges() if e in self.free_edges)
+        if player_id in self.settlement_spots:
+            self.settlement_spots[player_id].update(
+                v for v in edge.get_adjacent_vertices() if v in self.free_vertices)
+
+    def remove_settlement(self, vertex: Vertex) -> None:
+        self._update_production(vertex, -1)
+        building = self.catan_vertices[vertex].building
+        self.zobrist ^= self._building_key(vertex, building)
+        self.city_spots.setdefault(building.player.id, set()).discard(vertex)
+        self.catan_vertices[vertex].remove_building()
+        self.roads.remove_settlement(self.topology.vertex_ids[vertex])
+        for v in (vertex, *vertex.get_adjacent_vertices()):
+            if v in self.catan_vertices and self._is_free_vertex(v):
+                self.free_vertices.add(v)
+                for player_id, spots in self.settlement_spots.items():
+                    if self._vertex_has_street(v, player_id):
+                        spots.add(v)
+
+    def remove_street(self, edge: Edge) -> None:
+        player_id = self.catan_edges[edge].building.player.id
+        self.catan_edges[edge].remove_building()
+        self.zobrist ^= zobrist_key(STREET, self.topology.edge_ids[edge], player_id)
+        self.roads.remove_street(self.topology.edge_ids[edge])
+        self.free_edges.add(edge)
+        for other_id, spots in self.street_spots.items():
+            if self._edge_has_street(edge, other_id):
+                spots.add(edge)
+        if player_id in self.street_spots:
+            spots = self.street_spots[player_id]
+            for e in edge.get_adjacent_edges():
+                if e in spots and not self._edge_has_street(e, player_id):
+                    spots.discard(e)
+        if player_id in self.settlement_spots:
+            spots = self.settlement_spots[player_id]
+            for v in edge.get_adjacent_vertices():
+                if v in spots and not self._vertex_has_street(v, player_id):
+                    spots.discard(v)
+
+    def legal_settlement_spots(self, player: Player) -> set[Vertex]:
+        """Returns all vertices the player may build a settlement on."""
+        if self.is_start:
+            return set(self.free_vertices)
+        if player.id not in self.settlement_spots:
+            self.settlement_spots[player.id] = {
+                v for v in self.free_vertices if self._vertex_has_street(v, player.id)}
+        return set(self.settlement_spots[player.id])
+
+    def legal_street_spots(self, player: Player) -> set[Edge]:
+        """Returns all edges the player may build a street on."""
+        if self.is_start:
+            return set(self.free_edges)
+        if player.id not in self.street_spots:
+            self.street_spots[player.id] = {
+                e for e in self.free_edges if self._edge_has_street(e, player.id)}
+        return set(self.street_spots[player.id])
+
+    def legal_city_spots(self, player: Player) -> set[Vertex]:
+        """Returns all vertices the player may build a city on."""
+        return set(self.city_spots.get(player.id, ()))
+
+    def longest_road(self, player: Player) -> int:
+        """Returns the length of the player's longest road. Cached per road
+        component until a build or removal touches it."""
+        return self.roads.length(player.id)
+
+    def set_robber(self, hex: Hex, state: bool) -> None:
+        catan_hex = self.catan_hexes[hex]
+        if catan_hex.has_robber == state:
+            return
+        if state:
+            self._update_hex_production(hex, -1)
+        catan_hex.set_robber(state)
+        self.zobrist ^= zobrist_key(ROBBER, self.topology.hex_ids[hex])
+        if not state:
+            self._update_hex_production(hex, 1)
+        if state:
+            self.robber = hex
+        elif self.robber == hex:
+            self.robber = None
+
+    def move_robber(self, hex: Hex) -> None:
+        if self.robber is not None:
+            self.set_robber(self.robber, False)
+        self.set_robber(hex, True)
+
+    def get_production(self, number: int) -> dict[int, dict[ResourceType, int]]:
+        """Returns the resources each player (by id) receives for a dice roll."""
+        deltas: dict[int, dict[ResourceType, int]] = {}
+        for (player_id, resource_type), amount in self.production.get(number, {}).items():
+            deltas.setdefault(player_id, {})[resource_type] = amount
+        return deltas
 
     def may_build_settlement(self, player: Player, vertex: Vertex) -> bool:
         if vertex not in self.catan_vertices:
@@ -118,6 +286,12 @@ class CatanMap:
 
         return True
 
+    def may_build_city(self, player: Player, vertex: Vertex) -> bool:
+        if vertex not in self.catan_vertices:
+            return False
+        catan_vertex = self.catan_vertices[vertex]
+        return catan_vertex.has_building(player) and isinstance(catan_vertex.building, Settlement)
+
     def may_build_street(self, player: Player, edge: Edge) -> bool:
         if edge not in self.catan_edges:
             return False
@@ -140,6 +314,55 @@ class CatanMap:
                 return True
         return False
 
+    def _update_production(self, vertex: Vertex, sign: int) -> None:
+        """Adds (sign 1) or removes (sign -1) the production of the building
+        on a vertex."""
+        building = self.catan_vertices[vertex].building
+        for hex in vertex.get_adjacent_hexes():
+            if hex in self.catan_hexes:
+                self._update_entry(self.catan_hexes[hex], building, sign)
+
+    def _update_hex_production(self, hex: Hex, sign: int) -> None:
+        """Adds or removes the production of all buildings around a hex."""
+        catan_hex = self.catan_hexes[hex]
+        for vertex in hex.get_adjacent_vertices():
+            if self.catan_vertices[vertex].has_building():
+                self._update_entry(catan_hex, self.catan_vertices[vertex].building, sign)
+
+    def _update_entry(self, catan_hex: CatanHex, building: Building, sign: int) -> None:
+        if catan_hex.number_token == 0 or catan_hex.has_robber:
+            return
+        entries = self.production[catan_hex.number_token]
+        key = (building.player.id, catan_hex.resource_type)
+        amount = entries.get(key, 0) + sign * building.resource_factor
+        if amount:
+            entries[key] = amount
+        else:
+            del entries[key]
+
+    def _building_key(self, vertex: Vertex, building: Building) -> int:
+        return zobrist_key(SETTLEMENT, self.topology.vertex_ids[vertex], building.player.id,
+                           building.resource_factor)
+
+    def _is_free_vertex(self, vertex: Vertex) -> bool:
+        for v in (vertex, *vertex.get_adjacent_vertices()):
+            if v in self.catan_vertices and self.catan_vertices[v].has_building():
+                return False
+        return True
+
+    def _vertex_has_street(self, vertex: Vertex, player_id: int) -> bool:
+        return self._has_street(vertex.get_adjacent_edges(), player_id)
+
+    def _edge_has_street(self, edge: Edge, player_id: int) -> bool:
+        return self._has_street(edge.get_adjacent_edges(), player_id)
+
+    def _has_street(self, edges, player_id: int) -> bool:
+        for e in edges:
+            if e in self.catan_edges and self.catan_edges[e].has_building():
+                if self.catan_edges[e].building.player.id == player_id:
+                    return True
+        return False
+
     def create_edges(self) -> None:
         for hex in self.catan_hexes:
             hex_edges = hex.get_adjacent_edges()
@@ -164,23 +387,26 @@ class CatanMap:
         resource_weights = [1, 3, 4, 3, 4, 4]
         number_tokens = [5, 2, 6, 3, 8, 10, 9, 12, 11, 4, 8, 10, 9, 4, 5, 6, 3, 11]
 
-        for q in range(-2, 3):
-            r1 = max(-2, -q - 2)
-            r2 = min(+2, -q + 2)
-            for r in range(r1, r2 + 1):
-                resource_type = random.choices(resource_list, weights=resource_weights)[0]
-                index = resource_list.index(resource_type)
-                resource_weights[index] -= 1
-                if resource_weights[index] == 0:
-                    del resource_weights[index]
-                    del resource_list[index]
+        for hex in Hex(0, 0, 0).hexes_in_range(2):
+            if hasattr(self.rng, "integers"):
+                # numpy.random.Generator, see Dice
+                total = sum(resource_weights)
+                resource_type = resource_list[self.rng.choice(len(resource_list),
+                                                              p=[w / total for w in resource_weights])]
+            else:
+                resource_type = self.rng.choices(resource_list, weights=resource_weights)[0]
+            index = resource_list.index(resource_type)
+            resource_weights[index] -= 1
+            if resource_weights[index] == 0:
+                del resource_weights[index]
+                del resource_list[index]
                 
-                if resource_type == ResourceType.NOTHING:
-                    number_token = 0
-                else:
-                    number_token = number_tokens.pop(0)
+            if resource_type == ResourceType.NOTHING:
+                number_token = 0
+            else:
+                number_token = number_tokens.pop(0)
 
-                self.catan_hexes[Hex(q, r, - q - r)] = CatanHex(number_token, resource_type)
+            self.catan_hexes[hex] = CatanHex(number_token, resource_type)
 
 
 @dataclass
@@ -202,6 +428,9 @@ class Player:
             }
         self.development_cards: list[DevelopmentCard] = []
         self.victory_points: int = 0
+        # Zobrist hash of resources and development cards. Kept up to date by
+        # gain, pay and add_development_card, not by direct writes.
+        self.zobrist = 0
 
     def roll_dice(self, dice: Dice) -> None:
         dice.roll()
@@ -214,18 +443,52 @@ class Player:
         if self.streets != [] and map.may_build_street(self, building_spot):
             map.build_street(self.streets.pop(), building_spot)
 
+    def build_city(self, map: CatanMap, building_spot: Vertex) -> None:
+        if self.citys != [] and map.may_build_city(self, building_spot):
+            settlement = map.catan_vertices[building_spot].building
+            map.build_settlement(self.citys.pop(), building_spot)
+            self.settlements.append(settlement)
+
+    def can_afford(self, cost: dict[ResourceType, int]) -> bool:
+        for resource_type, amount in cost.items():
+            if self.resources[resource_type] < amount:
+                return False
+        return True
+
+    def pay(self, cost: dict[ResourceType, int]) -> None:
+        for resource_type, amount in cost.items():
+            self.gain(resource_type, -amount)
+
+    def gain(self, resource_type: ResourceType, amount: int = 1) -> None:
+        count = self.resources[resource_type]
+        self.resources[resource_type] = count + amount
+        self.zobrist ^= resource_key(self.id, resource_type.value, count) \
+            ^ resource_key(self.id, resource_type.value, count + amount)
+
+    def add_development_card(self, card: DevelopmentCard) -> None:
+        count = len(self.development_cards)
+        self.development_cards.append(card)
+        self.zobrist ^= development_cards_key(self.id, count) ^ development_cards_key(self.id, count + 1)
+
+    def remove_development_card(self) -> DevelopmentCard:
+        count = len(self.development_cards)
+        self.zobrist ^= development_cards_key(self.id, count) ^ development_cards_key(self.id, count - 1)
+        return self.development_cards.pop()
+
 
 @dataclass
 class Building:
     player: Player
 
 
+@dataclass
 class Settlement(Building):
     
     def __post_init__(self):
         self.resource_factor = 1
 
 
+@dataclass
 class City(Building):
     
     def __post_init__(self):
@@ -237,16 +500,40 @@ class Street(Building):
 
 
 class Dice:
+    """Dice rolled with their own RNG. rng may be a random.Random or a
+    numpy.random.Generator. With a block_size, the values of that many rolls
+    are generated at once and consumed from a buffer."""
 
-    def __init__(self, num_dice: int = 2) -> None:
+    def __init__(self, num_dice: int = 2, rng=None, block_size: int = 0) -> None:
         self.dice = [1 for _ in range(num_dice)]
+        self.rng = rng or random.Random()
+        self.block_size = block_size
+        self._block: list[int] = []
+        self._block_pos = 0
 
     def __repr__(self) -> str:
         return str(self.get_dice_values())
 
     def roll(self) -> None:
-        for i in range(len(self.dice)):
-            self.dice[i] = random.randint(1, 6)
+        if self.block_size:
+            n = len(self.dice)
+            if self._block_pos + n > len(self._block):
+                self._fill_block()
+            self.dice[:] = self._block[self._block_pos:self._block_pos + n]
+            self._block_pos += n
+        elif hasattr(self.rng, "integers"):
+            self.dice[:] = self.rng.integers(1, 7, size=len(self.dice)).tolist()
+        else:
+            for i in range(len(self.dice)):
+                self.dice[i] = self.rng.randint(1, 6)
+
+    def _fill_block(self) -> None:
+        n = self.block_size * len(self.dice)
+        if hasattr(self.rng, "integers"):
+            self._block = self.rng.integers(1, 7, size=n).tolist()
+        else:
+            self._block = self.rng.choices(DIE_FACES, k=n)
+        self._block_pos = 0
             
     def get_dice_values(self) -> list[int]:
         return self.dice
@@ -255,5 +542,8 @@ class Dice:
         return sum(self.get_dice_values())
     
 
+DIE_FACES = (1, 2, 3, 4, 5, 6)
+
+
 class DevelopmentCard:
     pass
\ No newline at end of file
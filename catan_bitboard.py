@@ -0,0 +1,123 @@
+"""Bitboard mode for the integer-indexed CatanMap.
+
+Vertices and edges are bits of Python ints, indexed by the dense ids of the
+map's BoardTopology, so boards of any size are supported. Per player
+settlement, city and street masks are kept together with the union masks
+needed for the placement rules, which turns "all legal spots for a player"
+into a few integer AND/OR operations."""
+from __future__ import annotations
+from typing import Iterator
+from catan_indexed import IndexedCatanMap
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yields the indices of the set bits of a mask in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def to_mask(ids) -> int:
+    mask = 0
+    for i in ids:
+        mask |= 1 << i
+    return mask
+
+
+class BitboardCatanMap(IndexedCatanMap):
+    """IndexedCatanMap that answers placement legality with bitmasks."""
+
+    def init_map(self) -> None:
+        super().init_map()
+        t = self.topology
+        self.all_vertices_mask = (1 << t.num_vertices) - 1
+        self.all_edges_mask = (1 << t.num_edges) - 1
+        self.vertex_vertex_masks = [to_mask(row) for row in t.vertex_vertices]
+        self.edge_edge_masks = [to_mask(row) for row in t.edge_edges]
+        self.edge_vertex_masks = [to_mask(row) for row in t.edge_vertices]
+
+        self.settlement_masks: dict[int, int] = {}
+        self.city_masks: dict[int, int] = {}
+        self.street_masks: dict[int, int] = {}
+        # Vertices touched and edges adjacent to a player's streets.
+        self.street_vertex_masks: dict[int, int] = {}
+        self.street_edge_masks: dict[int, int] = {}
+        self.occupied_vertices = 0
+        self.occupied_edges = 0
+        # Occupied vertices and their neighbors, i.e. the distance rule.
+        self.blocked_vertices = 0
+
+    def build_settlement_id(self, player_id: int, vertex_id: int, level: int = 1) -> None:
+        super().build_settlement_id(player_id, vertex_id, level)
+        bit = 1 << vertex_id
+        if level == 1:
+            self.settlement_masks[player_id] = self.settlement_masks.get(player_id, 0) | bit
+        else:
+            self.settlement_masks[player_id] = self.settlement_masks.get(player_id, 0) & ~bit
+            self.city_masks[player_id] = self.city_masks.get(player_id, 0) | bit
+        self.occupied_vertices |= bit
+        self.blocked_vertices |= bit | self.vertex_vertex_masks[vertex_id]
+
+    def build_street_id(self, player_id: int, edge_id: int) -> None:
+        super().build_street_id(player_id, edge_id)
+        bit = 1 << edge_id
+        self.street_masks[player_id] = self.street_masks.get(player_id, 0) | bit
+        self.street_vertex_masks[player_id] = \
+            self.street_vertex_masks.get(player_id, 0) | self.edge_vertex_masks[edge_id]
+        self.street_edge_masks[player_id] = \
+            self.street_edge_masks.get(player_id, 0) | self.edge_edge_masks[edge_id]
+        self.occupied_edges |= bit
+
+    def remove_settlement_id(self, vertex_id: int) -> None:
+        player_id = self.vertex_owner[vertex_id]
+        super().remove_settlement_id(vertex_id)
+        keep = ~(1 << vertex_id)
+        self.settlement_masks[player_id] = self.settlement_masks.get(player_id, 0) & keep
+        self.city_masks[player_id] = self.city_masks.get(player_id, 0) & keep
+        self.occupied_vertices &= keep
+        blocked = 0
+        for v in iter_bits(self.occupied_vertices):
+            blocked |= (1 << v) | self.vertex_vertex_masks[v]
+        self.blocked_vertices = blocked
+
+    def remove_street_id(self, edge_id: int) -> None:
+        player_id = self.edge_owner[edge_id]
+        super().remove_street_id(edge_id)
+        keep = ~(1 << edge_id)
+        self.street_masks[player_id] &= keep
+        self.occupied_edges &= keep
+        street_vertices = street_edges = 0
+        for e in iter_bits(self.street_masks[player_id]):
+            street_vertices |= self.edge_vertex_masks[e]
+            street_edges |= self.edge_edge_masks[e]
+        self.street_vertex_masks[player_id] = street_vertices
+        self.street_edge_masks[player_id] = street_edges
+
+    def legal_settlement_mask(self, player_id: int) -> int:
+        """Returns the mask of all vertices the player may build a settlement on."""
+        mask = self.all_vertices_mask & ~self.blocked_vertices
+        if not self.is_start:
+            mask &= self.street_vertex_masks.get(player_id, 0)
+        return mask
+
+    def legal_street_mask(self, player_id: int) -> int:
+        """Returns the mask of all edges the player may build a street on."""
+        mask = self.all_edges_mask & ~self.occupied_edges
+        if not self.is_start:
+            mask &= self.street_edge_masks.get(player_id, 0)
+        return mask
+
+    def may_build_settlement_id(self, player_id: int, vertex_id: int) -> bool:
+        if self.blocked_vertices >> vertex_id & 1:
+            return False
+        if not self.is_start:
+            return bool(self.street_vertex_masks.get(player_id, 0) >> vertex_id & 1)
+        return True
+
+    def may_build_street_id(self, player_id: int, edge_id: int) -> bool:
+        if self.occupied_edges >> edge_id & 1:
+            return False
+        if not self.is_start:
+            return bool(self.street_edge_masks.get(player_id, 0) >> edge_id & 1)
+        return True
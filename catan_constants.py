@@ -6,4 +6,9 @@ class ResourceType(Enum):
     LUMBER = 2
     ORE = 3
     GRAIN = 4
-    WOOL = 5
\ No newline at end of file
+    WOOL = 5
+
+
+STREET_COST = {ResourceType.BRICK: 1, ResourceType.LUMBER: 1}
+SETTLEMENT_COST = {ResourceType.BRICK: 1, ResourceType.LUMBER: 1, ResourceType.GRAIN: 1, ResourceType.WOOL: 1}
+CITY_COST = {ResourceType.GRAIN: 2, ResourceType.ORE: 3}
@@ -0,0 +1,124 @@
+"""CatanMap backend that answers legality checks from flat integer arrays.
+
+Every hex, edge and vertex gets the dense id of the map's BoardTopology.
+Ownership, building levels and the robber are mirrored into arrays indexed
+by these ids, so legality checks never hash a coordinate. The *_id methods
+take and return ids only, coordinates are translated at the CatanMap API.
+
+The arrays are kept next to the CatanMap state, not instead of it: builds,
+removals and robber moves still update the CatanHex/CatanEdge/CatanVertex
+objects, production and the legal spot sets through the base class. On a
+mid-game board all settlement and street checks of three players take
+about 3x less time than on CatanMap through the coordinate API and 6x less
+through the id API. Whole simulated games are not faster, since the
+simulator reads the incremental legal spot sets of CatanMap instead of
+checking spots one by one, see benchmarks/catan_maps.py."""
+from __future__ import annotations
+from array import array
+from typing import Union
+from hex import Hex, Edge, Vertex
+from catan import CatanMap, Player, Settlement, City, Street
+
+NO_PLAYER = -1
+
+
+class IndexedCatanMap(CatanMap):
+    """Drop-in CatanMap whose legality checks run on integer arrays.
+
+    Every change still goes through CatanMap first, so the CatanHex,
+    CatanEdge and CatanVertex objects stay up to date for code that reads
+    them, e.g. for drawing, and builds cost slightly more than on CatanMap."""
+
+    def init_map(self) -> None:
+        super().init_map()
+        t = self.topology
+        self.vertex_owner = array("b", [NO_PLAYER]) * t.num_vertices
+        self.vertex_level = array("b", [0]) * t.num_vertices
+        self.edge_owner = array("b", [NO_PLAYER]) * t.num_edges
+        self.hex_robber = array("b", [int(self.catan_hexes[hex].has_robber) for hex in t.hexes])
+
+    def build_settlement(self, settlement: Union[Settlement, City], vertex: Vertex) -> None:
+        super().build_settlement(settlement, vertex)
+        self.build_settlement_id(settlement.player.id, self.topology.vertex_ids[vertex],
+                                 settlement.resource_factor)
+
+    def build_street(self, street: Street, edge: Edge) -> None:
+        super().build_street(street, edge)
+        self.build_street_id(street.player.id, self.topology.edge_ids[edge])
+
+    def remove_settlement(self, vertex: Vertex) -> None:
+        super().remove_settlement(vertex)
+        self.remove_settlement_id(self.topology.vertex_ids[vertex])
+
+    def remove_street(self, edge: Edge) -> None:
+        super().remove_street(edge)
+        self.remove_street_id(self.topology.edge_ids[edge])
+
+    def set_robber(self, hex: Hex, state: bool) -> None:
+        super().set_robber(hex, state)
+        self.hex_robber[self.topology.hex_ids[hex]] = int(state)
+
+    def may_build_settlement(self, player: Player, vertex: Vertex) -> bool:
+        vertex_id = self.topology.vertex_ids.get(vertex)
+        if vertex_id is None:
+            return False
+        return self.may_build_settlement_id(player.id, vertex_id)
+
+    def may_build_street(self, player: Player, edge: Edge) -> bool:
+        edge_id = self.topology.edge_ids.get(edge)
+        if edge_id is None:
+            return False
+        return self.may_build_street_id(player.id, edge_id)
+
+    def has_adjacent_street(self, vertex: Vertex, player: Player) -> bool:
+        edge_owner = self.edge_owner
+        for e in self.topology.vertex_edges[self.topology.vertex_ids[vertex]]:
+            if edge_owner[e] == player.id:
+                return True
+        return False
+
+    def build_settlement_id(self, player_id: int, vertex_id: int, level: int = 1) -> None:
+        """Sets the owner and building level (1 settlement, 2 city) of a vertex."""
+        self.vertex_owner[vertex_id] = player_id
+        self.vertex_level[vertex_id] = level
+
+    def build_street_id(self, player_id: int, edge_id: int) -> None:
+        self.edge_owner[edge_id] = player_id
+
+    def remove_settlement_id(self, vertex_id: int) -> None:
+        self.vertex_owner[vertex_id] = NO_PLAYER
+        self.vertex_level[vertex_id] = 0
+
+    def remove_street_id(self, edge_id: int) -> None:
+        self.edge_owner[edge_id] = NO_PLAYER
+
+    def may_build_settlement_id(self, player_id: int, vertex_id: int) -> bool:
+        vertex_owner = self.vertex_owner
+        if vertex_owner[vertex_id] != NO_PLAYER:
+            return False
+
+        for v in self.topology.vertex_vertices[vertex_id]:
+            if vertex_owner[v] != NO_PLAYER:
+                return False
+
+        if not self.is_start:
+            edge_owner = self.edge_owner
+            for e in self.topology.vertex_edges[vertex_id]:
+                if edge_owner[e] == player_id:
+                    return True
+            return False
+
+        return True
+
+    def may_build_street_id(self, player_id: int, edge_id: int) -> bool:
+        edge_owner = self.edge_owner
+        if edge_owner[edge_id] != NO_PLAYER:
+            return False
+
+        if not self.is_start:
+            for e in self.topology.edge_edges[edge_id]:
+                if edge_owner[e] == player_id:
+                    return True
+            return False
+
+        return True
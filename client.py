@@ -0,0 +1,243 @@
+"""Client of the game server and a load test.
+
+A GameClient keeps a copy of the game of its table by decoding a snapshot
+and applying the events of the deltas after it. If it sees a gap in the
+sequence numbers it asks the server for the missing deltas. play() drives a
+seat with random legal actions, like the RandomAgent of the simulator, and
+follow() a watcher.
+
+Running this module starts a server in the same process (or connects to
+--port), plays many tables at once and reports the latency of the actions,
+from sending an action until its events arrive."""
+from __future__ import annotations
+from typing import Union
+from catan_constants import CITY_COST, SETTLEMENT_COST, STREET_COST
+from events import GameHistory
+from protocol import ACTION, JOIN, SEQUENCE, SNAPSHOT, TABLE, ActionKind, ErrorCode, MessageType, Phase, \
+                     frame, next_phase, read_message
+from sync import decode_delta
+import asyncio
+import random
+import snapshot
+import time
+
+
+class ServerError(Exception):
+    pass
+
+
+class GameClient:
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.seat = -1
+        self.game = None
+        self.history: Union[GameHistory, None] = None
+        self.phase = Phase.SETUP_SETTLEMENT
+        # Sequence number of the last applied delta
+        self.sequence = 0
+        # Whether a SYNC is on its way
+        self.syncing = False
+        self.started = False
+        self.bytes_received = 0
+        self.latencies: list[float] = []
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> GameClient:
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    @property
+    def my_turn(self) -> bool:
+        return self.started and self.phase != Phase.OVER and self.game.current_player.id == self.seat
+
+    async def join(self, table_id: int, num_players: int) -> int:
+        """Takes a seat at a table and waits for the game to start."""
+        self.writer.write(frame(MessageType.JOIN, JOIN.pack(table_id, num_players)))
+        while not self.started:
+            await self.receive()
+        return self.seat
+
+    async def watch(self, table_id: int) -> None:
+        """Follows a table without a seat, from a snapshot of its current state."""
+        self.writer.write(frame(MessageType.WATCH, TABLE.pack(table_id)))
+        while self.game is None:
+            await self.receive()
+
+    async def receive(self) -> MessageType:
+        """Handles the next message from the server."""
+        type, payload = await read_message(self.reader)
+        self.bytes_received += 5 + len(payload)
+        if type == MessageType.DELTA:
+            self._apply(payload)
+        elif type == MessageType.WELCOME:
+            self.seat = payload[0]
+        elif type == MessageType.START or type == MessageType.SNAPSHOT:
+            self._reset(payload)
+            self.started = self.started or type == MessageType.START
+        elif type == MessageType.ERROR and self.game is None:
+            raise ServerError(ErrorCode(payload[0]).name)
+        return type
+
+    async def act(self, kind: ActionKind, target: int = 0) -> Union[ErrorCode, None]:
+        """Sends an action and waits for its events or its rejection. Only
+        the current player may act, so the next events are the answer."""
+        start = time.perf_counter()
+        self.writer.write(frame(MessageType.ACTION, ACTION.pack(kind, target)))
+        while True:
+            type, payload = await read_message(self.reader)
+            self.bytes_received += 5 + len(payload)
+            if type == MessageType.ERROR:
+                return ErrorCode(payload[0])
+            if type == MessageType.DELTA:
+                self.latencies.append(time.perf_counter() - start)
+                self._apply(payload)
+                return None
+
+    def _apply(self, delta: bytes) -> None:
+        sequence, events = decode_delta(delta)
+        if sequence <= self.sequence:
+            return
+        if sequence > self.sequence + 1:
+            # Missed deltas, they or a snapshot are requested once
+            if not self.syncing:
+                self.syncing = True
+                self.writer.write(frame(MessageType.SYNC, SEQUENCE.pack(self.sequence)))
+            return
+        self.syncing = False
+        self.sequence = sequence
+        for event in events:
+            self.history.apply(event)
+            self.phase = next_phase(self.phase, event)
+
+    def _reset(self, payload: bytes) -> None:
+        sequence, phase = SNAPSHOT.unpack_from(payload)
+        if self.game is not None and sequence <= self.sequence:
+            return
+        self.game = snapshot.decode(payload[SNAPSHOT.size:])
+        self.history = GameHistory(self.game, checkpoint_interval=0)
+        self.sequence = sequence
+        self.phase = Phase(phase)
+        self.syncing = False
+
+
+def choose_action(client: GameClient, rng: random.Random) -> tuple[ActionKind, int]:
+    """Returns a random legal action for the seat to move."""
+    game = client.game
+    map = game.map
+    topology = map.topology
+    player = game.current_player
+    phase = client.phase
+    if phase == Phase.SETUP_SETTLEMENT:
+        spots = sorted(topology.vertex_ids[v] for v in map.legal_settlement_spots(player))
+        return ActionKind.SETTLEMENT, rng.choice(spots)
+    if phase == Phase.SETUP_STREET:
+        # The settlement just built is the only one without a street yet
+        vertex = next(v for v in topology.vertices if map.catan_vertices[v].has_building(player)
+                      and not any(map.catan_edges[e].has_building(player)
+                                  for e in v.get_adjacent_edges() if e in map.catan_edges))
+        spots = sorted(topology.edge_ids[e] for e in vertex.get_adjacent_edges()
+                       if e in topology.edge_ids and map.may_build_street(player, e))
+        return ActionKind.STREET, rng.choice(spots)
+    if phase == Phase.ROLL:
+        return ActionKind.ROLL, 0
+    if phase == Phase.ROBBER:
+        robber = -1 if map.robber is None else topology.hex_ids[map.robber]
+        return ActionKind.ROBBER, rng.choice([h for h in range(topology.num_hexes) if h != robber])
+    actions = []
+    if player.streets and player.can_afford(STREET_COST):
+        actions.extend((ActionKind.STREET, topology.edge_ids[e]) for e in map.legal_street_spots(player))
+    if player.settlements and player.can_afford(SETTLEMENT_COST):
+        actions.extend((ActionKind.SETTLEMENT, topology.vertex_ids[v]) for v in map.legal_settlement_spots(player))
+    if player.citys and player.can_afford(CITY_COST):
+        actions.extend((ActionKind.CITY, i) for i, v in enumerate(topology.vertices)
+                       if map.may_build_city(player, v))
+    if not actions:
+        return ActionKind.END_TURN, 0
+    return rng.choice(sorted(actions))
+
+
+async def play(client: GameClient, rng: random.Random) -> None:
+    """Plays a seat with random actions until the game is over."""
+    while client.phase != Phase.OVER:
+        if client.my_turn:
+            error = await client.act(*choose_action(client, rng))
+            if error is not None:
+                raise ServerError(f"{error.name} in {client.phase.name}")
+        else:
+            await client.receive()
+
+
+async def follow(client: GameClient) -> None:
+    """Applies the deltas of a watched table until the game is over."""
+    while client.phase != Phase.OVER or client.syncing:
+        await client.receive()
+
+
+async def play_table(host: str, port: int, table_id: int, num_players: int, rng: random.Random,
+                     num_watchers: int = 0) -> list[GameClient]:
+    clients = [await GameClient.connect(host, port) for _ in range(num_players)]
+    await asyncio.gather(*(client.join(table_id, num_players) for client in clients))
+    players = [asyncio.ensure_future(play(client, random.Random(rng.getrandbits(64)))) for client in clients]
+    # Watchers join late, from a snapshot of the running game
+    watchers = [await GameClient.connect(host, port) for _ in range(num_watchers)]
+    for watcher in watchers:
+        await watcher.watch(table_id)
+    await asyncio.gather(*players, *(follow(watcher) for watcher in watchers))
+    for client in (*clients, *watchers):
+        await client.close()
+    return clients + watchers
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def load_test(num_tables: int, num_players: int = 3, host: str = "127.0.0.1",
+                    port: Union[int, None] = None, seed: int = 0, max_turns: int = 500,
+                    num_watchers: int = 0) -> str:
+    """Plays num_tables games at once and reports the action latencies.
+    Without a port a server is started in this process."""
+    from server import GameServer
+    server = None
+    if port is None:
+        server = await GameServer(seed, max_turns=max_turns).start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    tables = await asyncio.gather(*(play_table(host, port, i, num_players, random.Random(rng.getrandbits(64)),
+                                               num_watchers)
+                                    for i in range(num_tables)))
+    seconds = time.perf_counter() - start
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    clients = [client for table in tables for client in table]
+    latencies = [latency for client in clients for latency in client.latencies]
+    received = sum(client.bytes_received for client in clients)
+    return (f"{num_tables} tables, {len(clients)} clients, {len(latencies)} actions in {seconds:.2f}s "
+            f"({len(latencies) / seconds:.0f} actions/s)\n"
+            f"latency p50 {percentile(latencies, 50) * 1000:.2f} ms, "
+            f"p99 {percentile(latencies, 99) * 1000:.2f} ms, "
+            f"{received / (len(latencies) * (num_players + num_watchers)):.1f} bytes received "
+            f"per action and client")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Load test of the game server")
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="port of a running server, default: start one")
+    parser.add_argument("--watchers", type=int, default=0, help="watchers per table")
+    parser.add_argument("--max-turns", type=int, default=200)
+    args = parser.parse_args()
+    print(asyncio.run(load_test(args.tables, args.players, args.host, args.port, max_turns=args.max_turns,
+                                num_watchers=args.watchers)))
@@ -0,0 +1,165 @@
+"""Append-only files of fixed-size game snapshots.
+
+A dataset file starts with a small header (magic "CATD", format version,
+record size) followed by records that are snapshots as written by
+snapshot.encode. All games of a dataset must have the same number of
+players and board, so every record has the same size and record i starts
+at HEADER.size + i * record_size.
+
+Dataset maps the file with mmap, so records are read without copies and
+only the touched pages are loaded; chunks() streams files larger than RAM.
+Vectorized features on top of numpy.memmap are in dataset_numpy.py."""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Union
+from catan import CatanGame
+import mmap
+import os
+import snapshot
+import struct
+
+MAGIC = b"CATD"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xI")
+
+
+@dataclass(frozen=True)
+class RecordLayout:
+    """Byte offsets of the parts of a snapshot record."""
+    num_players: int
+    num_hexes: int
+    num_vertices: int
+    num_edges: int
+
+    @classmethod
+    def from_record(cls, record) -> RecordLayout:
+        return cls(*bytes(record[snapshot.HEADER.size - 4:snapshot.HEADER.size]))
+
+    @property
+    def hex_resources(self) -> int:
+        return snapshot.HEADER.size
+
+    @property
+    def hex_tokens(self) -> int:
+        return self.hex_resources + self.num_hexes
+
+    @property
+    def vertices(self) -> int:
+        return self.hex_tokens + self.num_hexes
+
+    @property
+    def edges(self) -> int:
+        return self.vertices + self.num_vertices
+
+    @property
+    def players(self) -> int:
+        return self.edges + self.num_edges
+
+    @property
+    def record_size(self) -> int:
+        return self.players + self.num_players * snapshot.PLAYER.size
+
+
+class DatasetWriter:
+    """Appends snapshots to a dataset file, creating it if necessary."""
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = path
+        self.file: BinaryIO = open(path, "ab")
+        self.record_size: Union[int, None] = None
+        size = self.file.tell()
+        if size > 0:
+            with open(path, "rb") as f:
+                self.record_size = read_header(f.read(HEADER.size))
+            # Drop a partial record left by an interrupted write, so new
+            # records stay aligned
+            num_records = (size - HEADER.size) // self.record_size
+            self.file.truncate(HEADER.size + num_records * self.record_size)
+
+    def __enter__(self) -> DatasetWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, game: CatanGame) -> None:
+        self.write_snapshot(snapshot.encode(game))
+
+    def write_snapshot(self, data: bytes) -> None:
+        if self.record_size is None:
+            self.record_size = len(data)
+            self.file.write(HEADER.pack(MAGIC, VERSION, self.record_size))
+        elif len(data) != self.record_size:
+            raise ValueError(f"Record of {len(data)} bytes in a dataset of {self.record_size} byte records")
+        self.file.write(data)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class Dataset:
+    """Read-only, memory-mapped view of a dataset file."""
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self.record_size = read_header(f.read(HEADER.size))
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Ignore a partly written last record
+        self.num_records = (len(self.mmap) - HEADER.size) // self.record_size
+        self.view = memoryview(self.mmap)
+        self.layout = RecordLayout.from_record(self[0]) if self.num_records else None
+
+    def __enter__(self) -> Dataset:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.num_records
+
+    def __getitem__(self, index: int) -> memoryview:
+        """Returns the raw record without copying it. Views must be released
+        before the dataset is closed."""
+        if index < 0:
+            index += self.num_records
+        if not 0 <= index < self.num_records:
+            raise IndexError("Record index out of range")
+        start = HEADER.size + index * self.record_size
+        return self.view[start:start + self.record_size]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for index in range(self.num_records):
+            yield self[index]
+
+    def snapshot(self, index: int) -> snapshot.Snapshot:
+        return snapshot.read(bytes(self[index]))
+
+    def game(self, index: int, map_class=None) -> CatanGame:
+        return snapshot.decode(bytes(self[index]), map_class)
+
+    def chunks(self, chunk_size: int = 4096) -> Iterator[memoryview]:
+        """Yields consecutive blocks of up to chunk_size records. Pages of
+        earlier chunks can be dropped by the OS, so memory use stays flat."""
+        for start in range(0, self.num_records, chunk_size):
+            stop = min(start + chunk_size, self.num_records)
+            yield self.view[HEADER.size + start * self.record_size:HEADER.size + stop * self.record_size]
+
+    def close(self) -> None:
+        self.view.release()
+        self.mmap.close()
+
+
+def read_header(data: bytes) -> int:
+    if len(data) < HEADER.size:
+        raise ValueError("Dataset header too short")
+    magic, version, record_size = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("Not a dataset file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported dataset version {version}")
+    return record_size
@@ -0,0 +1,82 @@
+"""Vectorized access to dataset files via numpy.memmap.
+
+Records are rows of an (N, record_size) uint8 array mapped from the file,
+and the features below work on any block of such rows, e.g. the chunks of
+iter_records, so datasets larger than RAM are processed chunk by chunk.
+
+Requires numpy."""
+from __future__ import annotations
+from typing import Iterator, Union
+from dataset import HEADER, RecordLayout, read_header
+from topology import BoardTopology
+import numpy as np
+import os
+
+# Number of dice combinations that roll each number token, 0 for the desert
+PIPS = np.array([0, 0, 1, 2, 3, 4, 5, 0, 5, 4, 3, 2, 1], dtype=np.int16)
+# Offset of the robber hex id in the snapshot header
+_ROBBER = 8
+
+
+def open_records(path: Union[str, os.PathLike]) -> np.ndarray:
+    """Maps a dataset file as an (N, record_size) uint8 array."""
+    with open(path, "rb") as f:
+        record_size = read_header(f.read(HEADER.size))
+    num_records = (os.path.getsize(path) - HEADER.size) // record_size
+    if num_records == 0:
+        return np.empty((0, record_size), dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size,
+                     shape=(num_records, record_size))
+
+
+def iter_records(path: Union[str, os.PathLike], chunk_size: int = 65536) -> Iterator[np.ndarray]:
+    """Yields blocks of up to chunk_size records of a dataset file."""
+    records = open_records(path)
+    for start in range(0, len(records), chunk_size):
+        yield records[start:start + chunk_size]
+
+
+def layout_of(records: np.ndarray) -> RecordLayout:
+    layout = RecordLayout.from_record(records[0].tobytes())
+    assert layout.record_size == records.shape[1], "Records do not match their layout"
+    return layout
+
+
+def ownership_planes(records: np.ndarray) -> np.ndarray:
+    """Returns an (N, players, vertices) int8 array with the building level
+    of each player on each vertex: 0 empty, 1 settlement, 2 city."""
+    layout = layout_of(records)
+    vertices = records[:, layout.vertices:layout.vertices + layout.num_vertices]
+    owner = (vertices & 15).astype(np.int16) - 1
+    level = (vertices >> 4) + 1
+    players = np.arange(layout.num_players)[None, :, None]
+    return np.where(owner[:, None, :] == players, level[:, None, :], 0).astype(np.int8)
+
+
+def street_planes(records: np.ndarray) -> np.ndarray:
+    """Returns an (N, players, edges) bool array of the streets of each player."""
+    layout = layout_of(records)
+    edges = records[:, layout.edges:layout.edges + layout.num_edges].astype(np.int16) - 1
+    return edges[:, None, :] == np.arange(layout.num_players)[None, :, None]
+
+
+def incidence_matrix(topology: BoardTopology) -> np.ndarray:
+    """Returns the (hexes, vertices) 0/1 matrix of which vertices touch which hex."""
+    matrix = np.zeros((topology.num_hexes, topology.num_vertices), dtype=np.int16)
+    for h, vertices in enumerate(topology.hex_vertices):
+        matrix[h, list(vertices)] = 1
+    return matrix
+
+
+def production_pips(records: np.ndarray, topology: BoardTopology) -> np.ndarray:
+    """Returns an (N, vertices) array with the summed pips of the hexes around
+    each vertex. The hex with the robber does not count. topology must be
+    the topology the records were written with."""
+    layout = layout_of(records)
+    assert (layout.num_hexes, layout.num_vertices) == (topology.num_hexes, topology.num_vertices), \
+        "Records do not belong to this topology"
+    tokens = records[:, layout.hex_tokens:layout.hex_tokens + layout.num_hexes]
+    pips = PIPS[tokens]
+    robbed = np.arange(layout.num_hexes)[None, :] == records[:, _ROBBER, None]
+    pips = np.where(robbed, 0, pips)
+    return pips @ incidence_matrix(topology)
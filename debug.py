@@ -3,9 +3,15 @@ import sys
 from hex import Hex, Edge, Vertex, Point, Layout, ORIENTATION_POINTY, NE, E, SE, SW, W, NW
 from catan import CatanMap, CatanGame, Player
 from catan_constants import ResourceType
+from events import GameHistory
+from geometry import get_geometry
+from highlights import LegalMoveCache
+from picking import get_picking_index
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
+MAX_FPS = 60
+IDLE_FPS = 10
 
 COLORS = {
     ResourceType.BRICK: "brown", 
@@ -32,6 +38,28 @@ class Game:
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Settlers of Catan")
         self.myfont = pygame.font.SysFont("monospace", 16)
+        self.clock = pygame.time.Clock()
+        self.history = GameHistory(self.game)
+        self.legal_moves = LegalMoveCache(self.history, self.layout)
+        # Pre-rendered highlight sprites, keyed by the offset between the
+        # ends of an edge or None for a vertex
+        self.stamps: dict = {}
+        self.buttons = [Button((255,0,0), 50, 200, 100, 50, 'Settlement'),
+                        Button((255,0,0), 50, 260, 100, 50, 'Street'),
+                        Button((255,0,0), 50, 320, 100, 50, 'Next Player')]
+        # Layers: the static background, the board with its buildings on top
+        # and, while placing, the board with the legal spots highlighted.
+        # Regions of the screen are restored from the topmost layer (base).
+        self.background = self.render_background()
+        self.board = self.background.copy()
+        self.drawn_settlements: dict[Vertex, tuple] = {}
+        self.drawn_streets: dict[Edge, tuple] = {}
+        self.update_board()
+        self.base = self.board
+        self.mode = ""
+        self.highlight_rects: list[pygame.Rect] = []
+        self.cursor_rect = None
+        self.cursor_pos = None
         self.main()
 
     def debug(self):
@@ -45,100 +73,179 @@ class Game:
         self.game.players[1].build_street(self.map, e2)
         self.map.is_start = False
 
-    def draw_hexes(self) -> None:
+    def render_background(self) -> pygame.Surface:
+        """Renders everything that does not change during a game once: the
+        buttons and the hexes with their number tokens."""
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill("beige")
+        for button in self.buttons:
+            button.draw(background, (0, 0, 0))
+        self.draw_hexes(background)
+        return background
+
+    def draw_hexes(self, surface) -> None:
+        geometry = get_geometry(self.layout)
+        labels = {}
         for hex in self.map.catan_hexes:
-            p = hex.to_point(self.layout)
-            poly = hex.get_all_polygon_corners(self.layout)
-            pygame.draw.polygon(self.screen, COLORS[self.map.catan_hexes[hex].resource_type], poly)
-            pygame.draw.polygon(self.screen, "black", poly, 3)
-            if not self.map.catan_hexes[hex].number_token == 0:
-                pygame.draw.circle(self.screen, (255, 255, 255), (p.x, p.y), 20)
-                number_label = self.myfont.render(str(self.map.catan_hexes[hex].number_token), 1, (0, 0, 0))
-                self.screen.blit(number_label, (p.x - 8, p.y - 8))
-
-    def draw_edges(self) -> None:
-        for edge in self.map.catan_edges:
-            if self.map.may_build_street(self.game.current_player, edge):
-                vertices = edge.get_adjacent_vertices()
-                p1 = vertices[0].to_point(self.layout)
-                p2 = vertices[1].to_point(self.layout)
-                pygame.draw.line(self.screen, "white", (p1.x, p1.y), (p2.x, p2.y), 5)
-
-    def draw_vertices(self) -> None:
-        for vertex in self.map.catan_vertices:
-            if self.map.may_build_settlement(self.game.current_player, vertex):
-                p = vertex.to_point(self.layout)
-                pygame.draw.circle(self.screen, "white", (p.x, p.y), 10)
-
-    def draw_settlements(self) -> None:
-        for vertex in self.map.catan_vertices:
-            catan_vertex = self.map.catan_vertices[vertex]
-            if catan_vertex.has_building():
-                p = vertex.to_point(self.layout)
-                pygame.draw.circle(self.screen, catan_vertex.building.player.color, (p.x, p.y), 10)
+            p = geometry.hex_center(hex)
+            poly = geometry.hex_polygon(hex)
+            pygame.draw.polygon(surface, COLORS[self.map.catan_hexes[hex].resource_type], poly)
+            pygame.draw.polygon(surface, "black", poly, 3)
+            number_token = self.map.catan_hexes[hex].number_token
+            if not number_token == 0:
+                if number_token not in labels:
+                    labels[number_token] = self.myfont.render(str(number_token), 1, (0, 0, 0))
+                pygame.draw.circle(surface, (255, 255, 255), p, 20)
+                surface.blit(labels[number_token], (p[0] - 8, p[1] - 8))
+
+    def stamp(self, key) -> pygame.Surface:
+        stamp = self.stamps.get(key)
+        if stamp is None:
+            if key is None:
+                stamp = pygame.Surface((20, 20), pygame.SRCALPHA)
+                pygame.draw.circle(stamp, "white", (10, 10), 10)
+            else:
+                dx, dy = key
+                stamp = pygame.Surface((dx + 6, abs(dy) + 6), pygame.SRCALPHA)
+                if dy >= 0:
+                    pygame.draw.line(stamp, "white", (3, 3), (3 + dx, 3 + dy), 5)
+                else:
+                    pygame.draw.line(stamp, "white", (3, 3 - dy), (3 + dx, 3), 5)
+            stamp = self.stamps[key] = stamp.convert_alpha()
+        return stamp
 
-    def draw_streets(self) -> None:
-        for edge in self.map.catan_edges:
-            catan_edge = self.map.catan_edges[edge]
+    def draw_highlights(self, surface, mode: str) -> list:
+        """Blits the legal spots of the current player in one batch and
+        returns their rects."""
+        player = self.game.current_player
+        blits = []
+        if mode == "settlement":
+            stamp = self.stamp(None)
+            for x, y in self.legal_moves.settlement_spots(player).values():
+                blits.append((stamp, (x - 10, y - 10)))
+        else:
+            for (x1, y1), (x2, y2) in self.legal_moves.street_spots(player).values():
+                if (x2, y2) < (x1, y1):
+                    x1, y1, x2, y2 = x2, y2, x1, y1
+                stamp = self.stamp((round(x2 - x1), round(y2 - y1)))
+                blits.append((stamp, (x1 - 3, min(y1, y2) - 3)))
+        return surface.blits(blits)
+
+    def update_board(self) -> list:
+        """Draws new buildings onto the board layer and returns the changed
+        regions. Only redraws the whole layer if a building was removed."""
+        geometry = get_geometry(self.layout)
+        settlements = {}
+        for vertex, catan_vertex in self.map.catan_vertices.items():
+            if catan_vertex.has_building():
+                building = catan_vertex.building
+                settlements[vertex] = (building.player.color, building.resource_factor)
+        streets = {}
+        for edge, catan_edge in self.map.catan_edges.items():
             if catan_edge.has_building():
-                vertices = edge.get_adjacent_vertices()
-                p1 = vertices[0].to_point(self.layout)
-                p2 = vertices[1].to_point(self.layout)
-                pygame.draw.line(self.screen, catan_edge.building.player.color, (p1.x, p1.y), (p2.x, p2.y), 5)
+                streets[edge] = (catan_edge.building.player.color,)
+        rects = []
+        if not (self.drawn_settlements.keys() <= settlements.keys()
+                and self.drawn_streets.keys() <= streets.keys()):
+            self.board.blit(self.background, (0, 0))
+            self.drawn_settlements = {}
+            self.drawn_streets = {}
+            rects.append(self.board.get_rect())
+        for edge, value in streets.items():
+            if self.drawn_streets.get(edge) != value:
+                p1, p2 = geometry.edge_line(edge)
+                rects.append(pygame.draw.line(self.board, value[0], p1, p2, 5))
+                # Settlements are drawn on top of the streets
+                for vertex in edge.get_adjacent_vertices():
+                    self.drawn_settlements.pop(vertex, None)
+        for vertex, (color, level) in settlements.items():
+            if self.drawn_settlements.get(vertex) != (color, level):
+                rects.append(pygame.draw.circle(self.board, color, geometry.vertex_point(vertex), 8 + 2 * level))
+        self.drawn_settlements = settlements
+        self.drawn_streets = streets
+        return rects
 
-    def draw_circle(self, pos) -> None:
-        pygame.draw.circle(self.screen, self.game.current_player.color, (pos[0], pos[1]), 10)
+    def set_mode(self, mode: str) -> list:
+        """Switches the placement mode and returns the regions that change."""
+        rects = list(self.highlight_rects)
+        if self.cursor_rect is not None:
+            rects.append(self.cursor_rect)
+        self.mode = mode
+        self.cursor_rect = None
+        if mode:
+            self.base = self.board.copy()
+            self.highlight_rects = self.draw_highlights(self.base, mode)
+            rects.extend(self.highlight_rects)
+        else:
+            self.base = self.board
+            self.highlight_rects = []
+        return rects
 
-    def draw_line(self, pos) -> None:
-        pygame.draw.line(self.screen, self.game.current_player.color, (pos[0] - 20, pos[1]), (pos[0] + 20, pos[1]), 5)
+    def draw_circle(self, pos):
+        return pygame.draw.circle(self.screen, self.game.current_player.color, (pos[0], pos[1]), 10)
+
+    def draw_line(self, pos):
+        return pygame.draw.line(self.screen, self.game.current_player.color, (pos[0] - 20, pos[1]), (pos[0] + 20, pos[1]), 5)
 
     def main(self) -> None:
         running = True
-        mode = ""
-        button1 = Button((255,0,0), 50, 200, 100, 50, 'Settlement')
-        button2 = Button((255,0,0), 50, 260, 100, 50, 'Street')
-        button3 = Button((255,0,0), 50, 320, 100, 50, 'Next Player')
+        self.screen.blit(self.base, (0, 0))
+        pygame.display.flip()
+        fps_time = pygame.time.get_ticks()
 
         while running:
+            dirty = []
             for event in pygame.event.get():
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    if mode == "":
-                        if button1.is_over(pygame.mouse.get_pos()):
-                            mode = "settlement"
-                        if button2.is_over(pygame.mouse.get_pos()):
-                            mode = "street"
-                        if button3.is_over(pygame.mouse.get_pos()):
-                            self.game.next_player()
-                            mode = ""
-                    elif mode == "settlement":
-                        pos = pygame.mouse.get_pos()
-                        p = Point(pos[0], pos[1])
-                        vertex = Vertex.from_point(self.layout, p)
-                        self.game.current_player.build_settlement(self.map, vertex)
-                        mode = ""
-                    elif mode == "street":
-                        pos = pygame.mouse.get_pos()
-                        p = Point(pos[0], pos[1])
-                        edge = Edge.from_point(self.layout, p)
-                        self.game.current_player.build_street(self.map, edge)
-                        mode = ""
+                    if self.mode == "":
+                        if self.buttons[0].is_over(pygame.mouse.get_pos()):
+                            dirty += self.set_mode("settlement")
+                        if self.buttons[1].is_over(pygame.mouse.get_pos()):
+                            dirty += self.set_mode("street")
+                        if self.buttons[2].is_over(pygame.mouse.get_pos()):
+                            self.history.end_turn()
+                    elif self.mode == "settlement":
+                        vertex = get_picking_index(self.layout, self.map.topology).vertex_at(pygame.mouse.get_pos())
+                        player = self.game.current_player
+                        if vertex not in self.legal_moves.settlement_spots(player) or not player.settlements:
+                            continue
+                        self.history.build_settlement(player, vertex)
+                        dirty += self.update_board()
+                        dirty += self.set_mode("")
+                    elif self.mode == "street":
+                        edge = get_picking_index(self.layout, self.map.topology).edge_at(pygame.mouse.get_pos())
+                        player = self.game.current_player
+                        if edge not in self.legal_moves.street_spots(player) or not player.streets:
+                            continue
+                        self.history.build_street(player, edge)
+                        dirty += self.update_board()
+                        dirty += self.set_mode("")
                 if event.type == pygame.QUIT:
                     running = False
-        
-            self.screen.fill("beige")
-            button1.draw(self.screen, (0, 0, 0))
-            button2.draw(self.screen, (0, 0, 0))
-            button3.draw(self.screen, (0, 0, 0))
-            self.draw_hexes()
-            self.draw_streets()
-            self.draw_settlements()
-            if mode == "settlement":
-                self.draw_vertices()
-                self.draw_circle(pygame.mouse.get_pos())
-            if mode == "street":
-                self.draw_edges()
-                self.draw_line(pygame.mouse.get_pos())
-            pygame.display.flip()
+
+            for rect in dirty:
+                self.screen.blit(self.base, rect, rect)
+            if self.mode:
+                # Hover preview: restore the region under the old cursor and draw the new one
+                pos = pygame.mouse.get_pos()
+                if pos != self.cursor_pos or dirty:
+                    if self.cursor_rect is not None:
+                        self.screen.blit(self.base, self.cursor_rect, self.cursor_rect)
+                        dirty.append(self.cursor_rect)
+                    if self.mode == "settlement":
+                        self.cursor_rect = self.draw_circle(pos)
+                    else:
+                        self.cursor_rect = self.draw_line(pos)
+                    dirty.append(self.cursor_rect)
+                    self.cursor_pos = pos
+            if dirty:
+                pygame.display.update(dirty)
+
+            # Idle at a lower frame rate while nothing follows the mouse
+            self.clock.tick(MAX_FPS if self.mode else IDLE_FPS)
+            if pygame.time.get_ticks() - fps_time >= 1000:
+                fps_time = pygame.time.get_ticks()
+                pygame.display.set_caption(f"Settlers of Catan ({self.clock.get_fps():.0f} fps)")
 
         pygame.quit()
         sys.exit()
@@ -0,0 +1,309 @@
+"""Event sourced changes of a game.
+
+Every change of a game (dice roll, build, robber move, resource change, end
+of turn, state change) is an event that GameHistory applies to the game and
+appends to an EventLog. An event is packed into a single 64 bit int:
+
+    bits  0-7   EventType
+    bits  8-15  player id
+    bits 16-31  target: vertex, edge or hex id, resource type or player id
+    bits 32-47  value, signed: dice total, level, resource amount, ...
+
+Every event can be reversed from the event and the current state alone, so
+undo takes O(1) per event and needs no copy of the game. The log keeps a
+snapshot of the initial state and one every checkpoint_interval events (or
+none more if it is 0), from which any earlier state is rebuilt by
+replaying the events after it. Listeners are called after every
+applied or undone event, so other code can react to changes of the game."""
+from __future__ import annotations
+from array import array
+from enum import IntEnum
+from typing import Callable, NamedTuple, Union
+from catan import CatanGame, CatanMap, DevelopmentCard, Player, State
+from catan_constants import ResourceType, STREET_COST, SETTLEMENT_COST, CITY_COST
+from hex import Edge, Hex, Vertex
+import snapshot
+
+
+class EventType(IntEnum):
+    ROLL = 1        # value: dice total, resources are distributed unless 7
+    SETTLEMENT = 2  # target: vertex id, value: level, 1 settlement, 2 city
+    STREET = 3      # target: edge id
+    ROBBER = 4      # target: hex id, value: previous robber hex id or -1
+    GAIN = 5        # target: ResourceType value, value: amount, may be negative
+    TURN = 6        # player: player whose turn ends, target: next player id
+    CARD = 7        # player draws a development card
+    STATE = 8       # target: new State value, value: previous State value
+
+
+class Event(NamedTuple):
+    type: EventType
+    player: int
+    target: int
+    value: int
+
+
+def pack_event(type: int, player: int, target: int, value: int) -> int:
+    return type | player << 8 | target << 16 | (value & 0xFFFF) << 32
+
+
+def unpack_event(packed: int) -> Event:
+    value = packed >> 32 & 0xFFFF
+    if value >= 0x8000:
+        value -= 0x10000
+    return Event(EventType(packed & 0xFF), packed >> 8 & 0xFF, packed >> 16 & 0xFFFF, value)
+
+
+Listener = Callable[[Event, bool], None]
+_RESOURCE_TYPES = {r.value: r for r in ResourceType}
+_STATES = {s.value: s for s in State}
+
+
+class EventLog:
+    """Packed events and the snapshots taken every checkpoint_interval events."""
+
+    def __init__(self, checkpoint_interval: int = 256) -> None:
+        self.events = array("q")
+        self.checkpoint_interval = checkpoint_interval
+        # Event index -> snapshot of the game before that event
+        self.checkpoints: dict[int, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __getitem__(self, index: int) -> Event:
+        return unpack_event(self.events[index])
+
+    def to_bytes(self) -> bytes:
+        return self.events.tobytes()
+
+    def truncate(self, length: int) -> None:
+        del self.events[length:]
+        for index in [i for i in self.checkpoints if i > length]:
+            del self.checkpoints[index]
+
+    def replay(self, index: Union[int, None] = None,
+               map_class: Union[type[CatanMap], None] = None) -> CatanGame:
+        """Rebuilds the game before the event at index, by default after the
+        last event, from the closest checkpoint."""
+        if index is None:
+            index = len(self.events)
+        start = max(i for i in self.checkpoints if i <= index)
+        game = snapshot.decode(self.checkpoints[start], map_class)
+        history = GameHistory(game, checkpoint_interval=0)
+        for packed in self.events[start:index]:
+            history.apply(unpack_event(packed))
+        return game
+
+
+class GameHistory:
+    """Applies events to a game and records them, with undo."""
+
+    def __init__(self, game: CatanGame, checkpoint_interval: int = 256) -> None:
+        self.game = game
+        self.log = EventLog(checkpoint_interval)
+        self.listeners: list[Listener] = []
+        # Every replay can start from the initial state
+        self.log.checkpoints[0] = snapshot.encode(game)
+
+    def __len__(self) -> int:
+        return len(self.log)
+
+    def subscribe(self, listener: Listener) -> None:
+        """listener(event, undone) is called after every change."""
+        self.listeners.append(listener)
+
+    def apply(self, event: Event) -> None:
+        log = self.log
+        interval = log.checkpoint_interval
+        if interval and len(log) % interval == 0 and len(log) not in log.checkpoints:
+            log.checkpoints[len(log)] = snapshot.encode(self.game)
+        _APPLY[event.type](self.game, event)
+        log.events.append(pack_event(*event))
+        for listener in self.listeners:
+            listener(event, False)
+
+    def undo(self, count: int = 1) -> None:
+        """Reverses the last count events."""
+        log = self.log
+        for _ in range(count):
+            event = unpack_event(log.events.pop())
+            _UNDO[event.type](self.game, event)
+            for listener in self.listeners:
+                listener(event, True)
+        checkpoints = log.checkpoints
+        if checkpoints and next(reversed(checkpoints)) > len(log):
+            log.truncate(len(log))
+
+    def undo_to(self, mark: int) -> None:
+        """Reverses all events after the given log length."""
+        self.undo(len(self.log) - mark)
+
+    # Convenience methods that build the events from game objects
+
+    def roll(self, number: int) -> None:
+        self.apply(Event(EventType.ROLL, self.game.current_player.id, 0, number))
+
+    def gain(self, player: Player, resource_type: ResourceType, amount: int = 1) -> None:
+        self.apply(Event(EventType.GAIN, player.id, resource_type.value, amount))
+
+    def pay(self, player: Player, cost: dict[ResourceType, int]) -> None:
+        for resource_type, amount in cost.items():
+            self.gain(player, resource_type, -amount)
+
+    def trade(self, player: Player, other: Union[Player, None], give: dict[ResourceType, int],
+              get: dict[ResourceType, int]) -> None:
+        """Exchanges resources with another player, or with the bank if
+        other is None."""
+        for resource_type, amount in give.items():
+            self.gain(player, resource_type, -amount)
+            if other is not None:
+                self.gain(other, resource_type, amount)
+        for resource_type, amount in get.items():
+            self.gain(player, resource_type, amount)
+            if other is not None:
+                self.gain(other, resource_type, -amount)
+
+    def build_settlement(self, player: Player, vertex: Vertex, pay: bool = False) -> None:
+        if pay:
+            self.pay(player, SETTLEMENT_COST)
+        self.apply(Event(EventType.SETTLEMENT, player.id, self.game.map.topology.vertex_ids[vertex], 1))
+
+    def build_city(self, player: Player, vertex: Vertex, pay: bool = False) -> None:
+        if pay:
+            self.pay(player, CITY_COST)
+        self.apply(Event(EventType.SETTLEMENT, player.id, self.game.map.topology.vertex_ids[vertex], 2))
+
+    def build_street(self, player: Player, edge: Edge, pay: bool = False) -> None:
+        if pay:
+            self.pay(player, STREET_COST)
+        self.apply(Event(EventType.STREET, player.id, self.game.map.topology.edge_ids[edge], 0))
+
+    def move_robber(self, hex: Hex) -> None:
+        map = self.game.map
+        previous = -1 if map.robber is None else map.topology.hex_ids[map.robber]
+        self.apply(Event(EventType.ROBBER, self.game.current_player.id, map.topology.hex_ids[hex], previous))
+
+    def draw_card(self, player: Player) -> None:
+        self.apply(Event(EventType.CARD, player.id, 0, 0))
+
+    def end_turn(self, next_player: Union[Player, None] = None) -> None:
+        """Passes the turn to next_player, by default the next player in order."""
+        game = self.game
+        if next_player is None:
+            next_player = game.players[(game.current_player.id + 1) % len(game.players)]
+        self.apply(Event(EventType.TURN, game.current_player.id, next_player.id, 0))
+
+    def set_state(self, state: State) -> None:
+        """Changes the state of the game. The start phase of the map ends
+        with GAME_START."""
+        self.apply(Event(EventType.STATE, self.game.current_player.id, state.value, self.game.state.value))
+
+
+def _roll(game: CatanGame, event: Event) -> None:
+    if event.value != 7:
+        game.distribute_resources(event.value)
+
+
+def _undo_roll(game: CatanGame, event: Event) -> None:
+    if event.value != 7:
+        # The map did not change since the roll, so neither did the production
+        for player_id, resources in game.map.get_production(event.value).items():
+            player = game.players[player_id]
+            for resource_type, amount in resources.items():
+                player.gain(resource_type, -amount)
+
+
+def _settlement(game: CatanGame, event: Event) -> None:
+    player = game.players[event.player]
+    map = game.map
+    vertex = map.topology.vertices[event.target]
+    if event.value == 2:
+        settlement = map.catan_vertices[vertex].building
+        map.build_settlement(player.citys.pop(), vertex)
+        player.settlements.append(settlement)
+    else:
+        map.build_settlement(player.settlements.pop(), vertex)
+    player.victory_points += 1
+
+
+def _undo_settlement(game: CatanGame, event: Event) -> None:
+    player = game.players[event.player]
+    map = game.map
+    vertex = map.topology.vertices[event.target]
+    building = map.catan_vertices[vertex].building
+    if event.value == 2:
+        map.build_settlement(player.settlements.pop(), vertex)
+        player.citys.append(building)
+    else:
+        map.remove_settlement(vertex)
+        player.settlements.append(building)
+    player.victory_points -= 1
+
+
+def _street(game: CatanGame, event: Event) -> None:
+    game.map.build_street(game.players[event.player].streets.pop(), game.map.topology.edges[event.target])
+
+
+def _undo_street(game: CatanGame, event: Event) -> None:
+    edge = game.map.topology.edges[event.target]
+    street = game.map.catan_edges[edge].building
+    game.map.remove_street(edge)
+    game.players[event.player].streets.append(street)
+
+
+def _robber(game: CatanGame, event: Event) -> None:
+    game.map.move_robber(game.map.topology.hexes[event.target])
+
+
+def _undo_robber(game: CatanGame, event: Event) -> None:
+    map = game.map
+    if event.value >= 0:
+        map.move_robber(map.topology.hexes[event.value])
+    else:
+        map.set_robber(map.topology.hexes[event.target], False)
+
+
+def _gain(game: CatanGame, event: Event) -> None:
+    game.players[event.player].gain(_RESOURCE_TYPES[event.target], event.value)
+
+
+def _undo_gain(game: CatanGame, event: Event) -> None:
+    game.players[event.player].gain(_RESOURCE_TYPES[event.target], -event.value)
+
+
+def _turn(game: CatanGame, event: Event) -> None:
+    game.current_player = game.players[event.target]
+
+
+def _undo_turn(game: CatanGame, event: Event) -> None:
+    game.current_player = game.players[event.player]
+
+
+def _card(game: CatanGame, event: Event) -> None:
+    game.players[event.player].add_development_card(DevelopmentCard())
+
+
+def _undo_card(game: CatanGame, event: Event) -> None:
+    game.players[event.player].remove_development_card()
+
+
+def _set_state(game: CatanGame, state: State) -> None:
+    game.state = state
+    game.map.is_start = state == State.GAME_START
+
+
+def _state(game: CatanGame, event: Event) -> None:
+    _set_state(game, _STATES[event.target])
+
+
+def _undo_state(game: CatanGame, event: Event) -> None:
+    _set_state(game, _STATES[event.value])
+
+
+_APPLY = {EventType.ROLL: _roll, EventType.SETTLEMENT: _settlement, EventType.STREET: _street,
+          EventType.ROBBER: _robber, EventType.GAIN: _gain, EventType.TURN: _turn,
+          EventType.CARD: _card, EventType.STATE: _state}
+_UNDO = {EventType.ROLL: _undo_roll, EventType.SETTLEMENT: _undo_settlement,
+         EventType.STREET: _undo_street, EventType.ROBBER: _undo_robber, EventType.GAIN: _undo_gain,
+         EventType.TURN: _undo_turn, EventType.CARD: _undo_card, EventType.STATE: _undo_state}
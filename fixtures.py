@@ -0,0 +1,21 @@
+"""Reproducible games for the tests."""
+from __future__ import annotations
+from typing import Union
+from catan import CatanGame
+from simulator import RandomAgent, Simulator
+import random
+
+
+def random_simulator(num_players: int = 3, **options) -> Simulator:
+    """Returns a Simulator of RandomAgents seeded with their player ids.
+    options are passed on to the Simulator."""
+    return Simulator([RandomAgent(random.Random(i)) for i in range(num_players)], **options)
+
+
+def set_up_game(simulator: Union[Simulator, None] = None, seed: int = 0) -> CatanGame:
+    """Returns the game of a seed right after the setup phase, by default
+    with three random agents."""
+    simulator = simulator or random_simulator()
+    game = simulator.new_game(seed)
+    simulator.setup(game)
+    return game
@@ -0,0 +1,318 @@
+"""Forkable game state for tree search.
+
+GameState holds the mutable part of a game in a few flat containers on
+topology ids: a bytearray per vertex and edge (in the snapshot encoding),
+flat lists of resource and piece counts, and bitmasks for the placement
+rules. Everything that never changes during a game (topology, hexes,
+production tables) lives in a Board shared by all states.
+
+fork() is O(1): the child shares all containers with its parent and copies
+a container only before its first write (copy-on-write). Bitmasks are
+immutable ints and are shared for free. So a branch only pays for the
+parts it mutates, and discarding it costs nothing.
+
+Hashes are the same Zobrist hashes as CatanGame.state_hash, and encode()
+writes the same bytes as snapshot.encode."""
+from __future__ import annotations
+from typing import Union
+from catan import CatanGame
+from catan_bitboard import to_mask
+from catan_constants import ResourceType, STREET_COST, SETTLEMENT_COST, CITY_COST
+from topology import BoardTopology
+from zobrist import zobrist_key, resource_key, development_cards_key, map_hash, \
+                    SETTLEMENT, STREET, ROBBER, TURN
+import snapshot
+
+NUM_RESOURCES = 5
+NO_ROBBER = -1
+# Pieces per player: settlements, cities, streets
+PIECES = (5, 4, 15)
+
+_VERTICES = 1
+_EDGES = 2
+_RESOURCES = 4
+_PIECES = 8
+_PLAYERS = 16
+_MASKS = 32
+_HASHES = 64
+
+
+class Board:
+    """The parts of a game that never change, shared by all its states."""
+
+    def __init__(self, game: CatanGame) -> None:
+        map = game.map
+        self.topology: BoardTopology = map.topology
+        t = self.topology
+        self.num_players = len(game.players)
+        hexes = [map.catan_hexes[hex] for hex in t.hexes]
+        self.hex_resources = bytes(h.resource_type.value for h in hexes)
+        self.hex_tokens = bytes(h.number_token for h in hexes)
+        # Hex ids per number token
+        self.token_hexes: dict[int, tuple[int, ...]] = {
+            number: tuple(i for i, token in enumerate(self.hex_tokens) if token == number)
+            for number in range(2, 13)}
+        self.all_vertices = (1 << t.num_vertices) - 1
+        self.vertex_masks = [1 << v for v in range(t.num_vertices)]
+        self.vertex_vertex_masks = [to_mask(row) for row in t.vertex_vertices]
+        self.edge_edge_masks = [to_mask(row) for row in t.edge_edges]
+        self.edge_vertex_masks = [to_mask(row) for row in t.edge_vertices]
+        self.all_edges = (1 << t.num_edges) - 1
+
+
+class GameState:
+    """Compact, forkable state of a game on a shared Board."""
+
+    __slots__ = ("board", "vertices", "edges", "resources", "pieces", "victory_points",
+                 "development_cards", "robber", "current_player", "phase", "is_start",
+                 "occupied_vertices", "blocked_vertices", "occupied_edges", "settlement_masks",
+                 "street_vertex_masks", "street_edge_masks", "map_hash", "player_hash", "_owned")
+
+    @classmethod
+    def from_game(cls, game: CatanGame, board: Union[Board, None] = None) -> GameState:
+        board = board or Board(game)
+        t = board.topology
+        map = game.map
+        num_players = board.num_players
+        state = cls.__new__(cls)
+        state.board = board
+        state.vertices = bytearray(t.num_vertices)
+        state.edges = bytearray(t.num_edges)
+        state.resources = [0] * (num_players * NUM_RESOURCES)
+        state.pieces = [count for _ in range(num_players) for count in PIECES]
+        state.victory_points = [player.victory_points for player in game.players]
+        state.development_cards = [len(player.development_cards) for player in game.players]
+        state.robber = NO_ROBBER if map.robber is None else t.hex_ids[map.robber]
+        state.current_player = game.current_player.id
+        state.phase = game.state.value
+        state.is_start = map.is_start
+        state.occupied_vertices = state.blocked_vertices = state.occupied_edges = 0
+        state.settlement_masks = [0] * num_players
+        state.street_vertex_masks = [0] * num_players
+        state.street_edge_masks = [0] * num_players
+        state.map_hash = map_hash(map)
+        state.player_hash = [player.zobrist for player in game.players]
+        state._owned = -1
+        for player in game.players:
+            for resource_type, count in player.resources.items():
+                state.resources[player.id * NUM_RESOURCES + resource_type.value - 1] = count
+        # Replay the buildings to set up counts and masks, then reset the hash
+        for v, vertex in enumerate(t.vertices):
+            catan_vertex = map.catan_vertices[vertex]
+            if catan_vertex.has_building():
+                building = catan_vertex.building
+                state._place(building.player.id, v, 1)
+                if building.resource_factor == 2:
+                    state._place(building.player.id, v, 2)
+        for e, edge in enumerate(t.edges):
+            catan_edge = map.catan_edges[edge]
+            if catan_edge.has_building():
+                state._place_street(catan_edge.building.player.id, e)
+        state.victory_points = [player.victory_points for player in game.players]
+        state.map_hash = map_hash(map)
+        return state
+
+    def fork(self) -> GameState:
+        """Returns a child state sharing all containers with this one."""
+        child = GameState.__new__(GameState)
+        child.board = self.board
+        child.vertices = self.vertices
+        child.edges = self.edges
+        child.resources = self.resources
+        child.pieces = self.pieces
+        child.victory_points = self.victory_points
+        child.development_cards = self.development_cards
+        child.robber = self.robber
+        child.current_player = self.current_player
+        child.phase = self.phase
+        child.is_start = self.is_start
+        child.occupied_vertices = self.occupied_vertices
+        child.blocked_vertices = self.blocked_vertices
+        child.occupied_edges = self.occupied_edges
+        child.settlement_masks = self.settlement_masks
+        child.street_vertex_masks = self.street_vertex_masks
+        child.street_edge_masks = self.street_edge_masks
+        child.map_hash = self.map_hash
+        child.player_hash = self.player_hash
+        child._owned = 0
+        # The parent must not write into containers shared with the child
+        self._owned = 0
+        return child
+
+    def state_hash(self) -> int:
+        h = self.map_hash ^ zobrist_key(TURN, self.current_player)
+        for player_hash in self.player_hash:
+            h ^= player_hash
+        return h
+
+    def encode(self) -> bytes:
+        """Returns the snapshot of the state, see snapshot.py."""
+        board = self.board
+        t = board.topology
+        parts = [snapshot.HEADER.pack(snapshot.MAGIC, snapshot.VERSION, int(self.is_start), self.phase,
+                                      self.current_player,
+                                      snapshot.NO_ROBBER if self.robber == NO_ROBBER else self.robber,
+                                      board.num_players, t.num_hexes, t.num_vertices, t.num_edges),
+                 board.hex_resources, board.hex_tokens, bytes(self.vertices), bytes(self.edges)]
+        for p in range(board.num_players):
+            parts.append(snapshot.PLAYER.pack(self.victory_points[p], self.development_cards[p],
+                                              *self.resources[p * NUM_RESOURCES:(p + 1) * NUM_RESOURCES]))
+        return b"".join(parts)
+
+    # Queries
+
+    def resource(self, player_id: int, resource_type: ResourceType) -> int:
+        return self.resources[player_id * NUM_RESOURCES + resource_type.value - 1]
+
+    def can_afford(self, player_id: int, cost: dict[ResourceType, int]) -> bool:
+        resources = self.resources
+        base = player_id * NUM_RESOURCES - 1
+        for resource_type, amount in cost.items():
+            if resources[base + resource_type.value] < amount:
+                return False
+        return True
+
+    def legal_settlements(self, player_id: int) -> int:
+        """Returns the mask of vertices the player may build a settlement on."""
+        if not self.pieces[player_id * 3]:
+            return 0
+        mask = self.board.all_vertices & ~self.blocked_vertices
+        if not self.is_start:
+            mask &= self.street_vertex_masks[player_id]
+        return mask
+
+    def legal_cities(self, player_id: int) -> int:
+        return self.settlement_masks[player_id] if self.pieces[player_id * 3 + 1] else 0
+
+    def legal_streets(self, player_id: int) -> int:
+        if not self.pieces[player_id * 3 + 2]:
+            return 0
+        mask = self.board.all_edges & ~self.occupied_edges
+        if not self.is_start:
+            mask &= self.street_edge_masks[player_id]
+        return mask
+
+    # Changes
+
+    def roll(self, number: int) -> None:
+        """Hands out the resources of a dice roll."""
+        board = self.board
+        hex_vertices = board.topology.hex_vertices
+        vertices = self.vertices
+        for h in board.token_hexes.get(number, ()):
+            if h == self.robber:
+                continue
+            resource = board.hex_resources[h] - 1
+            for v in hex_vertices[h]:
+                value = vertices[v]
+                if value:
+                    self.gain((value & 15) - 1, resource, (value >> 4) + 1)
+
+    def gain(self, player_id: int, resource: int, amount: int) -> None:
+        """Changes a resource count. resource is the ResourceType value - 1."""
+        owned = self._owned
+        if not owned & _RESOURCES:
+            self.resources = self.resources.copy()
+        if not owned & _HASHES:
+            self.player_hash = self.player_hash.copy()
+        self._owned = owned | _RESOURCES | _HASHES
+        i = player_id * NUM_RESOURCES + resource
+        count = self.resources[i]
+        self.resources[i] = count + amount
+        self.player_hash[player_id] ^= resource_key(player_id, resource + 1, count) \
+            ^ resource_key(player_id, resource + 1, count + amount)
+
+    def pay(self, player_id: int, cost: dict[ResourceType, int]) -> None:
+        for resource_type, amount in cost.items():
+            self.gain(player_id, resource_type.value - 1, -amount)
+
+    def build_settlement(self, player_id: int, vertex_id: int, pay: bool = False) -> None:
+        if pay:
+            self.pay(player_id, SETTLEMENT_COST)
+        self._place(player_id, vertex_id, 1)
+
+    def build_city(self, player_id: int, vertex_id: int, pay: bool = False) -> None:
+        if pay:
+            self.pay(player_id, CITY_COST)
+        self._place(player_id, vertex_id, 2)
+
+    def build_street(self, player_id: int, edge_id: int, pay: bool = False) -> None:
+        if pay:
+            self.pay(player_id, STREET_COST)
+        self._place_street(player_id, edge_id)
+
+    def move_robber(self, hex_id: int) -> None:
+        if self.robber != NO_ROBBER:
+            self.map_hash ^= zobrist_key(ROBBER, self.robber)
+        self.robber = hex_id
+        self.map_hash ^= zobrist_key(ROBBER, hex_id)
+
+    def draw_card(self, player_id: int) -> None:
+        owned = self._owned
+        if not owned & _PLAYERS:
+            self.development_cards = self.development_cards.copy()
+            self.victory_points = self.victory_points.copy()
+        if not owned & _HASHES:
+            self.player_hash = self.player_hash.copy()
+        self._owned = owned | _PLAYERS | _HASHES
+        count = self.development_cards[player_id]
+        self.development_cards[player_id] = count + 1
+        self.player_hash[player_id] ^= development_cards_key(player_id, count) \
+            ^ development_cards_key(player_id, count + 1)
+
+    def end_turn(self) -> None:
+        self.current_player = (self.current_player + 1) % self.board.num_players
+
+    def end_setup(self) -> None:
+        self.is_start = False
+
+    def _place(self, player_id: int, vertex_id: int, level: int) -> None:
+        owned = self._owned
+        if not owned & _VERTICES:
+            self.vertices = bytearray(self.vertices)
+        if not owned & _PIECES:
+            self.pieces = self.pieces.copy()
+        if not owned & _PLAYERS:
+            self.development_cards = self.development_cards.copy()
+            self.victory_points = self.victory_points.copy()
+        if not owned & _MASKS:
+            self.settlement_masks = self.settlement_masks.copy()
+            self.street_vertex_masks = self.street_vertex_masks.copy()
+            self.street_edge_masks = self.street_edge_masks.copy()
+        self._owned = owned | _VERTICES | _PIECES | _PLAYERS | _MASKS
+        board = self.board
+        bit = board.vertex_masks[vertex_id]
+        base = player_id * 3
+        if level == 2:
+            self.map_hash ^= zobrist_key(SETTLEMENT, vertex_id, player_id, 1)
+            self.settlement_masks[player_id] &= ~bit
+            self.pieces[base] += 1
+            self.pieces[base + 1] -= 1
+        else:
+            self.settlement_masks[player_id] |= bit
+            self.pieces[base] -= 1
+            self.occupied_vertices |= bit
+            self.blocked_vertices |= bit | board.vertex_vertex_masks[vertex_id]
+        self.map_hash ^= zobrist_key(SETTLEMENT, vertex_id, player_id, level)
+        self.vertices[vertex_id] = player_id + 1 + 16 * (level - 1)
+        self.victory_points[player_id] += 1
+
+    def _place_street(self, player_id: int, edge_id: int) -> None:
+        owned = self._owned
+        if not owned & _EDGES:
+            self.edges = bytearray(self.edges)
+        if not owned & _PIECES:
+            self.pieces = self.pieces.copy()
+        if not owned & _MASKS:
+            self.settlement_masks = self.settlement_masks.copy()
+            self.street_vertex_masks = self.street_vertex_masks.copy()
+            self.street_edge_masks = self.street_edge_masks.copy()
+        self._owned = owned | _EDGES | _PIECES | _MASKS
+        board = self.board
+        self.edges[edge_id] = player_id + 1
+        self.pieces[player_id * 3 + 2] -= 1
+        self.occupied_edges |= 1 << edge_id
+        self.street_vertex_masks[player_id] |= board.edge_vertex_masks[edge_id]
+        self.street_edge_masks[player_id] |= board.edge_edge_masks[edge_id]
+        self.map_hash ^= zobrist_key(STREET, edge_id, player_id)
+
@@ -0,0 +1,73 @@
+"""Memoized screen geometry of hexes, edges and vertices for a layout.
+
+A LayoutGeometry caches every position it computes. The geometry of a
+layout is looked up by value with get_geometry, so changing the layout, e.g.
+when zooming or panning, yields a fresh geometry and implicitly invalidates
+the old positions."""
+from __future__ import annotations
+from hex import Hex, Edge, Vertex, Layout, get_corner_offsets
+
+MAX_CACHED_LAYOUTS = 8
+
+
+def layout_key(layout: Layout) -> tuple:
+    return (layout.orientation, layout.size.x, layout.size.y, layout.origin.x, layout.origin.y)
+
+
+class LayoutGeometry:
+    """Screen positions for one layout as (x, y) tuples."""
+
+    def __init__(self, layout: Layout) -> None:
+        self.layout = layout
+        self.corner_offsets = get_corner_offsets(layout)
+        self._hex_centers: dict[Hex, tuple[float, float]] = {}
+        self._hex_polygons: dict[Hex, tuple[tuple[float, float], ...]] = {}
+        self._vertex_points: dict[Vertex, tuple[float, float]] = {}
+        self._edge_lines: dict[Edge, tuple[tuple[float, float], tuple[float, float]]] = {}
+
+    def hex_center(self, hex: Hex) -> tuple[float, float]:
+        center = self._hex_centers.get(hex)
+        if center is None:
+            center = self._hex_centers[hex] = hex.to_point(self.layout).to_tuple()
+        return center
+
+    def hex_polygon(self, hex: Hex) -> tuple[tuple[float, float], ...]:
+        """Returns the six corners of a hex."""
+        polygon = self._hex_polygons.get(hex)
+        if polygon is None:
+            x, y = self.hex_center(hex)
+            polygon = self._hex_polygons[hex] = tuple((x + dx, y + dy) for dx, dy in self.corner_offsets)
+        return polygon
+
+    def vertex_point(self, vertex: Vertex) -> tuple[float, float]:
+        point = self._vertex_points.get(vertex)
+        if point is None:
+            point = self._vertex_points[vertex] = vertex.to_point(self.layout).to_tuple()
+        return point
+
+    def edge_line(self, edge: Edge) -> tuple[tuple[float, float], tuple[float, float]]:
+        """Returns the positions of the two vertices of an edge."""
+        line = self._edge_lines.get(edge)
+        if line is None:
+            v, w = edge.get_adjacent_vertices()
+            line = self._edge_lines[edge] = (self.vertex_point(v), self.vertex_point(w))
+        return line
+
+    def edge_center(self, edge: Edge) -> tuple[float, float]:
+        (x1, y1), (x2, y2) = self.edge_line(edge)
+        return ((x1 + x2) / 2, (y1 + y2) / 2)
+
+
+_geometries: dict[tuple, LayoutGeometry] = {}
+
+
+def get_geometry(layout: Layout) -> LayoutGeometry:
+    """Returns the cached geometry of a layout. Only the most recently
+    created geometries are kept."""
+    key = layout_key(layout)
+    geometry = _geometries.get(key)
+    if geometry is None:
+        if len(_geometries) >= MAX_CACHED_LAYOUTS:
+            del _geometries[next(iter(_geometries))]
+        geometry = _geometries[key] = LayoutGeometry(layout)
+    return geometry
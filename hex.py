@@ -1,11 +1,17 @@
 """Collection of classes needed to define hexagons and their edges and vertices
 using cube coordinates for easy math operations.
 
-Based on https://www.redblobgames.com/grids/hexagons/."""
+Based on https://www.redblobgames.com/grids/hexagons/.
+
+Hex, Edge and Vertex are interned in caches that hold their objects weakly,
+so coordinates that are no longer referenced anywhere, e.g. those of a
+board that was thrown away, do not stay in memory."""
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, FrozenInstanceError
+from typing import Iterator
 import collections
 import math
+import weakref
 
 Orientation = collections.namedtuple("Orientation", \
               ["f0", "f1", "f2", "f3", "b0", "b1", "b2", "b3", "start_angle"])
@@ -53,21 +59,52 @@ class Point:
         return (self.x, self.y)
 
 
-@dataclass
 class Hex:
-    """Represents a hex using cube coordinates."""
+    """Represents a hex using cube coordinates.
+
+    Hexes are immutable and interned: constructing the same coordinates twice
+    returns the same object, so hashing is precomputed and equality is
+    usually an identity check."""
+
+    __slots__ = ("q", "r", "s", "_hash", "__weakref__")
+    _cache: weakref.WeakValueDictionary[tuple[int, int, int], Hex] = weakref.WeakValueDictionary()
 
     q: int
     r: int
     s: int
 
-    def __post_init__(self) -> None:
-        assert self.q + self.r + self.s == 0, "q + r + s must be 0"
+    def __new__(cls, q: int, r: int, s: int) -> Hex:
+        key = (q, r, s)
+        cached = cls._cache.get(key)
+        if cached is not None:
+            return cached
+        assert q + r + s == 0, "q + r + s must be 0"
+        self = object.__new__(cls)
+        object.__setattr__(self, "q", q)
+        object.__setattr__(self, "r", r)
+        object.__setattr__(self, "s", s)
+        object.__setattr__(self, "_hash", hash(key))
+        cls._cache[key] = self
+        return self
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __reduce__(self):
+        return (Hex, (self.q, self.r, self.s))
+
+    def __repr__(self) -> str:
+        return f"Hex(q={self.q!r}, r={self.r!r}, s={self.s!r})"
 
     def __hash__(self):
-        return hash((self.q, self.r, self.s))
+        return self._hash
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Hex):
             return NotImplemented
         return self.q == other.q and self.r == other.r and self.s == other.s
@@ -118,16 +155,52 @@ class Hex:
         """Returns all adjacent vertices as a list, starting North."""
         return [Vertex(self, direction) for direction in VERTEX_DIRECTIONS]
     
+    def hexes_in_range(self, n: int) -> Iterator[Hex]:
+        """Yields all hexes within distance n, ordered by q, then r."""
+        for dq in range(-n, n + 1):
+            for dr in range(max(-n, -dq - n), min(n, -dq + n) + 1):
+                yield Hex(self.q + dq, self.r + dr, self.s - dq - dr)
+
+    def ring(self, radius: int) -> Iterator[Hex]:
+        """Yields the hexes at exactly the given distance, starting West and
+        walking clockwise."""
+        if radius == 0:
+            yield self
+            return
+        h = self + W * radius
+        for direction in HEX_DIRECTIONS:
+            for _ in range(radius):
+                yield h
+                h = h + direction
+
+    def spiral(self, radius: int) -> Iterator[Hex]:
+        """Yields this hex and then all rings up to the given radius."""
+        for k in range(radius + 1):
+            yield from self.ring(k)
+
+    def line_to(self, h: Hex) -> Iterator[Hex]:
+        """Yields the hexes on a straight line to another hex, both included."""
+        n = self.distance_to(h)
+        # Nudge the start so points exactly on an edge round consistently
+        q, r = self.q + 1e-6, self.r + 1e-6
+        start = FractionalHex(q, r, -q - r)
+        q, r = h.q + 1e-6, h.r + 1e-6
+        end = FractionalHex(q, r, -q - r)
+        for i in range(n + 1):
+            yield start.lerp(end, i / n if n else 0.0).round()
+
     def get_polygon_corner(self, layout: Layout, direction: int) -> Point:
         """Returns a corner position of a hex as a point."""
         center = self.to_point(layout)
-        offset = self._corner_offset(layout, direction)
-        corner = Point(center.x + offset.x, center.y + offset.y)
-        return corner
+        dx, dy = get_corner_offsets(layout)[direction]
+        return Point(center.x + dx, center.y + dy)
     
     def get_all_polygon_corners(self, layout: Layout) -> list[tuple]:
         """Returns all corner positions of a hex. Useful for drawing."""
-        return [self.get_polygon_corner(layout, i).to_tuple() for i in range(0, 6)]
+        center = self.to_point(layout)
+        x = center.x
+        y = center.y
+        return [(x + dx, y + dy) for dx, dy in get_corner_offsets(layout)]
     
     def to_point(self, layout: Layout) -> Point:
         """Returns the center position of the hex as a point."""
@@ -139,10 +212,38 @@ class Hex:
         return Point(x + origin.x, y + origin.y)    
 
     def _corner_offset(self, layout: Layout, corner: int) -> Point:
+        return Point(*get_corner_offsets(layout)[corner])
+
+
+def intersect_ranges(*ranges: tuple[Hex, int]) -> Iterator[Hex]:
+    """Yields the hexes that are within range of all given (center, n)
+    pairs, ordered by q, then r."""
+    q_min = max(h.q - n for h, n in ranges)
+    q_max = min(h.q + n for h, n in ranges)
+    r_min = max(h.r - n for h, n in ranges)
+    r_max = min(h.r + n for h, n in ranges)
+    s_min = max(h.s - n for h, n in ranges)
+    s_max = min(h.s + n for h, n in ranges)
+    for q in range(q_min, q_max + 1):
+        for r in range(max(r_min, -q - s_max), min(r_max, -q - s_min) + 1):
+            yield Hex(q, r, -q - r)
+
+
+_corner_offsets_cache: dict[tuple, tuple[tuple[float, float], ...]] = {}
+
+def get_corner_offsets(layout: Layout) -> tuple[tuple[float, float], ...]:
+    """Returns the offsets of the six polygon corners from a hex center.
+    They only depend on orientation and size and are computed once."""
+    key = (layout.orientation, layout.size.x, layout.size.y)
+    offsets = _corner_offsets_cache.get(key)
+    if offsets is None:
         M = layout.orientation
-        size = layout.size
-        angle = 2.0 * math.pi * (M.start_angle - corner) / 6.0
-        return Point(size.x * math.cos(angle), size.y * math.sin(angle))
+        offsets = []
+        for corner in range(6):
+            angle = 2.0 * math.pi * (M.start_angle - corner) / 6.0
+            offsets.append((layout.size.x * math.cos(angle), layout.size.y * math.sin(angle)))
+        offsets = _corner_offsets_cache[key] = tuple(offsets)
+    return offsets
 
 
 @dataclass
@@ -157,6 +258,12 @@ class FractionalHex:
     def __post_init__(self) -> None:
         assert math.isclose(self.q + self.r + self.s, 0), "q + r + s must be 0"
 
+    def lerp(self, other: FractionalHex, t: float) -> FractionalHex:
+        """Linear interpolation towards another (fractional) hex."""
+        q = self.q + (other.q - self.q) * t
+        r = self.r + (other.r - self.r) * t
+        return FractionalHex(q, r, -q - r)
+
     def round(self) -> Hex:
         """"Rounds to the nearest hex."""
         qi = int(round(self.q))
@@ -175,29 +282,65 @@ class FractionalHex:
         return Hex(qi, ri, si)
 
 
-@dataclass
 class Edge:
     """Represents the edge of a hexagon. Each hexagon points to 3 edges,
-    in NW, NE and E directions."""
+    in NW, NE and E directions.
+
+    Edges are immutable and interned like hexes. The cache is keyed on the
+    constructor arguments, so non-canonical spellings of an edge resolve to
+    the canonical object with a single lookup."""
+
+    __slots__ = ("h", "direction", "_hash", "_adjacent_vertices", "_adjacent_edges", "__weakref__")
+    _cache: weakref.WeakValueDictionary[tuple[int, int, int, int], Edge] = weakref.WeakValueDictionary()
 
     h: Hex
     direction: Hex
 
-    def __post_init__(self) -> None:
-        if self.direction == W:
-            self.h = self.h.get_neighbor(W)
-            self.direction = E
-        elif self.direction == SW:
-            self.h = self.h.get_neighbor(SW)
-            self.direction = NE
-        elif self.direction == SE:
-            self.h = self.h.get_neighbor(SE)
-            self.direction = NW
+    def __new__(cls, h: Hex, direction: Hex) -> Edge:
+        key = (h.q, h.r, direction.q, direction.r)
+        cached = cls._cache.get(key)
+        if cached is not None:
+            return cached
+        if direction == W:
+            h = h.get_neighbor(W)
+            direction = E
+        elif direction == SW:
+            h = h.get_neighbor(SW)
+            direction = NE
+        elif direction == SE:
+            h = h.get_neighbor(SE)
+            direction = NW
+        canonical_key = (h.q, h.r, direction.q, direction.r)
+        self = cls._cache.get(canonical_key)
+        if self is None:
+            self = object.__new__(cls)
+            object.__setattr__(self, "h", h)
+            object.__setattr__(self, "direction", direction)
+            object.__setattr__(self, "_hash", hash((h, direction)))
+            object.__setattr__(self, "_adjacent_vertices", None)
+            object.__setattr__(self, "_adjacent_edges", None)
+            cls._cache[canonical_key] = self
+        cls._cache[key] = self
+        return self
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __reduce__(self):
+        return (Edge, (self.h, self.direction))
+
+    def __repr__(self) -> str:
+        return f"Edge(h={self.h!r}, direction={self.direction!r})"
 
     def __hash__(self):
-        return hash((self.h, self.direction))
+        return self._hash
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Edge):
             return NotImplemented
         if self.h == other.h and self.direction == other.direction:
@@ -209,19 +352,23 @@ class Edge:
         return (self.h, self.h + self.direction)
 
     def get_adjacent_vertices(self) -> tuple[Vertex, Vertex]:
-       """Returns the two adjacent vertices as a tuple."""
-       v = Vertex(self.h, VERTEX_DIRECTIONS[HEX_DIRECTIONS.index(self.direction)])
-       w = Vertex(self.h, VERTEX_DIRECTIONS[(HEX_DIRECTIONS.index(self.direction) + 1) % 6])
-       return (v, w)
+        """Returns the two adjacent vertices as a tuple."""
+        vertices = self._adjacent_vertices
+        if vertices is None:
+            h = self.h
+            vertices = tuple(Vertex(h + offset, direction)
+                             for offset, direction in _EDGE_VERTEX_OFFSETS[self.direction])
+            object.__setattr__(self, "_adjacent_vertices", vertices)
+        return vertices
     
-    def get_adjacent_edges(self) -> list[Edge]:
-        """Returns the four adjacent edges as a list."""
-        edges = []
-        for v in self.get_adjacent_vertices():
-            v_edges = v.get_adjacent_edges()
-            for e in v_edges:
-                if e != self:
-                    edges.append(e)
+    def get_adjacent_edges(self) -> tuple[Edge, ...]:
+        """Returns the four adjacent edges as a tuple."""
+        edges = self._adjacent_edges
+        if edges is None:
+            h = self.h
+            edges = tuple(Edge(h + offset, direction)
+                          for offset, direction in _EDGE_EDGE_OFFSETS[self.direction])
+            object.__setattr__(self, "_adjacent_edges", edges)
         return edges
 
     def to_point(self, layout) -> Point:
@@ -237,36 +384,72 @@ class Edge:
         return min(h_edges, key=lambda e: (e.to_point(layout) - p).amount())
 
 
-@dataclass
 class Vertex:
     """Represents the vertex of a hexagon. Each hexagon points to 2 vertices,
     the top (N) and bottom (S) in pointy top orientation. 
     
-    Allowed directions: N, NE, SE, S, SW, NW"""
+    Allowed directions: N, NE, SE, S, SW, NW
+
+    Vertices are immutable and interned like hexes and edges."""
+
+    __slots__ = ("h", "direction", "_hash", "_adjacent_vertices", "_adjacent_edges", "__weakref__")
+    _cache: weakref.WeakValueDictionary[tuple[int, int, str], Vertex] = weakref.WeakValueDictionary()
 
     h: Hex
     direction: str
     
-    def __post_init__(self) -> None:
-        assert self.direction in VERTEX_DIRECTIONS, "Invalid direction"
-
-        if self.direction == "NW":
-            self.h = self.h + NW
-            self.direction = "S"
-        elif self.direction == "NE":
-            self.h = self.h + NE
-            self.direction = "S"
-        elif self.direction == "SW":
-            self.h = self.h + SW
-            self.direction = "N"
-        elif self.direction == "SE":
-            self.h = self.h + SE
-            self.direction = "N"
+    def __new__(cls, h: Hex, direction: str) -> Vertex:
+        key = (h.q, h.r, direction)
+        cached = cls._cache.get(key)
+        if cached is not None:
+            return cached
+        assert direction in VERTEX_DIRECTIONS, "Invalid direction"
+
+        if direction == "NW":
+            h = h + NW
+            direction = "S"
+        elif direction == "NE":
+            h = h + NE
+            direction = "S"
+        elif direction == "SW":
+            h = h + SW
+            direction = "N"
+        elif direction == "SE":
+            h = h + SE
+            direction = "N"
+        canonical_key = (h.q, h.r, direction)
+        self = cls._cache.get(canonical_key)
+        if self is None:
+            self = object.__new__(cls)
+            object.__setattr__(self, "h", h)
+            object.__setattr__(self, "direction", direction)
+            # Hash the direction as a flag, since str hashes change between
+            # processes and would make set orders irreproducible.
+            object.__setattr__(self, "_hash", hash((h, direction == "N")))
+            object.__setattr__(self, "_adjacent_vertices", None)
+            object.__setattr__(self, "_adjacent_edges", None)
+            cls._cache[canonical_key] = self
+        cls._cache[key] = self
+        return self
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __reduce__(self):
+        return (Vertex, (self.h, self.direction))
+
+    def __repr__(self) -> str:
+        return f"Vertex(h={self.h!r}, direction={self.direction!r})"
 
     def __hash__(self):
-        return hash((self.h, self.direction))
+        return self._hash
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Vertex):
             return NotImplemented
         if self.h == other.h and self.direction == other.direction:
@@ -289,24 +472,31 @@ class Vertex:
 
     def get_adjacent_edges(self) -> tuple[Edge, Edge, Edge]:
         """Returns the three adjacent edges."""
-        if self.direction == "N":
-            return (Edge(self.h, NW), Edge(self.h, NE), Edge(self.h + NE, W))
-        else:
-            return (Edge(self.h, SW), Edge(self.h, SE), Edge(self.h + SE, W))
+        edges = self._adjacent_edges
+        if edges is None:
+            h = self.h
+            edges = tuple(Edge(h + offset, direction)
+                          for offset, direction in _VERTEX_EDGE_OFFSETS[self.direction])
+            object.__setattr__(self, "_adjacent_edges", edges)
+        return edges
     
     def get_adjacent_vertices(self) -> tuple[Vertex, ...]:
         """Returns the closest three vertices."""
-        edges = self.get_adjacent_edges()
-        return tuple(self + e for e in edges)
+        vertices = self._adjacent_vertices
+        if vertices is None:
+            h = self.h
+            vertices = tuple(Vertex(h + offset, direction)
+                             for offset, direction in _VERTEX_VERTEX_OFFSETS[self.direction])
+            object.__setattr__(self, "_adjacent_vertices", vertices)
+        return vertices
 
     def distance_to(self, v: Vertex) -> int:
         """Calculate the distance to another vertex."""
         if self.direction != v.direction:
-            # Need to find the closest hex after taking one step
-            adjacent_hexes = self.get_adjacent_hexes()
-            adjacent_hexes.remove(self.h)
-            closest_hex = min(adjacent_hexes, key=lambda h: h.distance_to(v.h))
-            return closest_hex.distance_to(v.h) * 2 + 1
+            # Need to find the closest hex after taking one step. Every
+            # adjacent vertex has the direction of v.
+            closest = min(w.h.distance_to(v.h) for w in self.get_adjacent_vertices())
+            return closest * 2 + 1
         else:
             return self.h.distance_to(v.h) * 2
                     
@@ -335,3 +525,27 @@ SW = Hex(-1, 1, 0)
 SE = Hex(0, 1, -1)
 HEX_DIRECTIONS = [NE, E, SE, SW, W, NW]
 VERTEX_DIRECTIONS = ["N", "NE", "SE", "S", "SW", "NW"]
+
+# Topology of edges and vertices relative to their canonical hex. Each entry is
+# a (hex offset, direction) pair, keyed by the canonical direction. Adjacent
+# elements are built from these tables once and then memoized on the interned
+# edge or vertex, so repeated adjacency queries do not allocate.
+ORIGIN = Hex(0, 0, 0)
+_EDGE_VERTEX_OFFSETS = {
+    NE: ((ORIGIN, "N"), (NE, "S")),
+    E: ((NE, "S"), (SE, "N")),
+    NW: ((NW, "S"), (ORIGIN, "N")),
+}
+_EDGE_EDGE_OFFSETS = {
+    NE: ((ORIGIN, NW), (NW, E), (E, NW), (ORIGIN, E)),
+    E: ((ORIGIN, NE), (E, NW), (SE, NW), (SE, NE)),
+    NW: ((W, NE), (W, E), (ORIGIN, NE), (NW, E)),
+}
+_VERTEX_EDGE_OFFSETS = {
+    "N": ((ORIGIN, NW), (ORIGIN, NE), (NW, E)),
+    "S": ((SW, NE), (SE, NW), (SW, E)),
+}
+_VERTEX_VERTEX_OFFSETS = {
+    "N": ((NW, "S"), (NE, "S"), (NW + NE, "S")),
+    "S": ((SW, "N"), (SE, "N"), (SW + SE, "N")),
+}
@@ -0,0 +1,100 @@
+"""Vectorized versions of the pixel/hex conversions in hex.py for batches of
+points. Cube coordinates are (N, 3) arrays with columns q, r, s and screen
+positions are (N, 2) arrays with columns x, y.
+
+Requires numpy."""
+from __future__ import annotations
+from typing import Iterable
+from hex import Hex, Layout, HEX_DIRECTIONS, W
+import numpy as np
+
+
+def points_to_fractional_hexes(layout: Layout, points) -> np.ndarray:
+    """Returns the fractional cube coordinates of an (N, 2) array of points."""
+    M = layout.orientation
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    x = (points[:, 0] - layout.origin.x) / layout.size.x
+    y = (points[:, 1] - layout.origin.y) / layout.size.y
+    q = M.b0 * x + M.b1 * y
+    r = M.b2 * x + M.b3 * y
+    return np.stack((q, r, -q - r), axis=1)
+
+
+def round_hexes(fractional_hexes) -> np.ndarray:
+    """Rounds an (N, 3) array of fractional hexes to the nearest hexes,
+    like FractionalHex.round."""
+    fractional_hexes = np.asarray(fractional_hexes, dtype=float).reshape(-1, 3)
+    rounded = np.rint(fractional_hexes)
+    diff = np.abs(rounded - fractional_hexes)
+    q, r, s = rounded[:, 0], rounded[:, 1], rounded[:, 2]
+    q_diff, r_diff, s_diff = diff[:, 0], diff[:, 1], diff[:, 2]
+    fix_q = (q_diff > r_diff) & (q_diff > s_diff)
+    fix_r = ~fix_q & (r_diff > s_diff)
+    fix_s = ~fix_q & ~fix_r
+    result = np.stack((np.where(fix_q, -r - s, q),
+                       np.where(fix_r, -q - s, r),
+                       np.where(fix_s, -q - r, s)), axis=1)
+    return result.astype(np.int64)
+
+
+def points_to_hexes(layout: Layout, points) -> np.ndarray:
+    """Returns the cube coordinates of the hexes at an (N, 2) array of points."""
+    return round_hexes(points_to_fractional_hexes(layout, points))
+
+
+def hexes_to_points(layout: Layout, hexes) -> np.ndarray:
+    """Returns the center positions of an (N, 3) array of hexes."""
+    M = layout.orientation
+    hexes = np.asarray(hexes).reshape(-1, 3)
+    q = hexes[:, 0]
+    r = hexes[:, 1]
+    x = (M.f0 * q + M.f1 * r) * layout.size.x + layout.origin.x
+    y = (M.f2 * q + M.f3 * r) * layout.size.y + layout.origin.y
+    return np.stack((x, y), axis=1)
+
+
+DIRECTIONS = np.array([(h.q, h.r, h.s) for h in HEX_DIRECTIONS], dtype=np.int64)
+
+
+def range_array(center: Hex, n: int) -> np.ndarray:
+    """Returns all hexes within distance n, in the order of Hex.hexes_in_range."""
+    dq, dr = np.meshgrid(np.arange(-n, n + 1), np.arange(-n, n + 1), indexing="ij")
+    mask = np.abs(dq + dr) <= n
+    dq = dq[mask]
+    dr = dr[mask]
+    return np.stack((dq, dr, -dq - dr), axis=1) + (center.q, center.r, center.s)
+
+
+def ring_array(center: Hex, radius: int) -> np.ndarray:
+    """Returns the hexes at exactly the given distance, in the order of Hex.ring."""
+    start = np.array([(center.q, center.r, center.s)], dtype=np.int64)
+    if radius == 0:
+        return start
+    start = start + np.array([(W.q, W.r, W.s)]) * radius
+    steps = np.repeat(DIRECTIONS, radius, axis=0)[:-1]
+    return np.concatenate((start, start + np.cumsum(steps, axis=0)))
+
+
+def spiral_array(center: Hex, radius: int) -> np.ndarray:
+    """Returns the hexes in the order of Hex.spiral."""
+    return np.concatenate([ring_array(center, k) for k in range(radius + 1)])
+
+
+def line_array(a: Hex, b: Hex) -> np.ndarray:
+    """Returns the hexes on the line between two hexes, like Hex.line_to."""
+    n = a.distance_to(b)
+    nudge = np.array([1e-6, 1e-6, -2e-6])
+    start = np.array([a.q, a.r, a.s]) + nudge
+    end = np.array([b.q, b.r, b.s]) + nudge
+    t = np.arange(n + 1)[:, None] / max(n, 1)
+    return round_hexes(start + (end - start) * t)
+
+
+def to_array(hexes: Iterable[Hex]) -> np.ndarray:
+    """Packs Hex objects into an (N, 3) array."""
+    return np.array([(h.q, h.r, h.s) for h in hexes], dtype=np.int64).reshape(-1, 3)
+
+
+def from_array(hexes) -> list[Hex]:
+    """Unpacks an (N, 3) array into Hex objects."""
+    return [Hex(q, r, s) for q, r, s in np.asarray(hexes).reshape(-1, 3).tolist()]
@@ -0,0 +1,53 @@
+"""Cached legal moves for drawing placement previews.
+
+A LegalMoveCache keeps the legal settlement and street spots of each player
+together with their screen positions. It subscribes to a GameHistory and
+drops its entries only when a building is built or removed or the state of
+the game changes, so showing the highlights again costs O(highlighted
+spots) instead of a legality check of the whole board."""
+from __future__ import annotations
+from events import Event, EventType, GameHistory
+from geometry import get_geometry
+from hex import Edge, Layout, Vertex
+
+Position = tuple[float, float]
+Line = tuple[Position, Position]
+
+
+class LegalMoveCache:
+
+    def __init__(self, history: GameHistory, layout: Layout) -> None:
+        self.map = history.game.map
+        self.geometry = get_geometry(layout)
+        self._settlements: dict[int, dict[Vertex, Position]] = {}
+        self._streets: dict[int, dict[Edge, Line]] = {}
+        history.subscribe(self.on_event)
+
+    def on_event(self, event: Event, undone: bool) -> None:
+        # Legality also depends on the start phase, which ends with a STATE event
+        if event.type in (EventType.SETTLEMENT, EventType.STREET, EventType.STATE):
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drops all cached spots. Needed after changes to the map that are
+        not made through the history, such as setting map.is_start directly."""
+        self._settlements.clear()
+        self._streets.clear()
+
+    def settlement_spots(self, player) -> dict[Vertex, Position]:
+        """Returns the legal settlement spots of a player and their positions."""
+        spots = self._settlements.get(player.id)
+        if spots is None:
+            vertex_point = self.geometry.vertex_point
+            spots = self._settlements[player.id] = {
+                v: vertex_point(v) for v in self.map.legal_settlement_spots(player)}
+        return spots
+
+    def street_spots(self, player) -> dict[Edge, Line]:
+        """Returns the legal street spots of a player and their end points."""
+        spots = self._streets.get(player.id)
+        if spots is None:
+            edge_line = self.geometry.edge_line
+            spots = self._streets[player.id] = {
+                e: edge_line(e) for e in self.map.legal_street_spots(player)}
+        return spots
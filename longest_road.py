@@ -0,0 +1,161 @@
+"""Incremental longest road computation.
+
+Streets of a player are grouped into connected road components. Two streets
+are connected if they share a vertex without a building of another player.
+A new street only merges the components at its ends, a settlement only
+splits the components passing through it, and the longest trail is computed
+per component and cached until the component changes or a settlement on
+one of its vertices is removed."""
+from __future__ import annotations
+from topology import BoardTopology
+
+
+class LongestRoad:
+    """Road components and their cached longest trails, on topology ids."""
+
+    def __init__(self, topology: BoardTopology) -> None:
+        self.topology = topology
+        self.edge_owner: dict[int, int] = {}
+        self.vertex_owner: dict[int, int] = {}
+        self.component_of: dict[int, int] = {}
+        self.components: dict[int, set[int]] = {}
+        self.component_owner: dict[int, int] = {}
+        self.player_components: dict[int, set[int]] = {}
+        # Longest trail per component, None until computed
+        self.lengths: dict[int, int | None] = {}
+        self._next_component = 0
+
+    def length(self, player_id: int) -> int:
+        """Returns the length of the player's longest road."""
+        best = 0
+        for c in self.player_components.get(player_id, ()):
+            length = self.lengths[c]
+            if length is None:
+                length = self.lengths[c] = self._longest_trail(player_id, self.components[c])
+            if length > best:
+                best = length
+        return best
+
+    def add_street(self, player_id: int, edge_id: int) -> None:
+        self.edge_owner[edge_id] = player_id
+        merged = {edge_id}
+        for c in self._adjacent_components(player_id, edge_id):
+            merged |= self._drop_component(c)
+        self._new_component(player_id, merged)
+
+    def remove_street(self, edge_id: int) -> None:
+        player_id = self.edge_owner.pop(edge_id)
+        edges = self._drop_component(self.component_of[edge_id])
+        edges.discard(edge_id)
+        self._split(player_id, edges)
+
+    def add_settlement(self, player_id: int, vertex_id: int) -> None:
+        self.vertex_owner[vertex_id] = player_id
+        for other_id, components in self._components_at(vertex_id).items():
+            if other_id != player_id:
+                for c in components:
+                    self._split(other_id, self._drop_component(c))
+
+    def remove_settlement(self, vertex_id: int) -> None:
+        del self.vertex_owner[vertex_id]
+        for player_id, components in self._components_at(vertex_id).items():
+            if len(components) > 1:
+                edges: set[int] = set()
+                for c in components:
+                    edges |= self._drop_component(c)
+                self._new_component(player_id, edges)
+            else:
+                # Trails of the component may now pass through the vertex
+                for c in components:
+                    self.lengths[c] = None
+
+    def _is_blocked(self, player_id: int, vertex_id: int) -> bool:
+        owner = self.vertex_owner.get(vertex_id, player_id)
+        return owner != player_id
+
+    def _adjacent_components(self, player_id: int, edge_id: int) -> set[int]:
+        components = set()
+        edge_owner = self.edge_owner
+        for v in self.topology.edge_vertices[edge_id]:
+            if self._is_blocked(player_id, v):
+                continue
+            for e in self.topology.vertex_edges[v]:
+                if e != edge_id and edge_owner.get(e) == player_id:
+                    components.add(self.component_of[e])
+        return components
+
+    def _components_at(self, vertex_id: int) -> dict[int, set[int]]:
+        components: dict[int, set[int]] = {}
+        for e in self.topology.vertex_edges[vertex_id]:
+            if e in self.edge_owner:
+                components.setdefault(self.edge_owner[e], set()).add(self.component_of[e])
+        return components
+
+    def _new_component(self, player_id: int, edges: set[int]) -> None:
+        c = self._next_component
+        self._next_component += 1
+        self.components[c] = edges
+        self.component_owner[c] = player_id
+        self.player_components.setdefault(player_id, set()).add(c)
+        self.lengths[c] = None
+        for e in edges:
+            self.component_of[e] = c
+
+    def _drop_component(self, c: int) -> set[int]:
+        edges = self.components.pop(c)
+        self.player_components[self.component_owner.pop(c)].discard(c)
+        del self.lengths[c]
+        return edges
+
+    def _split(self, player_id: int, edges: set[int]) -> None:
+        """Creates the connected components of a set of the player's edges."""
+        edge_vertices = self.topology.edge_vertices
+        vertex_edges = self.topology.vertex_edges
+        remaining = set(edges)
+        while remaining:
+            start = remaining.pop()
+            component = {start}
+            stack = [start]
+            while stack:
+                e = stack.pop()
+                for v in edge_vertices[e]:
+                    if self._is_blocked(player_id, v):
+                        continue
+                    for f in vertex_edges[v]:
+                        if f in remaining:
+                            remaining.discard(f)
+                            component.add(f)
+                            stack.append(f)
+            self._new_component(player_id, component)
+
+    def _longest_trail(self, player_id: int, edges: set[int]) -> int:
+        """Longest trail through a component, i.e. a walk that uses every
+        street at most once and does not pass through other players'
+        buildings. Exponential in the worst case, but components have at
+        most 15 streets."""
+        edge_vertices = self.topology.edge_vertices
+        vertex_edges = self.topology.vertex_edges
+        blocked = {v for e in edges for v in edge_vertices[e] if self._is_blocked(player_id, v)}
+        used: set[int] = set()
+        best = 0
+
+        def walk(v: int, length: int) -> None:
+            nonlocal best
+            if length > best:
+                best = length
+            if length > 0 and v in blocked:
+                return
+            for e in vertex_edges[v]:
+                if e in edges and e not in used:
+                    used.add(e)
+                    a, b = edge_vertices[e]
+                    walk(b if a == v else a, length + 1)
+                    used.discard(e)
+
+        starts = {v for e in edges for v in edge_vertices[e]}
+        for v in starts:
+            walk(v, 0)
+            if best == len(edges):
+                break
+        return best
+
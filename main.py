@@ -1,6 +1,7 @@
 import pygame
 import sys
 from hex import Hex, Edge, Vertex, Point, Layout, ORIENTATION_POINTY
+from geometry import get_geometry
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -35,22 +36,22 @@ class Game:
             self.vertices.append(vertex)
 
     def draw_hexes(self) -> None:
+        geometry = get_geometry(self.layout)
         for hex in self.hexes:
-            poly = hex.get_all_polygon_corners(self.layout)
+            poly = geometry.hex_polygon(hex)
             pygame.draw.polygon(self.screen, "DARKGREEN", poly)
             pygame.draw.polygon(self.screen, "BLACK", poly, 3)
 
     def draw_edges(self) -> None:
+        geometry = get_geometry(self.layout)
         for edge in self.edges:
-            vertices = edge.get_adjacent_vertices()
-            p1 = vertices[0].to_point(self.layout)
-            p2 = vertices[1].to_point(self.layout)
-            pygame.draw.line(self.screen, "GREY", (p1.x, p1.y), (p2.x, p2.y), 5)
+            p1, p2 = geometry.edge_line(edge)
+            pygame.draw.line(self.screen, "GREY", p1, p2, 5)
 
     def draw_vertices(self) -> None:
+        geometry = get_geometry(self.layout)
         for vertex in self.vertices:
-            p = vertex.to_point(self.layout)
-            pygame.draw.circle(self.screen, "GREY", (p.x, p.y), 10)
+            pygame.draw.circle(self.screen, "GREY", geometry.vertex_point(vertex), 10)
 
     def main(self) -> None:
         running = True
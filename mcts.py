@@ -0,0 +1,291 @@
+"""Monte Carlo tree search agent.
+
+The build phase is searched with UCT on forked GameStates. The tree covers
+the builds of the current turn; every iteration then plays the rest of the
+game (up to rollout_turns turns) with random dice and random builds and
+scores the result for the searching player. Within a turn there is no
+chance, so the tree needs no chance nodes.
+
+A search is bounded by wall-clock time and/or number of iterations. With
+workers > 1 independent searches run in a process pool on the same root
+(root parallelization) and their visit counts are summed. Setup placement
+and the robber use simple production heuristics.
+
+There is no determinization of hidden information, since there is none to
+resample: every resource change is a public event, and development cards
+have no types yet. Rollouts start from the exact state."""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Union
+from catan import CatanGame, Player
+from catan_bitboard import iter_bits
+from catan_constants import CITY_COST, SETTLEMENT_COST, STREET_COST
+from game_state import Board, GameState
+from hex import Edge, Hex, Vertex
+from simulator import Action, ActionType, Agent
+import math
+import random
+import time
+
+# Actions on a GameState: (kind, id)
+STREET = 0
+SETTLEMENT = 1
+CITY = 2
+END_TURN = 3
+SearchAction = tuple[int, int]
+_END = (END_TURN, 0)
+
+# Number of dice combinations that roll each number token
+PIPS = (0, 0, 1, 2, 3, 4, 5, 0, 5, 4, 3, 2, 1)
+
+
+class Node:
+    __slots__ = ("children", "visits", "value")
+
+    def __init__(self) -> None:
+        self.children: dict[SearchAction, Node] = {}
+        self.visits = 0
+        self.value = 0.0
+
+
+@dataclass
+class SearchResult:
+    visits: dict[SearchAction, int]
+    rollouts: int
+    seconds: float
+
+
+@dataclass
+class MCTSSearch:
+    """The search itself, separate from the agent so it can be sent to
+    worker processes."""
+    time_limit: Union[float, None] = 0.1
+    iterations: Union[int, None] = None
+    exploration: float = 1.4
+    rollout_turns: int = 30
+    target_points: int = 10
+    # A win after n more turns is worth discount ** n, so faster wins are preferred
+    discount: float = 0.95
+
+    def search(self, root: GameState, player_id: int, actions: list[SearchAction],
+               rng: random.Random) -> SearchResult:
+        start = time.perf_counter()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        tree = Node()
+        rollouts = 0
+        while True:
+            if self.iterations is not None and rollouts >= self.iterations:
+                break
+            if deadline is not None and rollouts and time.perf_counter() >= deadline:
+                break
+            state = root.fork()
+            self._iterate(tree, state, player_id, actions, rng)
+            rollouts += 1
+        visits = {action: child.visits for action, child in tree.children.items()}
+        return SearchResult(visits, rollouts, time.perf_counter() - start)
+
+    def _iterate(self, tree: Node, state: GameState, player_id: int,
+                 root_actions: list[SearchAction], rng: random.Random) -> None:
+        path = [tree]
+        node = tree
+        actions = root_actions
+        # Selection and expansion within the current turn
+        while True:
+            untried = [a for a in actions if a not in node.children]
+            if untried:
+                action = rng.choice(untried)
+                child = Node()
+                node.children[action] = child
+                node = child
+                path.append(node)
+                break
+            action, node = self._select(node, actions)
+            path.append(node)
+            if action == _END:
+                break
+            _apply(state, player_id, action)
+            actions = [*legal_actions(state, player_id), _END]
+        if action != _END:
+            # A new leaf ends the turn, so each build is judged on its own
+            _apply(state, player_id, action)
+        state.end_turn()
+        value = self._rollout(state, player_id, rng)
+        for node in path:
+            node.visits += 1
+            node.value += value
+
+    def _select(self, node: Node, actions: list[SearchAction]) -> tuple[SearchAction, Node]:
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best = None
+        best_score = -1.0
+        for action in actions:
+            child = node.children[action]
+            score = child.value / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best = action
+                best_score = score
+        return best, node.children[best]
+
+    def _random_builds(self, state: GameState, player_id: int, rng: random.Random) -> None:
+        """Rollout policy: builds randomly for as long as possible, like RandomAgent."""
+        while state.victory_points[player_id] < self.target_points:
+            actions = legal_actions(state, player_id)
+            if not actions:
+                return
+            _apply(state, player_id, rng.choice(actions))
+
+    def _rollout(self, state: GameState, player_id: int, rng: random.Random) -> float:
+        target = self.target_points
+        num_hexes = state.board.topology.num_hexes
+        turns = 0
+        while turns < self.rollout_turns:
+            if max(state.victory_points) >= target:
+                break
+            turns += 1
+            number = rng.randint(1, 6) + rng.randint(1, 6)
+            if number == 7:
+                state.move_robber(rng.randrange(num_hexes))
+            else:
+                state.roll(number)
+            self._random_builds(state, state.current_player, rng)
+            state.end_turn()
+        victory_points = state.victory_points
+        mine = victory_points[player_id]
+        if mine >= target:
+            return self.discount ** turns
+        best_other = max(vp for p, vp in enumerate(victory_points) if p != player_id)
+        if best_other >= target:
+            return 0.0
+        return 0.5 + 0.5 * (mine - best_other) / target
+
+
+def legal_actions(state: GameState, player_id: int) -> list[SearchAction]:
+    """Returns the affordable build actions of a player, without END_TURN."""
+    actions: list[SearchAction] = []
+    if state.can_afford(player_id, CITY_COST):
+        actions.extend((CITY, v) for v in iter_bits(state.legal_cities(player_id)))
+    if state.can_afford(player_id, SETTLEMENT_COST):
+        actions.extend((SETTLEMENT, v) for v in iter_bits(state.legal_settlements(player_id)))
+    if state.can_afford(player_id, STREET_COST):
+        actions.extend((STREET, e) for e in iter_bits(state.legal_streets(player_id)))
+    return actions
+
+
+def _apply(state: GameState, player_id: int, action: SearchAction) -> None:
+    kind, id = action
+    if kind == STREET:
+        state.build_street(player_id, id, pay=True)
+    elif kind == SETTLEMENT:
+        state.build_settlement(player_id, id, pay=True)
+    elif kind == CITY:
+        state.build_city(player_id, id, pay=True)
+
+
+def _run_search(search: MCTSSearch, root: GameState, player_id: int,
+                actions: list[SearchAction], seed: int) -> SearchResult:
+    return search.search(root, player_id, actions, random.Random(seed))
+
+
+@dataclass
+class SearchStats:
+    decisions: int = 0
+    rollouts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.seconds if self.seconds else 0.0
+
+    def report(self) -> str:
+        per_decision = self.seconds / self.decisions if self.decisions else 0.0
+        return (f"{self.decisions} decisions, {self.rollouts} rollouts in {self.seconds:.3f}s "
+                f"({self.rollouts_per_second:.0f} rollouts/s, {per_decision * 1000:.1f} ms/decision)")
+
+
+class MCTSAgent(Agent):
+    """Simulator agent that searches its build actions with MCTS."""
+
+    def __init__(self, rng: Union[random.Random, None] = None, time_limit: Union[float, None] = 0.1,
+                 iterations: Union[int, None] = None, workers: int = 1, **search_options) -> None:
+        self.rng = rng or random.Random()
+        self.search = MCTSSearch(time_limit, iterations, **search_options)
+        self.workers = workers
+        self.stats = SearchStats()
+        self._executor: Union[ProcessPoolExecutor, None] = None
+        self._board: Union[Board, None] = None
+        self._board_map = None
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def choose_setup_settlement(self, game: CatanGame, player: Player, spots: list[Vertex]) -> Vertex:
+        return max(spots, key=lambda v: (self._vertex_pips(game, v), self.rng.random()))
+
+    def choose_setup_street(self, game: CatanGame, player: Player, spots: list[Edge]) -> Edge:
+        # Head towards the best free vertex
+        def score(edge: Edge) -> float:
+            return max((self._vertex_pips(game, v) for v in edge.get_adjacent_vertices()
+                        if v in game.map.free_vertices), default=0)
+        return max(spots, key=lambda e: (score(e), self.rng.random()))
+
+    def choose_robber(self, game: CatanGame, player: Player, hexes: list[Hex]) -> Hex:
+        # Block the most opponent production, sparing our own
+        def score(hex: Hex) -> int:
+            pips = PIPS[game.map.catan_hexes[hex].number_token]
+            total = 0
+            for vertex in hex.get_adjacent_vertices():
+                catan_vertex = game.map.catan_vertices[vertex]
+                if catan_vertex.has_building():
+                    building = catan_vertex.building
+                    sign = -2 if building.player.id == player.id else 1
+                    total += sign * pips * building.resource_factor
+            return total
+        return max(hexes, key=lambda h: (score(h), self.rng.random()))
+
+    def choose_action(self, game: CatanGame, player: Player, actions: list[Action]) -> Union[Action, None]:
+        if not actions:
+            return None
+        map = game.map
+        if self._board_map is not map:
+            self._board = Board(game)
+            self._board_map = map
+        root = GameState.from_game(game, self._board)
+        by_search_action = {}
+        for action_type, spot in actions:
+            if action_type == ActionType.STREET:
+                key = (STREET, map.topology.edge_ids[spot])
+            else:
+                key = (SETTLEMENT if action_type == ActionType.SETTLEMENT else CITY,
+                       map.topology.vertex_ids[spot])
+            by_search_action[key] = (action_type, spot)
+        search_actions = [*by_search_action, _END]
+
+        t0 = time.perf_counter()
+        if self.workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            futures = [self._executor.submit(_run_search, self.search, root, player.id, search_actions,
+                                             self.rng.getrandbits(64))
+                       for _ in range(self.workers)]
+            results = [future.result() for future in futures]
+        else:
+            results = [self.search.search(root, player.id, search_actions, self.rng)]
+        visits: dict[SearchAction, int] = {}
+        for result in results:
+            self.stats.rollouts += result.rollouts
+            for action, count in result.visits.items():
+                visits[action] = visits.get(action, 0) + count
+        self.stats.seconds += time.perf_counter() - t0
+        self.stats.decisions += 1
+
+        best = max(search_actions, key=lambda a: (visits.get(a, 0), a != _END))
+        return None if best == _END else by_search_action[best]
+
+    def _vertex_pips(self, game: CatanGame, vertex: Vertex) -> int:
+        catan_hexes = game.map.catan_hexes
+        return sum(PIPS[catan_hexes[h].number_token] for h in vertex.get_adjacent_hexes() if h in catan_hexes)
+
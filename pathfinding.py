@@ -0,0 +1,220 @@
+"""Graph search over the vertices and edges of a board.
+
+A PathFinder works on the integer ids of a BoardTopology and reuses its
+buffers between queries: visited flags are generation stamps, the BFS queue
+is a preallocated list and heap entries are packed into single ints, so an
+expansion does not allocate. Coordinates are only converted at the API.
+
+Blocked edges, blocked vertices and edge costs are pluggable callables on
+ids; the factories at the bottom build them from CatanMap ownership. A
+blocked vertex is only passed if it is a source; sources are the vertices
+without a parent edge, since edges may cost 0."""
+from __future__ import annotations
+from typing import Callable, Iterable, Union
+from hex import Edge, Vertex
+from topology import BoardTopology
+import heapq
+
+EdgePredicate = Callable[[int], bool]
+VertexPredicate = Callable[[int], bool]
+EdgeCost = Callable[[int], int]
+
+_ID_BITS = 16
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+class PathFinder:
+
+    def __init__(self, topology: BoardTopology) -> None:
+        self.topology = topology
+        n = topology.num_vertices
+        assert n <= _ID_MASK, "Board too large for packed heap entries"
+        # (neighbor vertex, edge) pairs per vertex
+        self.neighbors = tuple(
+            tuple((w, e) for e in topology.vertex_edges[v]
+                  if (w := _other_vertex(topology, e, v)) >= 0)
+            for v in range(n))
+        self.dist = [0] * n
+        self.parent_edge = [-1] * n
+        self.stamp = [0] * n
+        self.done = [0] * n
+        self.queue = [0] * n
+        self.generation = 0
+        self._heuristics: dict[int, list[int]] = {}
+
+    def bfs(self, sources: Iterable[Vertex], blocked_edge: Union[EdgePredicate, None] = None,
+            blocked_vertex: Union[VertexPredicate, None] = None) -> dict[Vertex, int]:
+        """Returns the number of edges from the closest source to every
+        reachable vertex. Blocked vertices can be reached but not passed."""
+        self._bfs([self.topology.vertex_ids[v] for v in sources], blocked_edge, blocked_vertex)
+        return self._collect()
+
+    def reachable(self, sources: Iterable[Vertex], blocked_edge: Union[EdgePredicate, None] = None,
+                  blocked_vertex: Union[VertexPredicate, None] = None) -> set[Vertex]:
+        self._bfs([self.topology.vertex_ids[v] for v in sources], blocked_edge, blocked_vertex)
+        vertices = self.topology.vertices
+        stamp = self.stamp
+        generation = self.generation
+        return {vertices[v] for v in range(len(vertices)) if stamp[v] == generation}
+
+    def dijkstra(self, sources: Iterable[Vertex], cost: Union[EdgeCost, None] = None,
+                 blocked_edge: Union[EdgePredicate, None] = None,
+                 blocked_vertex: Union[VertexPredicate, None] = None) -> dict[Vertex, int]:
+        """Multi-source Dijkstra. cost returns the non-negative cost of an
+        edge id, e.g. 0 for streets the player already owns."""
+        self._dijkstra([self.topology.vertex_ids[v] for v in sources], -1, cost,
+                       blocked_edge, blocked_vertex, None)
+        return self._collect()
+
+    def shortest_path(self, start: Vertex, goal: Vertex,
+                      blocked_edge: Union[EdgePredicate, None] = None,
+                      blocked_vertex: Union[VertexPredicate, None] = None) -> Union[list[Edge], None]:
+        """A* search with unit edge costs and Vertex.distance_to as the
+        heuristic. Returns the edges of a shortest path or None."""
+        ids = self.topology.vertex_ids
+        goal_id = ids[goal]
+        heuristic = self._heuristics.get(goal_id)
+        if heuristic is None:
+            heuristic = self._heuristics[goal_id] = \
+                [v.distance_to(goal) for v in self.topology.vertices]
+        if not self._dijkstra([ids[start]], goal_id, None, blocked_edge, blocked_vertex, heuristic):
+            return None
+        return self._path(goal_id)
+
+    def path_to(self, vertex: Vertex) -> Union[list[Edge], None]:
+        """Returns the path found by the last query to a vertex."""
+        v = self.topology.vertex_ids[vertex]
+        if self.stamp[v] != self.generation:
+            return None
+        return self._path(v)
+
+    def _bfs(self, sources: list[int], blocked_edge, blocked_vertex) -> None:
+        self.generation += 1
+        generation = self.generation
+        stamp = self.stamp
+        dist = self.dist
+        parent_edge = self.parent_edge
+        queue = self.queue
+        neighbors = self.neighbors
+        tail = 0
+        for v in sources:
+            if stamp[v] != generation:
+                stamp[v] = generation
+                dist[v] = 0
+                parent_edge[v] = -1
+                queue[tail] = v
+                tail += 1
+        head = 0
+        while head < tail:
+            v = queue[head]
+            head += 1
+            if blocked_vertex is not None and parent_edge[v] != -1 and blocked_vertex(v):
+                continue
+            d = dist[v] + 1
+            for w, e in neighbors[v]:
+                if stamp[w] == generation or (blocked_edge is not None and blocked_edge(e)):
+                    continue
+                stamp[w] = generation
+                dist[w] = d
+                parent_edge[w] = e
+                queue[tail] = w
+                tail += 1
+
+    def _dijkstra(self, sources: list[int], goal: int, cost, blocked_edge, blocked_vertex,
+                  heuristic: Union[list[int], None]) -> bool:
+        self.generation += 1
+        generation = self.generation
+        stamp = self.stamp
+        done = self.done
+        dist = self.dist
+        parent_edge = self.parent_edge
+        neighbors = self.neighbors
+        heap: list[int] = []
+        for v in sources:
+            if stamp[v] != generation:
+                stamp[v] = generation
+                dist[v] = 0
+                parent_edge[v] = -1
+                priority = heuristic[v] if heuristic is not None else 0
+                heapq.heappush(heap, priority << _ID_BITS | v)
+        while heap:
+            v = heapq.heappop(heap) & _ID_MASK
+            if done[v] == generation:
+                continue
+            done[v] = generation
+            if v == goal:
+                return True
+            if blocked_vertex is not None and parent_edge[v] != -1 and blocked_vertex(v):
+                continue
+            for w, e in neighbors[v]:
+                if done[w] == generation or (blocked_edge is not None and blocked_edge(e)):
+                    continue
+                d = dist[v] + (1 if cost is None else cost(e))
+                if stamp[w] != generation or d < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = d
+                    parent_edge[w] = e
+                    priority = d + heuristic[w] if heuristic is not None else d
+                    heapq.heappush(heap, priority << _ID_BITS | w)
+        return goal < 0
+
+    def _collect(self) -> dict[Vertex, int]:
+        vertices = self.topology.vertices
+        stamp = self.stamp
+        dist = self.dist
+        generation = self.generation
+        return {vertices[v]: dist[v] for v in range(len(vertices)) if stamp[v] == generation}
+
+    def _path(self, v: int) -> list[Edge]:
+        edges = self.topology.edges
+        edge_vertices = self.topology.edge_vertices
+        path = []
+        while self.parent_edge[v] != -1:
+            e = self.parent_edge[v]
+            path.append(edges[e])
+            a, b = edge_vertices[e]
+            v = a if b == v else b
+        path.reverse()
+        return path
+
+
+def _other_vertex(topology: BoardTopology, edge_id: int, vertex_id: int) -> int:
+    """Returns the other end of an edge, or -1 if it is off the board."""
+    for v in topology.edge_vertices[edge_id]:
+        if v != vertex_id:
+            return v
+    return -1
+
+
+def opponent_streets(map, player) -> EdgePredicate:
+    """Blocks edges with a street of another player."""
+    edges = map.topology.edges
+    catan_edges = map.catan_edges
+
+    def blocked(e: int) -> bool:
+        catan_edge = catan_edges[edges[e]]
+        return catan_edge.has_building() and catan_edge.building.player.id != player.id
+    return blocked
+
+
+def opponent_buildings(map, player) -> VertexPredicate:
+    """Blocks passing through vertices with a building of another player."""
+    vertices = map.topology.vertices
+    catan_vertices = map.catan_vertices
+
+    def blocked(v: int) -> bool:
+        catan_vertex = catan_vertices[vertices[v]]
+        return catan_vertex.has_building() and catan_vertex.building.player.id != player.id
+    return blocked
+
+
+def own_streets_free(map, player) -> EdgeCost:
+    """Costs 0 for the player's own streets and 1 for every other edge, so
+    Dijkstra counts the streets still to be built."""
+    edges = map.topology.edges
+    catan_edges = map.catan_edges
+
+    def cost(e: int) -> int:
+        catan_edge = catan_edges[edges[e]]
+        return 0 if catan_edge.has_building() and catan_edge.building.player.id == player.id else 1
+    return cost
@@ -0,0 +1,113 @@
+"""Hit testing of screen positions against the vertices and edges of a board.
+
+Vertex.from_point and Edge.from_point round to a hex and compare all six
+candidates, and return an element even far off the board. A PickingIndex
+instead buckets the screen positions of all vertices and edge centers of a
+board into a uniform grid once, so a query only looks at the few cells
+within the pick radius and returns None if nothing is close enough.
+
+The index of a layout and topology is looked up with get_picking_index, so
+changing the layout yields a fresh index like get_geometry does."""
+from __future__ import annotations
+from math import floor
+from typing import Iterable, Union
+from geometry import get_geometry, layout_key
+from hex import Edge, Layout, Vertex
+from topology import BoardTopology
+
+MAX_CACHED_INDEXES = 8
+# Default pick radius relative to the hex size, half the length of an edge
+DEFAULT_RADIUS = 0.5
+
+Position = tuple[float, float]
+
+
+class PointGrid:
+    """Uniform grid over a fixed set of points for nearest neighbor queries
+    within a radius."""
+
+    def __init__(self, points: Iterable[Position], cell_size: float) -> None:
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list[tuple[float, float, int]]] = {}
+        for index, (x, y) in enumerate(points):
+            key = (floor(x / cell_size), floor(y / cell_size))
+            self.cells.setdefault(key, []).append((x, y, index))
+
+    def nearest(self, x: float, y: float, radius: float) -> int:
+        """Returns the index of the point closest to (x, y) within radius,
+        or -1 if there is none."""
+        cell_size = self.cell_size
+        cells = self.cells
+        best = -1
+        best_distance = radius * radius
+        for cx in range(floor((x - radius) / cell_size), floor((x + radius) / cell_size) + 1):
+            for cy in range(floor((y - radius) / cell_size), floor((y + radius) / cell_size) + 1):
+                for px, py, index in cells.get((cx, cy), ()):
+                    distance = (px - x) * (px - x) + (py - y) * (py - y)
+                    if distance <= best_distance:
+                        best = index
+                        best_distance = distance
+        return best
+
+
+class PickingIndex:
+    """Finds the vertex or edge of a board under a screen position."""
+
+    def __init__(self, layout: Layout, topology: BoardTopology) -> None:
+        self.layout = layout
+        self.topology = topology
+        self.radius = DEFAULT_RADIUS * min(abs(layout.size.x), abs(layout.size.y))
+        geometry = get_geometry(layout)
+        # With cells as large as the radius a query looks at 3x3 cells at most
+        self.vertex_grid = PointGrid((geometry.vertex_point(v) for v in topology.vertices), self.radius)
+        self.edge_grid = PointGrid((geometry.edge_center(e) for e in topology.edges), self.radius)
+
+    def vertex_at(self, position: Position, radius: Union[float, None] = None) -> Union[Vertex, None]:
+        """Returns the vertex closest to position within radius, by default
+        half an edge length, or None."""
+        index = self.vertex_grid.nearest(position[0], position[1], self.radius if radius is None else radius)
+        return None if index < 0 else self.topology.vertices[index]
+
+    def edge_at(self, position: Position, radius: Union[float, None] = None) -> Union[Edge, None]:
+        """Returns the edge whose center is closest to position within
+        radius, by default half an edge length, or None."""
+        index = self.edge_grid.nearest(position[0], position[1], self.radius if radius is None else radius)
+        return None if index < 0 else self.topology.edges[index]
+
+    def vertex_ids_at(self, positions: Iterable[Position], radius: Union[float, None] = None) -> list[int]:
+        """Returns the vertex id for each position, -1 where there is none."""
+        nearest = self.vertex_grid.nearest
+        radius = self.radius if radius is None else radius
+        return [nearest(x, y, radius) for x, y in positions]
+
+    def edge_ids_at(self, positions: Iterable[Position], radius: Union[float, None] = None) -> list[int]:
+        """Returns the edge id for each position, -1 where there is none."""
+        nearest = self.edge_grid.nearest
+        radius = self.radius if radius is None else radius
+        return [nearest(x, y, radius) for x, y in positions]
+
+    def vertices_at(self, positions: Iterable[Position],
+                    radius: Union[float, None] = None) -> list[Union[Vertex, None]]:
+        vertices = self.topology.vertices
+        return [None if i < 0 else vertices[i] for i in self.vertex_ids_at(positions, radius)]
+
+    def edges_at(self, positions: Iterable[Position],
+                 radius: Union[float, None] = None) -> list[Union[Edge, None]]:
+        edges = self.topology.edges
+        return [None if i < 0 else edges[i] for i in self.edge_ids_at(positions, radius)]
+
+
+_indexes: dict[tuple, PickingIndex] = {}
+
+
+def get_picking_index(layout: Layout, topology: BoardTopology) -> PickingIndex:
+    """Returns the cached picking index of a board in a layout. Only the
+    most recently created indexes are kept."""
+    key = (layout_key(layout), topology)
+    index = _indexes.get(key)
+    if index is None:
+        if len(_indexes) >= MAX_CACHED_INDEXES:
+            del _indexes[next(iter(_indexes))]
+        index = _indexes[key] = PickingIndex(layout, topology)
+    return index
+
@@ -0,0 +1,99 @@
+"""Wire protocol between the game server and its clients.
+
+Every message is a frame of a 4 byte little endian payload length, one byte
+MessageType and the payload. Ids of vertices, edges and hexes are the ids
+of the board topology. State changes are sent as the numbered deltas of
+sync.py, so clients keep a copy of the game up to date by applying the
+events of each delta to it. A client that sees a gap in the sequence
+numbers asks for the deltas it missed with SYNC and gets them, or a
+snapshot if the server no longer has them.
+
+The phases of a table follow from the events alone (next_phase), so server
+and clients agree on whose move it is and what it may be without sending
+the phase."""
+from __future__ import annotations
+from enum import IntEnum
+from catan import State
+from events import Event, EventType
+import asyncio
+import struct
+
+FRAME = struct.Struct("<IB")
+JOIN = struct.Struct("<IB")
+ACTION = struct.Struct("<BH")
+TABLE = struct.Struct("<I")
+SEQUENCE = struct.Struct("<I")
+# Sequence number and phase in front of a snapshot
+SNAPSHOT = struct.Struct("<IB")
+# Largest accepted payload, protects the server from garbage lengths
+MAX_PAYLOAD = 1 << 20
+
+
+class MessageType(IntEnum):
+    JOIN = 1      # client: table id (u32), number of players (u8)
+    ACTION = 2    # client: ActionKind (u8), target id (u16)
+    WELCOME = 3   # server: seat (u8)
+    START = 4     # server: like SNAPSHOT, when all seats are taken
+    DELTA = 5     # server: delta caused by an action, see sync.py
+    ERROR = 6     # server: ErrorCode (u8), sent to the requesting client only
+    WATCH = 7     # client: table id (u32), follow a table without a seat
+    SYNC = 8      # client: last sequence number (u32) it has applied
+    SNAPSHOT = 9  # server: sequence number (u32), Phase (u8), snapshot
+
+
+class ActionKind(IntEnum):
+    ROLL = 1
+    SETTLEMENT = 2  # target: vertex id
+    CITY = 3        # target: vertex id
+    STREET = 4      # target: edge id
+    ROBBER = 5      # target: hex id
+    END_TURN = 6
+
+
+class ErrorCode(IntEnum):
+    BAD_MESSAGE = 1
+    TABLE_FULL = 2
+    NOT_STARTED = 3
+    NOT_YOUR_TURN = 4
+    ILLEGAL = 5
+    GAME_OVER = 6
+
+
+class Phase(IntEnum):
+    SETUP_SETTLEMENT = 0
+    SETUP_STREET = 1
+    ROLL = 2
+    ROBBER = 3
+    BUILD = 4
+    OVER = 5
+
+
+def next_phase(phase: Phase, event: Event) -> Phase:
+    """Returns the phase of a table after an event."""
+    type = event.type
+    if type == EventType.ROLL:
+        return Phase.ROBBER if event.value == 7 else Phase.BUILD
+    if type == EventType.ROBBER:
+        return Phase.BUILD
+    if type == EventType.SETTLEMENT and phase == Phase.SETUP_SETTLEMENT:
+        return Phase.SETUP_STREET
+    if type == EventType.STREET and phase == Phase.SETUP_STREET:
+        return Phase.SETUP_SETTLEMENT
+    if type == EventType.TURN and phase == Phase.BUILD:
+        return Phase.ROLL
+    if type == EventType.STATE:
+        return Phase.ROLL if event.target == State.ROUND.value else Phase.OVER
+    return phase
+
+
+def frame(type: MessageType, payload: bytes = b"") -> bytes:
+    return FRAME.pack(len(payload), type) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[MessageType, bytes]:
+    """Reads the next frame. Raises asyncio.IncompleteReadError when the
+    connection is closed and ValueError for malformed frames."""
+    length, type = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Payload of {length} bytes is too large")
+    return MessageType(type), await reader.readexactly(length)
@@ -0,0 +1,267 @@
+"""Asyncio server hosting many concurrent games in one process.
+
+Clients join a table by id; the first client to join decides the number of
+players and the game starts once every seat is taken. The server then sends
+a snapshot of the game to all seats, and after every accepted action it
+broadcasts only the delta of the events the action caused, see protocol.py
+and sync.py. Further clients may watch a table; they start from a snapshot.
+Actions are checked against the rules of the current phase; a rejected
+action is answered with an error to its sender only.
+
+Run this module to serve on localhost, and client.py for a load test."""
+from __future__ import annotations
+from typing import Union
+from catan import CatanGame, Player, State
+from catan_constants import CITY_COST, SETTLEMENT_COST, STREET_COST, ResourceType
+from events import Event, GameHistory
+from protocol import ACTION, JOIN, SEQUENCE, SNAPSHOT, TABLE, ActionKind, ErrorCode, MessageType, Phase, \
+                     frame, next_phase, read_message
+from sync import SyncLog
+import asyncio
+import random
+
+MAX_PLAYERS = 4
+# Watchers with more unsent bytes than this are skipped until they catch up
+# with SYNC, and such seats are dropped, which closes their table. So a slow
+# client does not make the server buffer without limit
+MAX_WRITE_BUFFER = 1 << 16
+
+
+class Table:
+    """One game and its seats. Only knows the rules, not the connections."""
+
+    def __init__(self, table_id: int, num_players: int, rng: Union[random.Random, None] = None,
+                 target_points: int = 10, max_turns: int = 500) -> None:
+        self.id = table_id
+        self.num_players = num_players
+        self.target_points = target_points
+        self.max_turns = max_turns
+        self.turns = 0
+        players = [Player(i, f"Player {i}", "black") for i in range(num_players)]
+        self.game = CatanGame(players, rng=rng or random.Random())
+        self.history = GameHistory(self.game, checkpoint_interval=0)
+        self.phase = Phase.SETUP_SETTLEMENT
+        # Seats in snake order for the start phase
+        self.setup_order = list(range(num_players)) + list(reversed(range(num_players)))
+        self.setup_step = 0
+        self.setup_vertex = None
+        self.history.subscribe(self._on_event)
+        self.sync = SyncLog(self.history)
+
+    def _on_event(self, event: Event, undone: bool) -> None:
+        self.phase = next_phase(self.phase, event)
+
+    def snapshot(self) -> bytes:
+        """Returns the payload of a SNAPSHOT message for the current state."""
+        sequence, data = self.sync.snapshot()
+        return SNAPSHOT.pack(sequence, self.phase) + data
+
+    def act(self, seat: int, kind: int, target: int) -> Union[ErrorCode, None]:
+        """Applies the action of a seat if it is legal and returns None, or
+        returns why it was rejected."""
+        game = self.game
+        if self.phase == Phase.OVER:
+            return ErrorCode.GAME_OVER
+        if seat != game.current_player.id:
+            return ErrorCode.NOT_YOUR_TURN
+        player = game.current_player
+        map = game.map
+        topology = map.topology
+        history = self.history
+        phase = self.phase
+
+        if phase == Phase.SETUP_SETTLEMENT:
+            if kind != ActionKind.SETTLEMENT or target >= topology.num_vertices:
+                return ErrorCode.ILLEGAL
+            vertex = topology.vertices[target]
+            if not map.may_build_settlement(player, vertex):
+                return ErrorCode.ILLEGAL
+            history.build_settlement(player, vertex)
+            if self.setup_step >= self.num_players:
+                # The second settlement yields one of each adjacent resource
+                for hex in vertex.get_adjacent_hexes():
+                    if hex in map.catan_hexes and map.catan_hexes[hex].resource_type != ResourceType.NOTHING:
+                        history.gain(player, map.catan_hexes[hex].resource_type)
+            self.setup_vertex = vertex
+        elif phase == Phase.SETUP_STREET:
+            if kind != ActionKind.STREET or target >= topology.num_edges:
+                return ErrorCode.ILLEGAL
+            edge = topology.edges[target]
+            if edge not in self.setup_vertex.get_adjacent_edges() or not map.may_build_street(player, edge):
+                return ErrorCode.ILLEGAL
+            history.build_street(player, edge)
+            self.setup_step += 1
+            if self.setup_step < len(self.setup_order):
+                history.end_turn(game.players[self.setup_order[self.setup_step]])
+            else:
+                history.set_state(State.ROUND)
+        elif phase == Phase.ROLL:
+            if kind != ActionKind.ROLL:
+                return ErrorCode.ILLEGAL
+            game.dice.roll()
+            history.roll(game.dice.get_total_value())
+        elif phase == Phase.ROBBER:
+            if kind != ActionKind.ROBBER or target >= topology.num_hexes or topology.hexes[target] == map.robber:
+                return ErrorCode.ILLEGAL
+            history.move_robber(topology.hexes[target])
+        elif kind == ActionKind.END_TURN:
+            self.turns += 1
+            if self.turns >= self.max_turns:
+                history.set_state(State.GAME_END)
+            else:
+                history.end_turn()
+        else:
+            error = self._build(player, kind, target)
+            if error is not None:
+                return error
+            if player.victory_points >= self.target_points:
+                history.set_state(State.GAME_END)
+        return None
+
+    def _build(self, player: Player, kind: int, target: int) -> Union[ErrorCode, None]:
+        map = self.game.map
+        topology = map.topology
+        if kind == ActionKind.STREET:
+            if (target >= topology.num_edges or not player.streets or not player.can_afford(STREET_COST)
+                    or topology.edges[target] not in map.legal_street_spots(player)):
+                return ErrorCode.ILLEGAL
+            self.history.build_street(player, topology.edges[target], pay=True)
+        elif kind == ActionKind.SETTLEMENT:
+            if (target >= topology.num_vertices or not player.settlements
+                    or not player.can_afford(SETTLEMENT_COST)
+                    or topology.vertices[target] not in map.legal_settlement_spots(player)):
+                return ErrorCode.ILLEGAL
+            self.history.build_settlement(player, topology.vertices[target], pay=True)
+        elif kind == ActionKind.CITY:
+            if (target >= topology.num_vertices or not player.citys or not player.can_afford(CITY_COST)
+                    or not map.may_build_city(player, topology.vertices[target])):
+                return ErrorCode.ILLEGAL
+            self.history.build_city(player, topology.vertices[target], pay=True)
+        else:
+            return ErrorCode.ILLEGAL
+        return None
+
+
+class GameServer:
+    """Accepts connections and relays their actions to the tables."""
+
+    def __init__(self, seed: Union[int, None] = None, target_points: int = 10, max_turns: int = 500) -> None:
+        self.rng = random.Random(seed)
+        self.target_points = target_points
+        self.max_turns = max_turns
+        self.tables: dict[int, Table] = {}
+        self.seats: dict[int, list[asyncio.StreamWriter]] = {}
+        self.watchers: dict[int, set[asyncio.StreamWriter]] = {}
+        self.actions = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """Starts listening. With port 0 a free port is chosen, see
+        server.sockets[0].getsockname()."""
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        table = None
+        seat = -1
+        try:
+            while True:
+                type, payload = await read_message(reader)
+                if type == MessageType.JOIN and table is None and len(payload) == JOIN.size:
+                    joined = self.join(*JOIN.unpack(payload), writer)
+                    if isinstance(joined, ErrorCode):
+                        writer.write(frame(MessageType.ERROR, bytes((joined,))))
+                    else:
+                        table, seat = joined
+                elif type == MessageType.WATCH and table is None and len(payload) == TABLE.size:
+                    table = self.tables.get(TABLE.unpack(payload)[0])
+                    if table is None:
+                        writer.write(frame(MessageType.ERROR, bytes((ErrorCode.NOT_STARTED,))))
+                    else:
+                        self.watchers[table.id].add(writer)
+                        writer.write(frame(MessageType.SNAPSHOT, table.snapshot()))
+                elif type == MessageType.ACTION and len(payload) == ACTION.size:
+                    if table is None or len(self.seats.get(table.id, ())) < table.num_players:
+                        error = ErrorCode.NOT_STARTED
+                    else:
+                        error = table.act(seat, *ACTION.unpack(payload))
+                    if error is None:
+                        self.actions += 1
+                        self.broadcast(table, frame(MessageType.DELTA, table.sync.commit()))
+                    else:
+                        writer.write(frame(MessageType.ERROR, bytes((error,))))
+                elif type == MessageType.SYNC and table is not None and len(payload) == SEQUENCE.size:
+                    deltas = table.sync.since(SEQUENCE.unpack(payload)[0])
+                    if deltas is None:
+                        writer.write(frame(MessageType.SNAPSHOT, table.snapshot()))
+                    else:
+                        writer.writelines(frame(MessageType.DELTA, delta) for delta in deltas)
+                else:
+                    writer.write(frame(MessageType.ERROR, bytes((ErrorCode.BAD_MESSAGE,))))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if seat >= 0:
+                self.leave(table, writer)
+            elif table is not None and table.id in self.watchers:
+                self.watchers[table.id].discard(writer)
+            writer.close()
+
+    def join(self, table_id: int, num_players: int,
+             writer: asyncio.StreamWriter) -> Union[tuple[Table, int], ErrorCode]:
+        """Seats a client and returns its table and seat, or returns why it
+        was rejected."""
+        table = self.tables.get(table_id)
+        if table is None:
+            if not 2 <= num_players <= MAX_PLAYERS:
+                return ErrorCode.BAD_MESSAGE
+            table = self.tables[table_id] = Table(table_id, num_players, random.Random(self.rng.getrandbits(64)),
+                                                  self.target_points, self.max_turns)
+            self.seats[table_id] = []
+            self.watchers[table_id] = set()
+        seats = self.seats[table_id]
+        if len(seats) >= table.num_players:
+            return ErrorCode.TABLE_FULL
+        seat = len(seats)
+        seats.append(writer)
+        writer.write(frame(MessageType.WELCOME, bytes((seat,))))
+        if len(seats) == table.num_players:
+            self.broadcast(table, frame(MessageType.START, table.snapshot()))
+        return table, seat
+
+    def leave(self, table: Table, writer: asyncio.StreamWriter) -> None:
+        """Closes the table and all its connections when a player leaves, a
+        game does not continue without one of its players."""
+        seats = self.seats.get(table.id)
+        if seats is None:
+            return
+        for other in (*seats, *self.watchers[table.id]):
+            if other is not writer:
+                other.close()
+        del self.seats[table.id]
+        del self.watchers[table.id]
+        del self.tables[table.id]
+
+    def broadcast(self, table: Table, data: bytes) -> None:
+        # The last delta always goes out, later ones would never come
+        over = table.phase == Phase.OVER
+        for writer in self.seats[table.id]:
+            if over or writer.transport.get_write_buffer_size() <= MAX_WRITE_BUFFER:
+                writer.write(data)
+            else:
+                # A seat cannot skip deltas, it waits for the ones of its
+                # actions. Its handler sees the closed connection and leaves
+                writer.close()
+        for writer in self.watchers[table.id]:
+            if over or writer.transport.get_write_buffer_size() <= MAX_WRITE_BUFFER:
+                writer.write(data)
+
+
+async def serve(host: str, port: int) -> None:
+    server = await GameServer().start(host, port)
+    print(f"Serving on {server.sockets[0].getsockname()}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve("127.0.0.1", 8765))
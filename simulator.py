@@ -0,0 +1,241 @@
+"""Headless simulation of complete games on top of CatanGame.
+
+Agents are plain objects with callbacks for the setup phase, the robber and
+the build phase. The simulator drives the game loop (setup, rolling,
+distributing, building and passing the turn) without pygame or printing and
+records the time spent in each phase.
+
+Without trading and longest road most games between random agents stop at
+max_turns, so turns per second is the throughput to compare, not games per
+second."""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Union
+from hex import Hex, Edge, Vertex
+from catan import CatanGame, CatanMap, Player, State
+from catan_constants import ResourceType, STREET_COST, SETTLEMENT_COST, CITY_COST
+import random
+import time
+
+PHASES = ("setup", "roll", "distribute", "build")
+
+
+class ActionType(Enum):
+    STREET = 0
+    SETTLEMENT = 1
+    CITY = 2
+
+
+Action = tuple[ActionType, Union[Vertex, Edge]]
+
+
+class Agent:
+    """Base class for simulation agents. Every callback gets the game and the
+    acting player and returns one of the offered options."""
+
+    def choose_setup_settlement(self, game: CatanGame, player: Player, spots: list[Vertex]) -> Vertex:
+        raise NotImplementedError
+
+    def choose_setup_street(self, game: CatanGame, player: Player, spots: list[Edge]) -> Edge:
+        raise NotImplementedError
+
+    def choose_robber(self, game: CatanGame, player: Player, hexes: list[Hex]) -> Hex:
+        raise NotImplementedError
+
+    def choose_action(self, game: CatanGame, player: Player, actions: list[Action]) -> Union[Action, None]:
+        """Returns the next action or None to end the turn."""
+        raise NotImplementedError
+
+
+class RandomAgent(Agent):
+    """Picks uniformly among the offered options and always builds if it can."""
+
+    def __init__(self, rng: Union[random.Random, None] = None) -> None:
+        self.rng = rng or random.Random()
+
+    def choose_setup_settlement(self, game: CatanGame, player: Player, spots: list[Vertex]) -> Vertex:
+        return self.rng.choice(spots)
+
+    def choose_setup_street(self, game: CatanGame, player: Player, spots: list[Edge]) -> Edge:
+        return self.rng.choice(spots)
+
+    def choose_robber(self, game: CatanGame, player: Player, hexes: list[Hex]) -> Hex:
+        return self.rng.choice(hexes)
+
+    def choose_action(self, game: CatanGame, player: Player, actions: list[Action]) -> Union[Action, None]:
+        if not actions:
+            return None
+        return self.rng.choice(actions)
+
+
+@dataclass
+class GameResult:
+    winner: Union[int, None]
+    turns: int
+    victory_points: list[int]
+
+
+@dataclass
+class SimulationStats:
+    games: int = 0
+    turns: int = 0
+    # Games stopped at max_turns without a winner
+    unfinished: int = 0
+    seconds: float = 0.0
+    wins: dict[int, int] = field(default_factory=dict)
+    phase_seconds: dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.seconds if self.seconds else 0.0
+
+    def add(self, result: GameResult) -> None:
+        self.games += 1
+        self.turns += result.turns
+        if result.winner is not None:
+            self.wins[result.winner] = self.wins.get(result.winner, 0) + 1
+        else:
+            self.unfinished += 1
+
+    def merge(self, other: SimulationStats) -> None:
+        self.games += other.games
+        self.turns += other.turns
+        self.unfinished += other.unfinished
+        self.seconds += other.seconds
+        for player_id, wins in other.wins.items():
+            self.wins[player_id] = self.wins.get(player_id, 0) + wins
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+    def report(self) -> str:
+        lines = [f"{self.games} games ({self.unfinished} stopped at max_turns), {self.turns} turns "
+                 f"in {self.seconds:.3f}s ({self.turns_per_second:.0f} turns/s, "
+                 f"{self.games_per_second:.1f} games/s)"]
+        for phase, seconds in self.phase_seconds.items():
+            lines.append(f"  {phase:<10} {seconds:.3f}s")
+        return "\n".join(lines)
+
+
+class Simulator:
+    """Plays complete games between the given agents, one agent per player."""
+
+    def __init__(self, agents: list[Agent], map_class: type[CatanMap] = CatanMap,
+                 target_points: int = 10, max_turns: int = 500, dice_block_size: int = 256) -> None:
+        self.agents = agents
+        self.dice_block_size = dice_block_size
+        self.map_class = map_class
+        self.target_points = target_points
+        self.max_turns = max_turns
+        self.stats = SimulationStats()
+
+    def run(self, num_games: int) -> SimulationStats:
+        start = time.perf_counter()
+        for _ in range(num_games):
+            self.stats.add(self.play_game())
+        self.stats.seconds += time.perf_counter() - start
+        return self.stats
+
+    def new_game(self, seed: Union[int, str, None] = None) -> CatanGame:
+        players = [Player(i, f"Player {i}", "black") for i in range(len(self.agents))]
+        return CatanGame(players, self.map_class, random.Random(seed), self.dice_block_size)
+
+    def play_game(self, seed: Union[int, str, None] = None) -> GameResult:
+        """Plays one game. Map and dice are reproducible for a given seed."""
+        game = self.new_game(seed)
+        phase_seconds = self.stats.phase_seconds
+        clock = time.perf_counter
+
+        t0 = clock()
+        self.setup(game)
+        phase_seconds["setup"] += clock() - t0
+
+        game.state = State.ROUND
+        turns = 0
+        winner = None
+        while winner is None and turns < self.max_turns:
+            player = game.current_player
+            agent = self.agents[player.id]
+
+            t0 = clock()
+            player.roll_dice(game.dice)
+            number = game.dice.get_total_value()
+            if number == 7:
+                robber_hexes = [h for h in game.map.catan_hexes if h != game.map.robber]
+                game.map.move_robber(agent.choose_robber(game, player, robber_hexes))
+            t1 = clock()
+            phase_seconds["roll"] += t1 - t0
+            if number != 7:
+                game.distribute_resources(number)
+            t2 = clock()
+            phase_seconds["distribute"] += t2 - t1
+            self.build(game, player, agent)
+            phase_seconds["build"] += clock() - t2
+
+            if player.victory_points >= self.target_points:
+                winner = player.id
+            game.next_player()
+            turns += 1
+
+        game.state = State.GAME_END
+        return GameResult(winner, turns, [p.victory_points for p in game.players])
+
+    def setup(self, game: CatanGame) -> None:
+        """Places two settlements and streets per player in snake order. The
+        second settlement yields one of each adjacent resource."""
+        map = game.map
+        order = game.players + game.players[::-1]
+        for i, player in enumerate(order):
+            agent = self.agents[player.id]
+            vertex = agent.choose_setup_settlement(game, player, list(map.legal_settlement_spots(player)))
+            player.build_settlement(map, vertex)
+            player.victory_points += 1
+            streets = [e for e in vertex.get_adjacent_edges() if map.may_build_street(player, e)]
+            if streets:
+                player.build_street(map, agent.choose_setup_street(game, player, streets))
+            if i >= len(game.players):
+                for hex in vertex.get_adjacent_hexes():
+                    if hex in map.catan_hexes:
+                        resource_type = map.catan_hexes[hex].resource_type
+                        if resource_type != ResourceType.NOTHING:
+                            player.gain(resource_type)
+        map.is_start = False
+
+    def build(self, game: CatanGame, player: Player, agent: Agent) -> None:
+        while True:
+            action = agent.choose_action(game, player, self.get_actions(game, player))
+            if action is None:
+                return
+            action_type, spot = action
+            if action_type == ActionType.STREET:
+                player.pay(STREET_COST)
+                player.build_street(game.map, spot)
+            elif action_type == ActionType.SETTLEMENT:
+                player.pay(SETTLEMENT_COST)
+                player.build_settlement(game.map, spot)
+                player.victory_points += 1
+            else:
+                player.pay(CITY_COST)
+                player.build_city(game.map, spot)
+                player.victory_points += 1
+
+    def get_actions(self, game: CatanGame, player: Player) -> list[Action]:
+        """Returns all affordable and legal build actions of a player."""
+        map = game.map
+        actions: list[Action] = []
+        if player.streets and player.can_afford(STREET_COST):
+            actions.extend((ActionType.STREET, e) for e in map.legal_street_spots(player))
+        if player.settlements and player.can_afford(SETTLEMENT_COST):
+            actions.extend((ActionType.SETTLEMENT, v) for v in map.legal_settlement_spots(player))
+        if player.citys and player.can_afford(CITY_COST):
+            actions.extend((ActionType.CITY, v) for v in map.legal_city_spots(player))
+        return actions
+
+
+if __name__ == "__main__":
+    simulator = Simulator([RandomAgent(), RandomAgent(), RandomAgent()])
+    print(simulator.run(100).report())
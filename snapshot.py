@@ -0,0 +1,150 @@
+"""Compact binary snapshots of game states.
+
+A snapshot has a fixed layout on the ids of the board topology, so it can
+be read without building any coordinate objects. Version 1, little endian:
+
+    header   magic "CATN", version, flags (bit 0: start phase), state,
+             current player id, robber hex id (255: none), number of
+             players, hexes, vertices and edges, one byte each
+    hexes    resource type per hex, then number token per hex
+    vertices 0 if empty, else player id + 1 + 16 * (level - 1)
+    edges    0 if empty, else player id + 1
+    players  victory points (u8), development cards (u16) and the count of
+             each resource in ResourceType order (u16) per player
+
+A standard board with four players takes 229 bytes. Player names, colors
+and the state of the RNG are not stored; players are restored with ids
+0..n-1, like the players of the Simulator."""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Union
+from catan import CatanGame, CatanHex, CatanMap, DevelopmentCard, Player, State
+from catan_constants import ResourceType
+from hex import Hex
+from topology import get_topology
+import struct
+
+MAGIC = b"CATN"
+VERSION = 1
+NO_ROBBER = 255
+
+HEADER = struct.Struct("<4s9B")
+PLAYER = struct.Struct("<BH5H")
+RESOURCES = (ResourceType.BRICK, ResourceType.LUMBER, ResourceType.ORE,
+             ResourceType.GRAIN, ResourceType.WOOL)
+_RESOURCE_TYPES = {r.value: r for r in ResourceType}
+_STATES = {s.value: s for s in State}
+
+
+@dataclass
+class Snapshot:
+    """Decoded snapshot. Hexes, vertices and edges are bytes indexed by
+    topology id, players are (victory points, development cards, resource
+    counts) tuples."""
+    is_start: bool
+    state: int
+    current_player: int
+    robber: int
+    hex_resources: bytes
+    hex_tokens: bytes
+    vertices: bytes
+    edges: bytes
+    players: list[tuple[int, int, tuple[int, ...]]]
+
+
+def encode(game: CatanGame) -> bytes:
+    map = game.map
+    topology = map.topology
+    robber = NO_ROBBER if map.robber is None else topology.hex_ids[map.robber]
+    hexes = [map.catan_hexes[hex] for hex in topology.hexes]
+    vertices = bytearray(topology.num_vertices)
+    for i, vertex in enumerate(topology.vertices):
+        catan_vertex = map.catan_vertices[vertex]
+        if catan_vertex.has_building():
+            building = catan_vertex.building
+            vertices[i] = building.player.id + 1 + 16 * (building.resource_factor - 1)
+    edges = bytearray(topology.num_edges)
+    for i, edge in enumerate(topology.edges):
+        catan_edge = map.catan_edges[edge]
+        if catan_edge.has_building():
+            edges[i] = catan_edge.building.player.id + 1
+    parts = [HEADER.pack(MAGIC, VERSION, int(map.is_start), game.state.value, game.current_player.id,
+                         robber, len(game.players), topology.num_hexes, topology.num_vertices,
+                         topology.num_edges),
+             bytes(h.resource_type.value for h in hexes),
+             bytes(h.number_token for h in hexes),
+             vertices,
+             edges]
+    for player in game.players:
+        resources = player.resources
+        parts.append(PLAYER.pack(player.victory_points, len(player.development_cards),
+                                 *[resources[r] for r in RESOURCES]))
+    return b"".join(parts)
+
+
+def read(data: bytes) -> Snapshot:
+    """Decodes a snapshot without building a game."""
+    if len(data) < HEADER.size:
+        raise ValueError("Snapshot too short")
+    magic, version, flags, state, current_player, robber, num_players, num_hexes, \
+        num_vertices, num_edges = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    if len(data) != HEADER.size + 2 * num_hexes + num_vertices + num_edges + num_players * PLAYER.size:
+        raise ValueError("Snapshot has the wrong size")
+    pos = HEADER.size
+    hex_resources = data[pos:pos + num_hexes]
+    pos += num_hexes
+    hex_tokens = data[pos:pos + num_hexes]
+    pos += num_hexes
+    vertices = data[pos:pos + num_vertices]
+    pos += num_vertices
+    edges = data[pos:pos + num_edges]
+    pos += num_edges
+    players = []
+    for _ in range(num_players):
+        victory_points, development_cards, *resources = PLAYER.unpack_from(data, pos)
+        players.append((victory_points, development_cards, tuple(resources)))
+        pos += PLAYER.size
+    return Snapshot(bool(flags & 1), state, current_player, robber, hex_resources, hex_tokens,
+                    vertices, edges, players)
+
+
+def decode(data: bytes, map_class: Union[type[CatanMap], None] = None) -> CatanGame:
+    """Restores a full game from a snapshot of a standard board. All
+    derived state (legal moves, production, roads, hashes) is rebuilt."""
+    snapshot = read(data)
+    topology = get_topology(Hex(0, 0, 0).hexes_in_range(2))
+    if (topology.num_hexes, topology.num_vertices, topology.num_edges) != \
+            (len(snapshot.hex_resources), len(snapshot.vertices), len(snapshot.edges)):
+        raise ValueError("Snapshot is not of a standard board")
+    hexes = {hex: CatanHex(snapshot.hex_tokens[i], _RESOURCE_TYPES[snapshot.hex_resources[i]])
+             for i, hex in enumerate(topology.hexes)}
+    players = [Player(i, f"Player {i}", "black") for i in range(len(snapshot.players))]
+    game = CatanGame(players, map_class, hexes=hexes)
+    map = game.map
+    if snapshot.robber != NO_ROBBER:
+        map.set_robber(topology.hexes[snapshot.robber], True)
+    for i, value in enumerate(snapshot.vertices):
+        if value:
+            player = players[(value & 15) - 1]
+            if value >= 16:
+                map.build_settlement(player.citys.pop(), topology.vertices[i])
+            else:
+                map.build_settlement(player.settlements.pop(), topology.vertices[i])
+    for i, value in enumerate(snapshot.edges):
+        if value:
+            map.build_street(players[value - 1].streets.pop(), topology.edges[i])
+    for player, (victory_points, development_cards, resources) in zip(players, snapshot.players):
+        player.victory_points = victory_points
+        for _ in range(development_cards):
+            player.add_development_card(DevelopmentCard())
+        for resource_type, count in zip(RESOURCES, resources):
+            if count:
+                player.gain(resource_type, count)
+    map.is_start = snapshot.is_start
+    game.state = _STATES[snapshot.state]
+    game.current_player = players[snapshot.current_player]
+    return game
@@ -0,0 +1,144 @@
+"""Delta compressed state sync.
+
+A SyncLog subscribes to the GameHistory of a game and turns the events of
+each action (builds, robber moves, resource changes, ...) into one delta
+with a sequence number. A delta is the u32 sequence number followed by the
+events in a variable length encoding:
+
+    byte     EventType in the low 4 bits, player id (< 16) in the high 4 bits
+    target   unsigned LEB128, only for event types that have a target
+    value    zigzag LEB128, only for event types that have a value
+
+Most events take 2 or 3 bytes instead of the 8 of a packed event. The log
+keeps the last max_deltas deltas, so a client that missed some catches up
+with the deltas after its last sequence number. Clients that are further
+behind or join late get a snapshot at the current sequence number instead,
+which is encoded at most once per sequence number."""
+from __future__ import annotations
+from collections import deque
+from typing import Iterable, Union
+from events import Event, EventType, GameHistory
+import snapshot
+import struct
+
+SEQUENCE = struct.Struct("<I")
+
+# Whether events of a type carry a target and a value
+_FIELDS = {
+    EventType.ROLL: (False, True),
+    EventType.SETTLEMENT: (True, True),
+    EventType.STREET: (True, False),
+    EventType.ROBBER: (True, True),
+    EventType.GAIN: (True, True),
+    EventType.TURN: (True, False),
+    EventType.CARD: (False, False),
+    EventType.STATE: (True, True),
+}
+_TYPES = {t.value: t for t in EventType}
+
+
+def encode_events(events: Iterable[Event]) -> bytearray:
+    data = bytearray()
+    for type, player, target, value in events:
+        has_target, has_value = _FIELDS[type]
+        data.append(type | player << 4)
+        if has_target:
+            while target >= 0x80:
+                data.append(target & 0x7F | 0x80)
+                target >>= 7
+            data.append(target)
+        if has_value:
+            value = value << 1 if value >= 0 else -value << 1 | 1
+            while value >= 0x80:
+                data.append(value & 0x7F | 0x80)
+                value >>= 7
+            data.append(value)
+    return data
+
+
+def decode_events(data: Union[bytes, memoryview], start: int = 0) -> list[Event]:
+    events = []
+    pos = start
+    end = len(data)
+    while pos < end:
+        header = data[pos]
+        pos += 1
+        type = _TYPES[header & 15]
+        has_target, has_value = _FIELDS[type]
+        target = value = 0
+        if has_target:
+            shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                target |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+        if has_value:
+            shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            value = -(value >> 1) if value & 1 else value >> 1
+        events.append(Event(type, header >> 4, target, value))
+    return events
+
+
+def encode_delta(sequence: int, events: Iterable[Event]) -> bytes:
+    return SEQUENCE.pack(sequence) + encode_events(events)
+
+
+def decode_delta(data: bytes) -> tuple[int, list[Event]]:
+    """Returns the sequence number and the events of a delta."""
+    return SEQUENCE.unpack_from(data)[0], decode_events(data, SEQUENCE.size)
+
+
+class SyncLog:
+    """Numbered deltas of a game. Sequence number 0 is the state before the
+    first delta."""
+
+    def __init__(self, history: GameHistory, max_deltas: int = 256) -> None:
+        self.game = history.game
+        self.sequence = 0
+        self.pending: list[Event] = []
+        self.deltas: deque[bytes] = deque(maxlen=max_deltas)
+        self._snapshot: Union[tuple[int, bytes], None] = None
+        history.subscribe(self._on_event)
+
+    def _on_event(self, event: Event, undone: bool) -> None:
+        if undone:
+            raise ValueError("Undone events cannot be synced")
+        self.pending.append(event)
+
+    def commit(self) -> Union[bytes, None]:
+        """Turns the events since the last commit into the next delta and
+        returns it, or None if nothing happened."""
+        if not self.pending:
+            return None
+        self.sequence += 1
+        delta = encode_delta(self.sequence, self.pending)
+        self.pending.clear()
+        self.deltas.append(delta)
+        return delta
+
+    def since(self, sequence: int) -> Union[list[bytes], None]:
+        """Returns the deltas after the given sequence number, or None if
+        they are no longer kept and a snapshot is needed."""
+        missing = self.sequence - sequence
+        if missing < 0 or missing > len(self.deltas):
+            return None
+        return list(self.deltas)[len(self.deltas) - missing:]
+
+    def snapshot(self) -> tuple[int, bytes]:
+        """Returns the sequence number of the last delta and a snapshot of
+        the game after it."""
+        assert not self.pending, "Commit before taking a snapshot"
+        if self._snapshot is None or self._snapshot[0] != self.sequence:
+            self._snapshot = (self.sequence, snapshot.encode(self.game))
+        return self._snapshot
+
@@ -0,0 +1,22 @@
+from batch import run_batch, play_chunk
+from catan import CatanMap
+from simulator import RandomAgent
+import unittest
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_deterministic(self):
+        s1 = play_chunk(0, 4, 1, 2, RandomAgent, CatanMap, 100)
+        s2 = play_chunk(0, 4, 1, 2, RandomAgent, CatanMap, 100)
+        self.assertEqual((s1.turns, s1.wins), (s2.turns, s2.wins))
+
+    def test_workers(self):
+        s1 = run_batch(6, seed=3, num_players=2, max_turns=100, workers=1, chunk_size=6)
+        s2 = run_batch(6, seed=3, num_players=2, max_turns=100, workers=2, chunk_size=2)
+        self.assertEqual(s1.games, 6)
+        self.assertEqual((s1.games, s1.turns, s1.wins), (s2.games, s2.turns, s2.wins))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
-from catan import CatanHex, CatanEdge, CatanVertex, CatanMap, Player, Settlement
+from catan import CatanHex, CatanEdge, CatanVertex, CatanMap, CatanGame, Player, Settlement, City, Street, Dice
 from hex import Hex, Edge, Vertex, NE, E, SE, SW, W, NW
+import importlib.util
+import random
 import unittest
 
 
@@ -45,5 +47,159 @@ class TestCatanMap(unittest.TestCase):
         self.assertFalse(self.map.may_build_street(self.p1, e3))
 
 
+class TestLegalSpots(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = Player(0, "Nara", "red")
+        self.p2 = Player(1, "Lukas", "blue")
+        self.map = CatanMap()
+        self.map.init_map()
+
+    def assert_spots(self, player):
+        settlements = {v for v in self.map.catan_vertices if self.map.may_build_settlement(player, v)}
+        streets = {e for e in self.map.catan_edges if self.map.may_build_street(player, e)}
+        self.assertSetEqual(self.map.legal_settlement_spots(player), settlements)
+        self.assertSetEqual(self.map.legal_street_spots(player), streets)
+        cities = {v for v in self.map.catan_vertices if self.map.may_build_city(player, v)}
+        self.assertSetEqual(self.map.legal_city_spots(player), cities)
+
+    def test_start(self):
+        v1 = Vertex(Hex(0, 0, 0), "N")
+        self.p1.build_settlement(self.map, v1)
+        self.assertEqual(len(self.map.legal_settlement_spots(self.p2)), 50)
+        self.assertEqual(len(self.map.legal_street_spots(self.p2)), 72)
+
+    def test_incremental(self):
+        rng = random.Random(5)
+        players = [self.p1, self.p2]
+        for step in range(300):
+            if step == 20:
+                self.map.is_start = False
+            player = players[step % 2]
+            self.assert_spots(player)
+            action = rng.random()
+            vertices = [v for v in self.map.catan_vertices if self.map.catan_vertices[v].has_building()]
+            edges = [e for e in self.map.catan_edges if self.map.catan_edges[e].has_building()]
+            if action < 0.1 and vertices:
+                self.map.remove_settlement(rng.choice(vertices))
+            elif action < 0.15 and self.map.legal_city_spots(player):
+                vertex = rng.choice(sorted(self.map.legal_city_spots(player), key=repr))
+                self.map.build_settlement(City(player), vertex)
+            elif action < 0.2 and edges:
+                self.map.remove_street(rng.choice(edges))
+            elif action < 0.4 and self.map.legal_settlement_spots(player):
+                vertex = rng.choice(sorted(self.map.legal_settlement_spots(player), key=repr))
+                self.map.build_settlement(Settlement(player), vertex)
+            elif self.map.legal_street_spots(player):
+                edge = rng.choice(sorted(self.map.legal_street_spots(player), key=repr))
+                self.map.build_street(Street(player), edge)
+
+
+class TestProduction(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = Player(0, "Nara", "red")
+        self.p2 = Player(1, "Lukas", "blue")
+        self.map = CatanMap()
+        self.map.init_map()
+
+    def scan_production(self, number):
+        deltas = {}
+        for hex, catan_hex in self.map.catan_hexes.items():
+            if catan_hex.number_token != number or catan_hex.has_robber:
+                continue
+            for vertex in hex.get_adjacent_vertices():
+                if self.map.catan_vertices[vertex].has_building():
+                    building = self.map.catan_vertices[vertex].building
+                    player_deltas = deltas.setdefault(building.player.id, {})
+                    player_deltas[catan_hex.resource_type] = \
+                        player_deltas.get(catan_hex.resource_type, 0) + building.resource_factor
+        return deltas
+
+    def test_distribute(self):
+        game = CatanGame([self.p1, self.p2])
+        game.map = self.map
+        hex = next(h for h in self.map.catan_hexes if self.map.catan_hexes[h].number_token != 0)
+        catan_hex = self.map.catan_hexes[hex]
+        self.map.build_settlement(Settlement(self.p1), Vertex(hex, "N"))
+        self.map.build_settlement(City(self.p2), Vertex(hex, "S"))
+        game.distribute_resources(catan_hex.number_token)
+        self.assertGreaterEqual(self.p1.resources[catan_hex.resource_type], 1)
+        self.assertGreaterEqual(self.p2.resources[catan_hex.resource_type], 2)
+        self.map.set_robber(hex, True)
+        self.assertEqual(self.map.get_production(catan_hex.number_token), self.scan_production(catan_hex.number_token))
+
+    def test_incremental(self):
+        rng = random.Random(11)
+        hexes = list(self.map.catan_hexes)
+        vertices = list(self.map.catan_vertices)
+        for step in range(200):
+            action = rng.random()
+            vertex = rng.choice(vertices)
+            player = rng.choice([self.p1, self.p2])
+            if action < 0.2:
+                self.map.set_robber(rng.choice(hexes), rng.random() < 0.5)
+            elif action < 0.3 and self.map.catan_vertices[vertex].has_building():
+                self.map.remove_settlement(vertex)
+            elif action < 0.5 and self.map.catan_vertices[vertex].has_building():
+                self.map.build_settlement(City(self.map.catan_vertices[vertex].building.player), vertex)
+            elif not self.map.catan_vertices[vertex].has_building():
+                self.map.build_settlement(Settlement(player), vertex)
+            for number in range(2, 13):
+                self.assertEqual(self.map.get_production(number), self.scan_production(number))
+
+
+class TestRandomness(unittest.TestCase):
+
+    def test_seeded_map(self):
+        m1 = CatanMap(random.Random(1))
+        m2 = CatanMap(random.Random(1))
+        m1.init_map()
+        m2.init_map()
+        self.assertListEqual([(h.resource_type, h.number_token) for h in m1.catan_hexes.values()],
+                             [(h.resource_type, h.number_token) for h in m2.catan_hexes.values()])
+
+    def test_seeded_dice(self):
+        for block_size in (0, 16):
+            d1 = Dice(2, random.Random(2), block_size)
+            d2 = Dice(2, random.Random(2), block_size)
+            rolls = []
+            for _ in range(100):
+                d1.roll()
+                d2.roll()
+                self.assertListEqual(d1.get_dice_values(), d2.get_dice_values())
+                rolls.append(d1.get_total_value())
+            self.assertTrue(all(2 <= roll <= 12 for roll in rolls))
+            self.assertGreater(len(set(rolls)), 5)
+
+    def test_game_rng(self):
+        rng = random.Random(3)
+        game = CatanGame([Player(0, "Nara", "red")], rng=rng)
+        self.assertIs(game.map.rng, rng)
+        self.assertIs(game.dice.rng, rng)
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "requires numpy")
+    def test_numpy_dice(self):
+        import numpy
+        for block_size in (0, 64):
+            dice = Dice(2, numpy.random.default_rng(4), block_size)
+            for _ in range(100):
+                dice.roll()
+                self.assertTrue(2 <= dice.get_total_value() <= 12)
+                self.assertTrue(all(type(value) is int for value in dice.get_dice_values()))
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "requires numpy")
+    def test_numpy_game(self):
+        import numpy
+        games = [CatanGame([Player(0, "Nara", "red")], rng=numpy.random.default_rng(2)) for _ in range(2)]
+        hexes = [{hex: (h.resource_type, h.number_token) for hex, h in game.map.catan_hexes.items()}
+                 for game in games]
+        self.assertDictEqual(hexes[0], hexes[1])
+        self.assertEqual(len(hexes[0]), 19)
+        self.assertEqual(sorted(token for _, token in hexes[0].values()).count(0), 1)
+        games[0].dice.roll()
+        self.assertTrue(2 <= games[0].dice.get_total_value() <= 12)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,78 @@
+from catan import CatanMap, Player
+from catan_bitboard import BitboardCatanMap, iter_bits, to_mask
+from hex import Hex, Edge, Vertex, NE, E
+import random
+import unittest
+
+
+class TestBits(unittest.TestCase):
+
+    def test_iter_bits(self):
+        self.assertListEqual(list(iter_bits(0b101001)), [0, 3, 5])
+        self.assertListEqual(list(iter_bits(1 << 100)), [100])
+        self.assertEqual(to_mask([0, 3, 5]), 0b101001)
+
+
+class TestBitboardCatanMap(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = Player(0, "Nara", "red")
+        self.p2 = Player(1, "Lukas", "blue")
+        self.map = BitboardCatanMap()
+        self.map.init_map()
+
+    def test_masks(self):
+        t = self.map.topology
+        v1 = Vertex(Hex(0, 0, 0), "N")
+        e1 = Edge(Hex(0, 0, 0), NE)
+        self.p1.build_settlement(self.map, v1)
+        self.p1.build_street(self.map, e1)
+        self.assertEqual(self.map.settlement_masks[0], 1 << t.vertex_ids[v1])
+        self.assertEqual(self.map.street_masks[0], 1 << t.edge_ids[e1])
+        self.assertEqual(bin(self.map.legal_settlement_mask(0)).count("1"), 50)
+        self.map.is_start = False
+        self.assertEqual(self.map.legal_settlement_mask(0), 0)
+        self.assertEqual(bin(self.map.legal_street_mask(0)).count("1"), 4)
+        self.p1.build_street(self.map, Edge(Hex(0, 0, 0), E))
+        self.assertEqual(self.map.legal_settlement_mask(0), 1 << t.vertex_ids[Vertex(Hex(0, 0, 0), "SE")])
+        self.assertEqual(self.map.legal_settlement_mask(1), 0)
+
+    def test_matches_catan_map(self):
+        rng = random.Random(7)
+        reference = CatanMap()
+        reference.init_map()
+        t = self.map.topology
+        players = [self.p1, self.p2]
+        for step in range(200):
+            if step == 20:
+                reference.is_start = self.map.is_start = False
+            player = players[step % 2]
+            settlements = to_mask(t.vertex_ids[v] for v in t.vertices
+                                  if reference.may_build_settlement(player, v))
+            streets = to_mask(t.edge_ids[e] for e in t.edges
+                              if reference.may_build_street(player, e))
+            self.assertEqual(settlements, self.map.legal_settlement_mask(player.id))
+            self.assertEqual(streets, self.map.legal_street_mask(player.id))
+            action = rng.random()
+            built_vertices = list(iter_bits(self.map.occupied_vertices))
+            built_edges = list(iter_bits(self.map.occupied_edges))
+            if action < 0.05 and built_vertices:
+                vertex = t.vertices[rng.choice(built_vertices)]
+                reference.remove_settlement(vertex)
+                self.map.remove_settlement(vertex)
+            elif action < 0.1 and built_edges:
+                edge = t.edges[rng.choice(built_edges)]
+                reference.remove_street(edge)
+                self.map.remove_street(edge)
+            elif action < 0.3 and settlements:
+                vertex = t.vertices[rng.choice(list(iter_bits(settlements)))]
+                reference.build_settlement(player.settlements[0], vertex)
+                self.map.build_settlement(player.settlements[0], vertex)
+            elif streets:
+                edge = t.edges[rng.choice(list(iter_bits(streets)))]
+                reference.build_street(player.streets[0], edge)
+                self.map.build_street(player.streets[0], edge)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+from catan import CatanMap, CatanGame, Player
+from catan_indexed import IndexedCatanMap, NO_PLAYER
+from hex import Hex, Edge, Vertex, NE, E
+import random
+import timeit
+import unittest
+
+
+class TestIndexedCatanMap(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = Player(0, "Nara", "red")
+        self.p2 = Player(1, "Lukas", "blue")
+        self.map = IndexedCatanMap()
+        self.map.init_map()
+
+    def test_build(self):
+        v1 = Vertex(Hex(0, 0, 0), "N")
+        e1 = Edge(Hex(0, 0, 0), NE)
+        self.p1.build_settlement(self.map, v1)
+        self.p1.build_street(self.map, e1)
+        self.assertEqual(self.map.vertex_owner[self.map.topology.vertex_ids[v1]], 0)
+        self.assertEqual(self.map.vertex_level[self.map.topology.vertex_ids[v1]], 1)
+        self.assertEqual(self.map.edge_owner[self.map.topology.edge_ids[e1]], 0)
+        self.assertTrue(self.map.catan_vertices[v1].has_building(self.p1))
+        self.assertEqual(self.map.edge_owner[self.map.topology.edge_ids[Edge(Hex(0, 0, 0), E)]],
+                         NO_PLAYER)
+
+    def test_robber(self):
+        self.map.set_robber(Hex(1, -1, 0), True)
+        self.assertEqual(self.map.hex_robber[self.map.topology.hex_ids[Hex(1, -1, 0)]], 1)
+        self.assertTrue(self.map.catan_hexes[Hex(1, -1, 0)].has_robber)
+
+    def test_off_board(self):
+        self.assertFalse(self.map.may_build_settlement(self.p1, Vertex(Hex(5, 0, -5), "N")))
+        self.assertFalse(self.map.may_build_street(self.p1, Edge(Hex(5, 0, -5), E)))
+
+    def test_matches_catan_map(self):
+        rng = random.Random(3)
+        reference = CatanMap()
+        reference.init_map()
+        players = [self.p1, self.p2]
+        vertices = list(reference.catan_vertices)
+        edges = list(reference.catan_edges)
+        for step in range(200):
+            if step == 20:
+                reference.is_start = self.map.is_start = False
+            player = players[step % 2]
+            for vertex in vertices:
+                self.assertEqual(reference.may_build_settlement(player, vertex),
+                                 self.map.may_build_settlement(player, vertex))
+            for edge in edges:
+                self.assertEqual(reference.may_build_street(player, edge),
+                                 self.map.may_build_street(player, edge))
+            action = rng.random()
+            built_vertices = [v for v in vertices if reference.catan_vertices[v].has_building()]
+            built_edges = [e for e in edges if reference.catan_edges[e].has_building()]
+            if action < 0.05 and built_vertices:
+                vertex = rng.choice(built_vertices)
+                reference.remove_settlement(vertex)
+                self.map.remove_settlement(vertex)
+            elif action < 0.1 and built_edges:
+                edge = rng.choice(built_edges)
+                reference.remove_street(edge)
+                self.map.remove_street(edge)
+            elif action < 0.3:
+                vertex = rng.choice(vertices)
+                if reference.may_build_settlement(player, vertex):
+                    settlement = player.settlements[0]
+                    reference.build_settlement(settlement, vertex)
+                    self.map.build_settlement(settlement, vertex)
+            else:
+                edge = rng.choice(edges)
+                if reference.may_build_street(player, edge):
+                    street = player.streets[0]
+                    reference.build_street(street, edge)
+                    self.map.build_street(street, edge)
+
+    def test_faster_checks(self):
+        # About 3x on a mid-game board, see benchmarks/catan_maps.py
+        reference = CatanMap()
+        reference.init_map()
+        for map in (reference, self.map):
+            for q in (-1, 1):
+                hex = Hex(q, 0, -q)
+                map.build_settlement(self.p1.settlements[0], Vertex(hex, "N"))
+                map.build_street(self.p1.streets[0], Edge(hex, NE))
+                map.build_street(self.p2.streets[0], Edge(hex, E))
+            map.is_start = False
+
+        def check_all(map):
+            for player in (self.p1, self.p2):
+                for vertex in map.topology.vertices:
+                    map.may_build_settlement(player, vertex)
+                for edge in map.topology.edges:
+                    map.may_build_street(player, edge)
+
+        seconds = [min(timeit.repeat(lambda: check_all(map), number=20, repeat=5))
+                   for map in (reference, self.map)]
+        self.assertLess(seconds[1], seconds[0])
+
+    def test_game_map_class(self):
+        game = CatanGame([self.p1, self.p2], IndexedCatanMap)
+        self.assertIsInstance(game.map, IndexedCatanMap)
+
+
+if __name__ == "__main__":
+    unittest.main()
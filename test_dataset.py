@@ -0,0 +1,66 @@
+from dataset import Dataset, DatasetWriter, RecordLayout, HEADER
+from fixtures import random_simulator, set_up_game
+import os
+import snapshot
+import tempfile
+import unittest
+
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "positions.catd")
+        simulator = random_simulator()
+        self.games = [set_up_game(simulator, seed) for seed in range(5)]
+
+    def test_write_read(self):
+        with DatasetWriter(self.path) as writer:
+            for game in self.games[:3]:
+                writer.write(game)
+        with DatasetWriter(self.path) as writer:
+            for game in self.games[3:]:
+                writer.write(game)
+            with self.assertRaises(ValueError):
+                writer.write_snapshot(b"\0" * 10)
+        with Dataset(self.path) as dataset:
+            self.assertEqual(len(dataset), 5)
+            self.assertEqual(dataset.layout, RecordLayout(3, 19, 54, 72))
+            self.assertEqual(dataset.layout.record_size, dataset.record_size)
+            for i, game in enumerate(self.games):
+                record = dataset[i]
+                self.assertEqual(bytes(record), snapshot.encode(game))
+                record.release()
+            self.assertEqual(dataset.snapshot(-1).vertices, snapshot.read(snapshot.encode(self.games[-1])).vertices)
+            self.assertEqual(dataset.game(2).state_hash(), self.games[2].state_hash())
+            with self.assertRaises(IndexError):
+                dataset[5]
+            chunks = [bytes(chunk) for chunk in dataset.chunks(2)]
+            self.assertListEqual([len(chunk) // dataset.record_size for chunk in chunks], [2, 2, 1])
+            self.assertEqual(b"".join(chunks), b"".join(snapshot.encode(game) for game in self.games))
+
+    def test_partial_record(self):
+        with DatasetWriter(self.path) as writer:
+            writer.write(self.games[0])
+            writer.file.write(b"\0" * 10)
+        with Dataset(self.path) as dataset:
+            self.assertEqual(len(dataset), 1)
+        # Appending drops the partial record
+        with DatasetWriter(self.path) as writer:
+            writer.write(self.games[1])
+            writer.write(self.games[2])
+        with Dataset(self.path) as dataset:
+            self.assertEqual(len(dataset), 3)
+            for i in range(3):
+                self.assertEqual(dataset.snapshot(i), snapshot.read(snapshot.encode(self.games[i])))
+
+    def test_invalid(self):
+        with open(self.path, "wb") as f:
+            f.write(b"XXXX" + bytes(HEADER.size))
+        with self.assertRaises(ValueError):
+            Dataset(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+from dataset import DatasetWriter
+from fixtures import random_simulator, set_up_game
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from dataset_numpy import open_records, iter_records, ownership_planes, street_planes, production_pips
+except ImportError:
+    np = None
+
+PIPS = {0: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 8: 5, 9: 4, 10: 3, 11: 2, 12: 1}
+
+
+@unittest.skipIf(np is None, "requires numpy")
+class TestDatasetNumpy(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "positions.catd")
+        simulator = random_simulator()
+        self.games = []
+        with DatasetWriter(self.path) as writer:
+            for seed in range(7):
+                game = set_up_game(simulator, seed)
+                if seed % 2:
+                    game.map.move_robber(next(iter(game.map.catan_hexes)))
+                writer.write(game)
+                self.games.append(game)
+
+    def test_records(self):
+        records = open_records(self.path)
+        self.assertEqual(records.shape[0], 7)
+        self.assertListEqual([len(chunk) for chunk in iter_records(self.path, 3)], [3, 3, 1])
+
+    def test_features(self):
+        records = open_records(self.path)
+        ownership = ownership_planes(records)
+        streets = street_planes(records)
+        for i, game in enumerate(self.games):
+            topology = game.map.topology
+            pips = production_pips(records[i:i + 1], topology)[0]
+            for v, vertex in enumerate(topology.vertices):
+                catan_vertex = game.map.catan_vertices[vertex]
+                for player in game.players:
+                    level = catan_vertex.building.resource_factor if catan_vertex.has_building(player) else 0
+                    self.assertEqual(ownership[i, player.id, v], level)
+                expected = sum(PIPS[game.map.catan_hexes[topology.hexes[h]].number_token]
+                               for h in topology.vertex_hexes[v] if topology.hexes[h] != game.map.robber)
+                self.assertEqual(pips[v], expected)
+            for e, edge in enumerate(topology.edges):
+                for player in game.players:
+                    self.assertEqual(streets[i, player.id, e], game.map.catan_edges[edge].has_building(player))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+from catan import State
+from catan_constants import ResourceType, STREET_COST
+from events import Event, EventType, GameHistory, pack_event, unpack_event
+from fixtures import set_up_game
+import random
+import snapshot
+import unittest
+
+
+class TestEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.game = set_up_game()
+        self.history = GameHistory(self.game, checkpoint_interval=8)
+        self.rng = random.Random(0)
+
+    def play(self, num_turns):
+        """Plays random turns through the history."""
+        game = self.game
+        map = game.map
+        for _ in range(num_turns):
+            player = game.current_player
+            number = self.rng.randint(1, 6) + self.rng.randint(1, 6)
+            self.history.roll(number)
+            if number == 7:
+                self.history.move_robber(self.rng.choice([h for h in map.catan_hexes if h != map.robber]))
+            self.history.gain(player, ResourceType.BRICK, 2)
+            self.history.gain(player, ResourceType.LUMBER, 2)
+            streets = sorted(map.legal_street_spots(player), key=map.topology.edge_ids.get)
+            if streets:
+                self.history.build_street(player, self.rng.choice(streets), pay=True)
+            settlements = sorted(map.legal_settlement_spots(player), key=map.topology.vertex_ids.get)
+            if settlements:
+                self.history.build_settlement(player, self.rng.choice(settlements))
+            cities = sorted((v for v, catan_vertex in map.catan_vertices.items()
+                             if map.may_build_city(player, v)), key=map.topology.vertex_ids.get)
+            if cities and player.citys:
+                self.history.build_city(player, cities[0])
+            self.history.trade(player, game.players[(player.id + 1) % 3],
+                               {ResourceType.BRICK: 1}, {ResourceType.WOOL: 0})
+            self.history.draw_card(player)
+            self.history.end_turn()
+
+    def test_pack(self):
+        for event in (Event(EventType.GAIN, 3, ResourceType.ORE.value, -5),
+                      Event(EventType.ROBBER, 0, 18, -1), Event(EventType.STREET, 255, 71, 0)):
+            self.assertEqual(unpack_event(pack_event(*event)), event)
+
+    def test_undo(self):
+        states = []
+        marks = []
+        for _ in range(12):
+            states.append(snapshot.encode(self.game))
+            marks.append(len(self.history))
+            self.play(1)
+        hash_before = self.game.state_hash()
+        self.assertNotEqual(snapshot.encode(self.game), states[0])
+        for state, mark in reversed(list(zip(states, marks))):
+            self.history.undo_to(mark)
+            self.assertEqual(snapshot.encode(self.game), state)
+        self.assertEqual(len(self.history), 0)
+        self.assertListEqual(list(self.history.log.checkpoints), [0])
+        self.rng = random.Random(0)
+        self.play(12)
+        self.assertEqual(self.game.state_hash(), hash_before)
+
+    def test_replay(self):
+        events = []
+        self.history.subscribe(lambda event, undone: events.append((event, undone)))
+        states = {}
+        for _ in range(10):
+            states[len(self.history)] = snapshot.encode(self.game)
+            self.play(1)
+        self.assertEqual(len(events), len(self.history))
+        self.assertGreater(len(self.history.log.checkpoints), 2)
+        for index, state in states.items():
+            self.assertEqual(snapshot.encode(self.history.log.replay(index)), state)
+        game = self.history.log.replay()
+        self.assertEqual(game.state_hash(), self.game.state_hash())
+        self.history.undo(3)
+        self.assertListEqual([undone for _, undone in events[-3:]], [True] * 3)
+
+    def test_replay_without_interval(self):
+        self.history = GameHistory(self.game, checkpoint_interval=0)
+        state = snapshot.encode(self.game)
+        self.play(5)
+        mark = len(self.history)
+        middle = snapshot.encode(self.game)
+        self.play(5)
+        self.assertListEqual(list(self.history.log.checkpoints), [0])
+        self.assertEqual(snapshot.encode(self.history.log.replay(0)), state)
+        self.assertEqual(snapshot.encode(self.history.log.replay(mark)), middle)
+        self.assertEqual(self.history.log.replay().state_hash(), self.game.state_hash())
+
+    def test_costs(self):
+        player = self.game.current_player
+        before = dict(player.resources)
+        mark = len(self.history)
+        self.history.pay(player, STREET_COST)
+        self.assertEqual(player.resources[ResourceType.BRICK], before[ResourceType.BRICK] - 1)
+        self.history.undo_to(mark)
+        self.assertDictEqual(player.resources, before)
+
+    def test_state(self):
+        game = self.game
+        game.state = State.GAME_START
+        game.map.is_start = True
+        self.history.set_state(State.ROUND)
+        self.assertEqual(game.state, State.ROUND)
+        self.assertFalse(game.map.is_start)
+        self.history.undo()
+        self.assertEqual(game.state, State.GAME_START)
+        self.assertTrue(game.map.is_start)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+from catan_bitboard import iter_bits
+from catan_constants import ResourceType, STREET_COST
+from events import GameHistory
+from game_state import Board, GameState
+from fixtures import set_up_game
+import random
+import snapshot
+import unittest
+
+
+class TestGameState(unittest.TestCase):
+
+    def setUp(self):
+        self.game = set_up_game()
+        self.state = GameState.from_game(self.game)
+
+    def assert_same(self, state, game):
+        self.assertEqual(state.encode(), snapshot.encode(game))
+        self.assertEqual(state.state_hash(), game.state_hash())
+        t = game.map.topology
+        for player in game.players:
+            self.assertSetEqual({t.vertices[v] for v in iter_bits(state.legal_settlements(player.id))},
+                                game.map.legal_settlement_spots(player))
+            self.assertSetEqual({t.edges[e] for e in iter_bits(state.legal_streets(player.id))},
+                                game.map.legal_street_spots(player))
+
+    def test_from_game(self):
+        self.assert_same(self.state, self.game)
+
+    def test_matches_game(self):
+        # Play the same random moves on the game, through its history, and on the state
+        history = GameHistory(self.game, checkpoint_interval=0)
+        state = self.state
+        rng = random.Random(1)
+        t = self.game.map.topology
+        for _ in range(60):
+            player = self.game.current_player
+            number = rng.randint(2, 12)
+            history.roll(number)
+            state.roll(number)
+            if number == 7:
+                hex_id = rng.randrange(t.num_hexes)
+                history.move_robber(t.hexes[hex_id])
+                state.move_robber(hex_id)
+            history.gain(player, ResourceType.GRAIN)
+            state.gain(player.id, ResourceType.GRAIN.value - 1, 1)
+            streets = list(iter_bits(state.legal_streets(player.id)))
+            if streets and state.can_afford(player.id, STREET_COST):
+                e = rng.choice(streets)
+                history.build_street(player, t.edges[e], pay=True)
+                state.build_street(player.id, e, pay=True)
+            settlements = list(iter_bits(state.legal_settlements(player.id)))
+            if settlements:
+                v = rng.choice(settlements)
+                history.build_settlement(player, t.vertices[v])
+                state.build_settlement(player.id, v)
+            cities = list(iter_bits(state.legal_cities(player.id)))
+            if cities and rng.random() < 0.3:
+                history.build_city(player, t.vertices[cities[0]])
+                state.build_city(player.id, cities[0])
+            if rng.random() < 0.1:
+                history.draw_card(player)
+                state.draw_card(player.id)
+            history.end_turn()
+            state.end_turn()
+            self.assert_same(state, self.game)
+
+    def test_fork(self):
+        parent = self.state
+        before = parent.encode()
+        child = parent.fork()
+        grandchild = child.fork()
+        player_id = parent.current_player
+        e = next(iter_bits(parent.legal_streets(player_id)))
+        child.build_street(player_id, e)
+        child.roll(6)
+        child.roll(8)
+        child.draw_card(player_id)
+        self.assertEqual(parent.encode(), before)
+        self.assertEqual(grandchild.encode(), before)
+        self.assertNotEqual(child.encode(), before)
+        self.assertFalse(child.legal_streets(player_id) >> e & 1)
+        # Writes of the parent do not reach the forks taken before them
+        parent.build_street(player_id, e)
+        self.assertNotEqual(parent.encode(), before)
+        self.assertEqual(grandchild.encode(), before)
+        self.assertTrue(grandchild.legal_streets(player_id) >> e & 1)
+
+    def test_board_shared(self):
+        board = Board(self.game)
+        a = GameState.from_game(self.game, board)
+        b = a.fork()
+        self.assertIs(a.board, b.board)
+
+
+if __name__ == "__main__":
+    unittest.main()
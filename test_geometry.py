@@ -0,0 +1,37 @@
+from geometry import get_geometry
+from hex import Point, Hex, Edge, Vertex, Layout, E, ORIENTATION_FLAT, ORIENTATION_POINTY
+import unittest
+
+
+class TestLayoutGeometry(unittest.TestCase):
+
+    def setUp(self):
+        self.l1 = Layout(ORIENTATION_POINTY, Point(20, 30), Point(0, 0))
+        self.l2 = Layout(ORIENTATION_FLAT, Point(50, 100), Point(100, 60))
+
+    def test_positions(self):
+        h1 = Hex(1, -2, 1)
+        v1 = Vertex(h1, "S")
+        e1 = Edge(h1, E)
+        for layout in (self.l1, self.l2):
+            geometry = get_geometry(layout)
+            self.assertEqual(geometry.hex_center(h1), h1.to_point(layout).to_tuple())
+            for corner, expected in zip(geometry.hex_polygon(h1), h1.get_all_polygon_corners(layout)):
+                self.assertAlmostEqual(corner[0], expected[0])
+                self.assertAlmostEqual(corner[1], expected[1])
+            self.assertEqual(geometry.vertex_point(v1), v1.to_point(layout).to_tuple())
+            center = e1.to_point(layout)
+            self.assertAlmostEqual(geometry.edge_center(e1)[0], center.x)
+            self.assertAlmostEqual(geometry.edge_center(e1)[1], center.y)
+
+    def test_cache(self):
+        geometry = get_geometry(self.l1)
+        self.assertIs(get_geometry(Layout(ORIENTATION_POINTY, Point(20, 30), Point(0, 0))), geometry)
+        self.assertIs(geometry.hex_polygon(Hex(0, 0, 0)), geometry.hex_polygon(Hex(0, 0, 0)))
+        panned = get_geometry(Layout(ORIENTATION_POINTY, Point(20, 30), Point(5, 0)))
+        self.assertIsNot(panned, geometry)
+        self.assertEqual(panned.hex_center(Hex(0, 0, 0)), (5, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 from hex import Point, Hex, Edge, Vertex, Layout, NE, NW, W, SW, SE, E, \
-                HEX_DIRECTIONS, ORIENTATION_FLAT, ORIENTATION_POINTY
+                HEX_DIRECTIONS, ORIENTATION_FLAT, ORIENTATION_POINTY, intersect_ranges
+from dataclasses import FrozenInstanceError
+import gc
 import math
+import pickle
 import unittest
 
 class TestHexInit(unittest.TestCase):
@@ -9,6 +12,54 @@ class TestHexInit(unittest.TestCase):
         self.assertRaises(AssertionError, Hex, 3, 2, -1)
 
 
+class TestInterning(unittest.TestCase):
+
+    def test_hex_identity(self):
+        self.assertIs(Hex(1, -1, 0), NE)
+        self.assertIs(Hex(0, 0, 0) + E, E)
+        self.assertIs(pickle.loads(pickle.dumps(Hex(2, -1, -1))), Hex(2, -1, -1))
+
+    def test_edge_identity(self):
+        self.assertIs(Edge(Hex(0, 0, 0), NE), Edge(Hex(1, -1, 0), SW))
+        self.assertIs(Edge(Hex(-2, 0, 2), W), Edge(Hex(-3, 0, 3), E))
+
+    def test_vertex_identity(self):
+        self.assertIs(Vertex(Hex(0, 0, 0), "NW"), Vertex(Hex(0, -1, 1), "S"))
+        self.assertRaises(AssertionError, Vertex, Hex(0, 0, 0), "X")
+
+    def test_frozen(self):
+        with self.assertRaises(FrozenInstanceError):
+            Hex(0, 0, 0).q = 1
+        with self.assertRaises(FrozenInstanceError):
+            Edge(Hex(0, 0, 0), E).h = NE
+        with self.assertRaises(FrozenInstanceError):
+            Vertex(Hex(0, 0, 0), "N").direction = "S"
+
+    def test_released(self):
+        # Far away coordinates that nothing else references
+        v1 = Vertex(Hex(90, -50, -40), "NE")
+        v1.get_adjacent_edges()
+        self.assertIs(Vertex(Hex(91, -51, -40), "S"), v1)
+        del v1
+        gc.collect()
+        self.assertNotIn((91, -51, "S"), Vertex._cache)
+        self.assertNotIn((90, -50, "NE"), Vertex._cache)
+        self.assertNotIn((90, -50, -40), Hex._cache)
+        self.assertFalse(any(key[0] >= 89 for key in Edge._cache.keys()))
+
+    def test_adjacency_is_memoized(self):
+        e1 = Edge(Hex(0, 0, 0), E)
+        v1 = Vertex(Hex(0, 0, 0), "N")
+        self.assertIs(e1.get_adjacent_edges(), e1.get_adjacent_edges())
+        self.assertIs(e1.get_adjacent_vertices(), e1.get_adjacent_vertices())
+        self.assertIs(v1.get_adjacent_edges(), v1.get_adjacent_edges())
+        self.assertIs(v1.get_adjacent_vertices(), v1.get_adjacent_vertices())
+
+    def test_hash(self):
+        self.assertEqual(hash(Hex(1, 0, -1)), hash((1, 0, -1)))
+        self.assertEqual(len({Edge(Hex(0, 0, 0), E), Edge(Hex(1, 0, -1), W)}), 1)
+
+
 class TestHexArithmetic(unittest.TestCase):
 
     def setUp(self):
@@ -73,6 +124,47 @@ class TestHexNeighbors(unittest.TestCase):
         self.assertListEqual(self.h1.get_common_neighbors(self.h3), [Hex(1, -1, 0), self.h2])
 
 
+class TestHexRanges(unittest.TestCase):
+
+    def setUp(self):
+        self.h1 = Hex(0, 0, 0)
+        self.h2 = Hex(2, -1, -1)
+
+    def test_hexes_in_range(self):
+        hexes = list(self.h2.hexes_in_range(2))
+        self.assertEqual(len(hexes), 19)
+        self.assertEqual(len(set(hexes)), 19)
+        self.assertTrue(all(self.h2.distance_to(h) <= 2 for h in hexes))
+        self.assertListEqual(list(self.h1.hexes_in_range(0)), [self.h1])
+
+    def test_ring(self):
+        self.assertListEqual(list(self.h1.ring(1)), [W, NW, NE, E, SE, SW])
+        ring = list(self.h2.ring(3))
+        self.assertEqual(len(ring), 18)
+        self.assertTrue(all(self.h2.distance_to(h) == 3 for h in ring))
+        for a, b in zip(ring, ring[1:] + ring[:1]):
+            self.assertTrue(a.is_neighbor(b))
+
+    def test_spiral(self):
+        spiral = list(self.h2.spiral(2))
+        self.assertEqual(spiral[0], self.h2)
+        self.assertSetEqual(set(spiral), set(self.h2.hexes_in_range(2)))
+
+    def test_intersect_ranges(self):
+        hexes = set(intersect_ranges((self.h1, 2), (self.h2, 1)))
+        expected = {h for h in self.h1.hexes_in_range(2) if self.h2.distance_to(h) <= 1}
+        self.assertSetEqual(hexes, expected)
+        self.assertListEqual(list(intersect_ranges((self.h1, 1), (Hex(5, 0, -5), 1))), [])
+
+    def test_line_to(self):
+        self.assertListEqual(list(self.h1.line_to(self.h1)), [self.h1])
+        self.assertListEqual(list(self.h1.line_to(Hex(2, 0, -2))), [self.h1, E, Hex(2, 0, -2)])
+        line = list(Hex(-3, 1, 2).line_to(Hex(2, -2, 0)))
+        self.assertEqual(len(line), 6)
+        for a, b in zip(line, line[1:]):
+            self.assertTrue(a.is_neighbor(b))
+
+
 class testHexDrawing(unittest.TestCase):
 
     def setUp(self):
@@ -221,6 +313,7 @@ class TestVertex(unittest.TestCase):
         self.assertEqual(v1.distance_to(v3), 7)
         self.assertEqual(v1.distance_to(v4), 4)
         self.assertEqual(v2.distance_to(v3), 4)
+        self.assertEqual(Vertex(Hex(0, 0, 0), "N").distance_to(Vertex(Hex(1, -2, 1), "S")), 1)
 
     def test_to_point(self):
         v1 = Vertex(Hex(0, 0, 0), "N")
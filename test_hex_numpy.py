@@ -0,0 +1,60 @@
+from hex import Point, Hex, Layout, ORIENTATION_FLAT, ORIENTATION_POINTY
+import random
+import unittest
+
+try:
+    import numpy as np
+    from hex_numpy import points_to_fractional_hexes, points_to_hexes, hexes_to_points, \
+                          round_hexes, to_array, from_array, range_array, ring_array, \
+                          spiral_array, line_array
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "requires numpy")
+class TestHexNumpy(unittest.TestCase):
+
+    def setUp(self):
+        self.layouts = [Layout(ORIENTATION_POINTY, Point(20, 30), Point(0, 0)),
+                        Layout(ORIENTATION_FLAT, Point(50, 100), Point(100, 60))]
+        rng = random.Random(0)
+        self.points = [Point(rng.uniform(-500, 500), rng.uniform(-500, 500)) for _ in range(500)]
+
+    def test_points_to_hexes(self):
+        for layout in self.layouts:
+            array = np.array([p.to_tuple() for p in self.points])
+            fractional = points_to_fractional_hexes(layout, array)
+            hexes = from_array(points_to_hexes(layout, array))
+            for point, hex, row in zip(self.points, hexes, fractional):
+                f = point.to_fractional_hex(layout)
+                self.assertAlmostEqual(f.q, row[0])
+                self.assertAlmostEqual(f.r, row[1])
+                self.assertEqual(point.to_hex(layout), hex)
+
+    def test_hexes_to_points(self):
+        hexes = [Hex(q, r, -q - r) for q in range(-3, 4) for r in range(-3, 4)]
+        for layout in self.layouts:
+            points = hexes_to_points(layout, to_array(hexes))
+            for hex, (x, y) in zip(hexes, points):
+                p = hex.to_point(layout)
+                self.assertAlmostEqual(p.x, x)
+                self.assertAlmostEqual(p.y, y)
+
+    def test_round_trip(self):
+        hexes = to_array(Hex(q, r, -q - r) for q in range(-10, 11) for r in range(-10, 11))
+        for layout in self.layouts:
+            self.assertTrue((points_to_hexes(layout, hexes_to_points(layout, hexes)) == hexes).all())
+        self.assertTrue((round_hexes(hexes.astype(float)) == hexes).all())
+
+    def test_generators(self):
+        center = Hex(2, -1, -1)
+        for radius in range(4):
+            self.assertListEqual(from_array(range_array(center, radius)), list(center.hexes_in_range(radius)))
+            self.assertListEqual(from_array(ring_array(center, radius)), list(center.ring(radius)))
+            self.assertListEqual(from_array(spiral_array(center, radius)), list(center.spiral(radius)))
+        for target in Hex(0, 0, 0).hexes_in_range(4):
+            self.assertListEqual(from_array(line_array(center, target)), list(center.line_to(target)))
+
+
+if __name__ == "__main__":
+    unittest.main()
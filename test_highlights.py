@@ -0,0 +1,67 @@
+from catan import State
+from catan_constants import ResourceType
+from events import GameHistory
+from fixtures import set_up_game
+from geometry import get_geometry
+from highlights import LegalMoveCache
+from hex import Point, Layout, ORIENTATION_POINTY
+import random
+import unittest
+
+
+class TestLegalMoveCache(unittest.TestCase):
+
+    def setUp(self):
+        self.game = set_up_game()
+        self.history = GameHistory(self.game)
+        self.layout = Layout(ORIENTATION_POINTY, Point(50, 50), Point(400, 300))
+        self.cache = LegalMoveCache(self.history, self.layout)
+
+    def check(self):
+        map = self.game.map
+        geometry = get_geometry(self.layout)
+        for player in self.game.players:
+            self.assertEqual(self.cache.settlement_spots(player),
+                             {v: geometry.vertex_point(v) for v in map.legal_settlement_spots(player)})
+            self.assertEqual(self.cache.street_spots(player),
+                             {e: geometry.edge_line(e) for e in map.legal_street_spots(player)})
+
+    def test_cached(self):
+        player = self.game.players[0]
+        spots = self.cache.street_spots(player)
+        self.history.gain(player, ResourceType.ORE)
+        self.history.end_turn()
+        self.assertIs(self.cache.street_spots(player), spots)
+
+    def test_start_phase(self):
+        game = self.game
+        game.state = State.GAME_START
+        game.map.is_start = True
+        self.cache.invalidate()
+        self.check()
+        self.history.set_state(State.ROUND)
+        self.check()
+        self.history.undo()
+        self.check()
+
+    def test_invalidated(self):
+        rng = random.Random(0)
+        map = self.game.map
+        for _ in range(20):
+            self.check()
+            player = self.game.current_player
+            streets = sorted(map.legal_street_spots(player), key=map.topology.edge_ids.get)
+            if streets and player.streets:
+                self.history.build_street(player, rng.choice(streets))
+            self.check()
+            settlements = sorted(map.legal_settlement_spots(player), key=map.topology.vertex_ids.get)
+            if settlements and player.settlements:
+                self.history.build_settlement(player, rng.choice(settlements))
+            self.history.end_turn()
+        while len(self.history):
+            self.history.undo()
+            self.check()
+
+
+if __name__ == "__main__":
+    unittest.main()
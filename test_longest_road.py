@@ -0,0 +1,97 @@
+from catan import CatanMap, Player
+from hex import Hex, Edge, NE, E, SE, SW, W, NW
+from longest_road import LongestRoad
+import random
+import unittest
+
+
+class TestLongestRoad(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = Player(0, "Nara", "red")
+        self.p2 = Player(1, "Lukas", "blue")
+        self.map = CatanMap()
+        self.map.init_map()
+        self.center = Hex(0, 0, 0)
+
+    def shared_vertex(self, a, b):
+        vertices = set(a.get_adjacent_vertices()) & set(b.get_adjacent_vertices())
+        self.assertEqual(len(vertices), 1)
+        return vertices.pop()
+
+    def test_path_and_cycle(self):
+        self.assertEqual(self.map.longest_road(self.p1), 0)
+        edges = [Edge(self.center, d) for d in (NE, E, SE, SW, W)]
+        for i, edge in enumerate(edges):
+            self.p1.build_street(self.map, edge)
+            self.assertEqual(self.map.longest_road(self.p1), i + 1)
+        self.p1.build_street(self.map, Edge(self.center, NW))
+        self.assertEqual(self.map.longest_road(self.p1), 6)
+        self.assertEqual(self.map.longest_road(self.p2), 0)
+
+    def test_settlement_breaks_road(self):
+        edges = [Edge(self.center, d) for d in (NE, E, SE, SW, W)]
+        for edge in edges:
+            self.p1.build_street(self.map, edge)
+        vertex = self.shared_vertex(edges[1], edges[2])
+        self.p1.build_settlement(self.map, vertex)
+        self.assertEqual(self.map.longest_road(self.p1), 5)
+        self.map.remove_settlement(vertex)
+        self.p2.build_settlement(self.map, vertex)
+        self.assertEqual(self.map.longest_road(self.p1), 3)
+        self.assertEqual(len(self.map.roads.player_components[self.p1.id]), 2)
+        self.map.remove_settlement(vertex)
+        self.assertEqual(self.map.longest_road(self.p1), 5)
+        self.map.remove_street(edges[2])
+        self.assertEqual(self.map.longest_road(self.p1), 2)
+
+    def test_unblocked_ring(self):
+        # A ring with a branch, cut by a settlement of another player that is
+        # then removed again, e.g. by an undo
+        for d in (NE, E, SE, SW, W, NW):
+            self.p1.build_street(self.map, Edge(self.center, d))
+        top = self.shared_vertex(Edge(self.center, NE), Edge(self.center, NW))
+        branch = next(e for e in top.get_adjacent_edges()
+                      if e not in (Edge(self.center, NE), Edge(self.center, NW)))
+        self.p1.build_street(self.map, branch)
+        vertex = self.shared_vertex(Edge(self.center, SE), Edge(self.center, SW))
+        self.assertEqual(self.map.longest_road(self.p1), 7)
+        self.p2.build_settlement(self.map, vertex)
+        self.assertEqual(self.map.longest_road(self.p1), 6)
+        self.map.remove_settlement(vertex)
+        self.assertEqual(self.map.longest_road(self.p1), 7)
+
+    def test_branches(self):
+        # Three streets meeting at one vertex only count two of them
+        edges = [Edge(self.center, NE), Edge(self.center, E)]
+        vertex = self.shared_vertex(*edges)
+        third = next(e for e in vertex.get_adjacent_edges() if e not in edges)
+        for edge in (*edges, third):
+            self.p1.build_street(self.map, edge)
+        self.assertEqual(self.map.longest_road(self.p1), 2)
+
+    def test_matches_full_search(self):
+        rng = random.Random(0)
+        topology = self.map.topology
+        roads = LongestRoad(topology)
+        for _ in range(400):
+            if roads.edge_owner and rng.random() < 0.1:
+                roads.remove_street(rng.choice(sorted(roads.edge_owner)))
+            elif roads.vertex_owner and rng.random() < 0.05:
+                roads.remove_settlement(rng.choice(sorted(roads.vertex_owner)))
+            elif rng.random() < 0.2:
+                v = rng.randrange(topology.num_vertices)
+                if v not in roads.vertex_owner:
+                    roads.add_settlement(rng.randrange(3), v)
+            else:
+                p = rng.randrange(3)
+                e = rng.randrange(topology.num_edges)
+                if e not in roads.edge_owner and sum(o == p for o in roads.edge_owner.values()) < 15:
+                    roads.add_street(p, e)
+            for p in range(3):
+                edges = {e for e, owner in roads.edge_owner.items() if owner == p}
+                self.assertEqual(roads.length(p), roads._longest_trail(p, edges))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+from catan_constants import ResourceType
+from game_state import GameState
+from mcts import MCTSAgent, MCTSSearch, legal_actions, END_TURN
+from fixtures import random_simulator, set_up_game
+from simulator import Simulator, RandomAgent, ActionType
+import random
+import unittest
+
+
+class TestMCTS(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = random_simulator()
+        self.game = set_up_game(self.simulator)
+        self.player = self.game.current_player
+        for resource_type in (ResourceType.BRICK, ResourceType.LUMBER, ResourceType.GRAIN,
+                              ResourceType.WOOL, ResourceType.ORE):
+            self.player.gain(resource_type, 3)
+
+    def test_budget(self):
+        root = GameState.from_game(self.game)
+        actions = [*legal_actions(root, self.player.id), (END_TURN, 0)]
+        result = MCTSSearch(time_limit=None, iterations=50).search(root, self.player.id, actions,
+                                                                  random.Random(0))
+        self.assertEqual(result.rollouts, 50)
+        self.assertEqual(sum(result.visits.values()), 50)
+        self.assertSetEqual(set(result.visits), set(actions))
+        result = MCTSSearch(time_limit=0.05).search(root, self.player.id, actions, random.Random(0))
+        self.assertGreater(result.rollouts, 0)
+        self.assertLess(result.seconds, 0.5)
+        # The search must not change the root
+        self.assertEqual(root.encode(), GameState.from_game(self.game).encode())
+
+    def test_takes_winning_build(self):
+        self.player.victory_points = 9
+        agent = MCTSAgent(random.Random(0), time_limit=None, iterations=200)
+        action = agent.choose_action(self.game, self.player, self.simulator.get_actions(self.game, self.player))
+        self.assertIn(action[0], (ActionType.SETTLEMENT, ActionType.CITY))
+        self.assertEqual(agent.stats.rollouts, 200)
+        self.assertGreater(agent.stats.rollouts_per_second, 0)
+
+    def test_root_parallel(self):
+        agent = MCTSAgent(random.Random(0), time_limit=None, iterations=20, workers=2)
+        self.addCleanup(agent.close)
+        actions = self.simulator.get_actions(self.game, self.player)
+        self.assertIn(agent.choose_action(self.game, self.player, actions), actions + [None])
+        self.assertEqual(agent.stats.rollouts, 40)
+
+    def test_game(self):
+        agent = MCTSAgent(random.Random(0), time_limit=None, iterations=10)
+        simulator = Simulator([agent, RandomAgent(random.Random(1))], max_turns=30)
+        result = simulator.play_game(0)
+        self.assertEqual(len(result.victory_points), 2)
+        self.assertGreaterEqual(result.victory_points[0], 2)
+        self.assertGreater(agent.stats.decisions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+from catan import CatanMap, Player, Street, Settlement
+from pathfinding import PathFinder, opponent_streets, opponent_buildings, own_streets_free
+from hex import Hex, Edge, Vertex, NE, E, SE
+import unittest
+
+
+class TestPathFinder(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = Player(0, "Nara", "red")
+        self.p2 = Player(1, "Lukas", "blue")
+        self.map = CatanMap()
+        self.map.init_map()
+        self.finder = PathFinder(self.map.topology)
+
+    def test_bfs(self):
+        v1 = Vertex(Hex(0, 0, 0), "N")
+        distances = self.finder.bfs([v1])
+        self.assertEqual(len(distances), 54)
+        self.assertEqual(distances[v1], 0)
+        self.assertEqual(distances[Vertex(Hex(0, 0, 0), "S")], 3)
+        for vertex, distance in distances.items():
+            self.assertLessEqual(v1.distance_to(vertex), distance)
+
+    def test_shortest_path(self):
+        vertices = self.map.topology.vertices
+        for start in vertices[::7]:
+            distances = self.finder.bfs([start])
+            for goal in vertices:
+                path = self.finder.shortest_path(start, goal)
+                self.assertEqual(len(path), distances[goal])
+        path = self.finder.shortest_path(Vertex(Hex(0, 0, 0), "N"), Vertex(Hex(0, 0, 0), "SE"))
+        self.assertListEqual(path, [Edge(Hex(0, 0, 0), NE), Edge(Hex(0, 0, 0), E)])
+
+    def test_blocked(self):
+        v1 = Vertex(Hex(0, 0, 0), "N")
+        v2 = Vertex(Hex(0, 0, 0), "SE")
+        self.map.build_street(Street(self.p2), Edge(Hex(0, 0, 0), E))
+        path = self.finder.shortest_path(v1, v2, opponent_streets(self.map, self.p1))
+        self.assertEqual(len(path), 4)
+        self.assertNotIn(Edge(Hex(0, 0, 0), E), path)
+
+        self.map.build_settlement(Settlement(self.p2), Vertex(Hex(0, 0, 0), "NE"))
+        v3 = Vertex(Hex(1, -1, 0), "SE")
+        self.assertEqual(self.finder.bfs([v1])[v3], 2)
+        self.assertEqual(self.finder.bfs([v1], None, opponent_buildings(self.map, self.p1))[v3], 4)
+        self.assertEqual(len(self.finder.reachable([v1], lambda e: True)), 1)
+
+    def test_dijkstra(self):
+        v1 = Vertex(Hex(0, 0, 0), "N")
+        for edge in (Edge(Hex(0, 0, 0), NE), Edge(Hex(0, 0, 0), E), Edge(Hex(0, 0, 0), SE)):
+            self.map.build_street(Street(self.p1), edge)
+        distances = self.finder.dijkstra([v1], own_streets_free(self.map, self.p1))
+        self.assertEqual(distances[Vertex(Hex(0, 0, 0), "S")], 0)
+        self.assertEqual(distances[Vertex(Hex(0, 0, 0), "NW")], 1)
+        # An opponent settlement on the free road cannot be passed
+        self.map.build_settlement(Settlement(self.p2), Vertex(Hex(0, 0, 0), "NE"))
+        blocked = opponent_buildings(self.map, self.p1)
+        distances = self.finder.dijkstra([v1], own_streets_free(self.map, self.p1), None, blocked)
+        self.assertEqual(distances[Vertex(Hex(0, 0, 0), "NE")], 0)
+        self.assertEqual(distances[Vertex(Hex(0, 0, 0), "SE")], 3)
+        self.assertNotIn(Edge(Hex(0, 0, 0), E), self.finder.path_to(Vertex(Hex(0, 0, 0), "SE")))
+        sources = [Vertex(Hex(0, -2, 2), "N"), Vertex(Hex(0, 2, -2), "S")]
+        distances = self.finder.dijkstra(sources)
+        self.assertEqual(distances, self.finder.bfs(sources))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+from geometry import get_geometry
+from hex import Point, Hex, Vertex, Layout, ORIENTATION_FLAT, ORIENTATION_POINTY
+from picking import get_picking_index
+from topology import get_topology
+import random
+import unittest
+
+
+class TestPickingIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = get_topology(Hex(0, 0, 0).hexes_in_range(2))
+        self.layouts = [Layout(ORIENTATION_POINTY, Point(50, 50), Point(400, 300)),
+                        Layout(ORIENTATION_FLAT, Point(30, 40), Point(100, 60))]
+
+    def test_exact_positions(self):
+        for layout in self.layouts:
+            geometry = get_geometry(layout)
+            picking = get_picking_index(layout, self.topology)
+            for vertex in self.topology.vertices:
+                self.assertIs(picking.vertex_at(geometry.vertex_point(vertex)), vertex)
+            for edge in self.topology.edges:
+                self.assertIs(picking.edge_at(geometry.edge_center(edge)), edge)
+
+    def test_nearest(self):
+        rng = random.Random(0)
+        for layout in self.layouts:
+            geometry = get_geometry(layout)
+            picking = get_picking_index(layout, self.topology)
+            positions = [(rng.uniform(-100, 900), rng.uniform(-100, 700)) for _ in range(500)]
+            for elements, point, found in [
+                    (self.topology.vertices, geometry.vertex_point, picking.vertices_at(positions)),
+                    (self.topology.edges, geometry.edge_center, picking.edges_at(positions))]:
+                for (x, y), element in zip(positions, found):
+                    distance, closest = min(((point(e)[0] - x) ** 2 + (point(e)[1] - y) ** 2, e) for e in elements)
+                    self.assertIs(element, closest if distance <= picking.radius ** 2 else None)
+
+    def test_off_board(self):
+        picking = get_picking_index(self.layouts[0], self.topology)
+        self.assertIsNone(picking.vertex_at((0, 0)))
+        self.assertIsNone(picking.edge_at((0, 0)))
+        self.assertEqual(picking.vertex_ids_at([(0, 0), (10000, -5)]), [-1, -1])
+        # A larger radius reaches the closest vertex
+        vertex = Vertex(Hex(0, -2, 2), "N")
+        x, y = get_geometry(self.layouts[0]).vertex_point(vertex)
+        self.assertIsNone(picking.vertex_at((x, y - 40)))
+        self.assertIs(picking.vertex_at((x, y - 40), radius=50), vertex)
+
+    def test_cache(self):
+        layout = self.layouts[0]
+        picking = get_picking_index(layout, self.topology)
+        self.assertIs(get_picking_index(Layout(ORIENTATION_POINTY, Point(50, 50), Point(400, 300)), self.topology),
+                      picking)
+        self.assertIsNot(get_picking_index(Layout(ORIENTATION_POINTY, Point(50, 50), Point(410, 300)),
+                                           self.topology), picking)
+
+
+if __name__ == "__main__":
+    unittest.main()
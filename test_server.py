@@ -0,0 +1,161 @@
+from catan import State
+from client import GameClient, ServerError, choose_action, follow, play
+from protocol import ActionKind, ErrorCode, Phase
+from server import MAX_WRITE_BUFFER, GameServer, Table
+import asyncio
+from types import SimpleNamespace
+import random
+from sync import decode_delta
+import snapshot
+import unittest
+
+
+class TestTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table(0, 3, random.Random(0))
+
+    def test_setup(self):
+        table = self.table
+        topology = table.game.map.topology
+        self.assertEqual(table.act(1, ActionKind.SETTLEMENT, 0), ErrorCode.NOT_YOUR_TURN)
+        self.assertEqual(table.act(0, ActionKind.STREET, 0), ErrorCode.ILLEGAL)
+        self.assertEqual(table.act(0, ActionKind.SETTLEMENT, 9999), ErrorCode.ILLEGAL)
+        self.assertIsNone(table.act(0, ActionKind.SETTLEMENT, 0))
+        self.assertEqual(table.phase, Phase.SETUP_STREET)
+        # Neighbors of the settlement are taken
+        far = topology.edge_ids[next(e for e in topology.edges
+                                     if topology.vertices[0] not in e.get_adjacent_vertices())]
+        self.assertEqual(table.act(0, ActionKind.STREET, far), ErrorCode.ILLEGAL)
+        self.assertIsNone(table.act(0, ActionKind.STREET, topology.vertex_edges[0][0]))
+        self.assertEqual(table.game.current_player.id, 1)
+        self.assertEqual(len(table.sync.pending), 3)
+        sequence, events = decode_delta(table.sync.commit())
+        self.assertEqual((sequence, len(events)), (1, 3))
+
+    def test_game(self):
+        table = self.table
+        table.max_turns = 50
+        rng = random.Random(1)
+        client = GameClient(None, None)
+        client.game = table.game
+        while table.phase != Phase.OVER:
+            client.phase = table.phase
+            self.assertIsNone(table.act(table.game.current_player.id, *choose_action(client, rng)))
+        self.assertEqual(table.game.state, State.GAME_END)
+        self.assertFalse(table.game.map.is_start)
+        self.assertEqual(table.act(0, ActionKind.ROLL, 0), ErrorCode.GAME_OVER)
+
+
+class LossyClient(GameClient):
+    """Drops one delta, like a watcher skipped by the server."""
+
+    def __init__(self, reader, writer):
+        super().__init__(reader, writer)
+        self.received = 0
+
+    def _apply(self, delta):
+        self.received += 1
+        if self.received != 3:
+            super()._apply(delta)
+
+
+class FakeWriter:
+    """Records the writes of the server, with a settable write buffer."""
+
+    def __init__(self):
+        self.data = []
+        self.closed = False
+        self.buffered = 0
+        self.transport = SimpleNamespace(get_write_buffer_size=lambda: self.buffered)
+
+    def write(self, data):
+        self.data.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+class TestGameServer(unittest.TestCase):
+
+    def test_join(self):
+        game_server = GameServer(seed=0)
+        self.assertEqual(game_server.join(0, 9, FakeWriter()), ErrorCode.BAD_MESSAGE)
+        self.assertEqual(game_server.join(0, 1, FakeWriter()), ErrorCode.BAD_MESSAGE)
+        self.assertNotIn(0, game_server.tables)
+        table, seat = game_server.join(0, 2, FakeWriter())
+        self.assertEqual((table.num_players, seat), (2, 0))
+        # Later clients take the number of players of the table
+        self.assertEqual(game_server.join(0, 9, FakeWriter()), (table, 1))
+        self.assertEqual(game_server.join(0, 2, FakeWriter()), ErrorCode.TABLE_FULL)
+
+    def test_slow_clients(self):
+        game_server = GameServer(seed=0)
+        seats = [FakeWriter() for _ in range(2)]
+        for writer in seats:
+            table = game_server.join(0, 2, writer)[0]
+        watcher = FakeWriter()
+        game_server.watchers[0].add(watcher)
+        seats[1].buffered = watcher.buffered = MAX_WRITE_BUFFER + 1
+        game_server.broadcast(table, b"delta")
+        self.assertEqual(seats[0].data[-1], b"delta")
+        # The slow seat is dropped, the slow watcher is skipped
+        self.assertNotEqual(seats[1].data[-1], b"delta")
+        self.assertEqual((seats[0].closed, seats[1].closed), (False, True))
+        self.assertEqual(watcher.data, [])
+        self.assertFalse(watcher.closed)
+        table.phase = Phase.OVER
+        game_server.broadcast(table, b"last")
+        self.assertEqual(watcher.data, [b"last"])
+
+    def test_tables(self):
+        asyncio.run(self.play_tables())
+
+    async def play_tables(self):
+        game_server = GameServer(seed=0, max_turns=40)
+        server = await game_server.start()
+        port = server.sockets[0].getsockname()[1]
+        tables = []
+        for table_id in range(4):
+            clients = [await GameClient.connect("127.0.0.1", port) for _ in range(3)]
+            await asyncio.gather(*(client.join(table_id, 3) for client in clients))
+            self.assertEqual(sorted(client.seat for client in clients), [0, 1, 2])
+            tables.append(clients)
+        # A full table rejects further clients
+        late = await GameClient.connect("127.0.0.1", port)
+        with self.assertRaisesRegex(ServerError, "TABLE_FULL"):
+            await late.join(0, 3)
+        await late.close()
+        late = await GameClient.connect("127.0.0.1", port)
+        with self.assertRaisesRegex(ServerError, "BAD_MESSAGE"):
+            await late.join(4, 9)
+        self.assertNotIn(4, game_server.tables)
+        await late.close()
+
+        rng = random.Random(0)
+        players = [asyncio.ensure_future(play(client, random.Random(rng.random())))
+                   for clients in tables for client in clients]
+        # Watchers join the running games and catch up after a lost delta
+        for table_id, clients in enumerate(tables):
+            for client_class in (GameClient, LossyClient):
+                watcher = await client_class.connect("127.0.0.1", port)
+                await watcher.watch(table_id)
+                clients.append(watcher)
+        await asyncio.gather(*players, *(follow(clients[-1]) for clients in tables),
+                             *(follow(clients[-2]) for clients in tables))
+        for table_id, clients in enumerate(tables):
+            expected = snapshot.encode(game_server.tables[table_id].game)
+            for client in clients:
+                self.assertEqual(snapshot.encode(client.game), expected)
+                self.assertEqual(client.sequence, game_server.tables[table_id].sync.sequence)
+            for client in clients[:3]:
+                self.assertTrue(client.latencies)
+        for clients in tables:
+            for client in clients:
+                await client.close()
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+from fixtures import random_simulator, set_up_game
+from simulator import ActionType, PHASES
+from catan_bitboard import BitboardCatanMap
+import unittest
+
+
+class TestSimulator(unittest.TestCase):
+
+    def test_run(self):
+        simulator = random_simulator(max_turns=200)
+        stats = simulator.run(5)
+        self.assertEqual(stats.games, 5)
+        self.assertGreater(stats.turns, 0)
+        self.assertGreater(stats.games_per_second, 0)
+        self.assertSetEqual(set(stats.phase_seconds), set(PHASES))
+        self.assertEqual(sum(stats.wins.values()) + stats.unfinished, 5)
+        self.assertGreater(stats.turns_per_second, stats.games_per_second)
+
+    def test_game(self):
+        simulator = random_simulator(2, map_class=BitboardCatanMap)
+        result = simulator.play_game()
+        self.assertEqual(len(result.victory_points), 2)
+        if result.winner is not None:
+            self.assertGreaterEqual(result.victory_points[result.winner], 10)
+        else:
+            self.assertEqual(result.turns, simulator.max_turns)
+
+    def test_actions(self):
+        simulator = random_simulator(2)
+        game = set_up_game(simulator)
+        player = game.players[0]
+        for resource_type in player.resources:
+            player.resources[resource_type] = 0
+        self.assertListEqual(simulator.get_actions(game, player), [])
+        for resource_type in player.resources:
+            player.resources[resource_type] = 5
+        action_types = {action_type for action_type, _ in simulator.get_actions(game, player)}
+        self.assertIn(ActionType.STREET, action_types)
+        self.assertIn(ActionType.CITY, action_types)
+
+
+if __name__ == "__main__":
+    unittest.main()
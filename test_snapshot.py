@@ -0,0 +1,81 @@
+from catan import CatanGame, DevelopmentCard
+from catan_bitboard import BitboardCatanMap
+from catan_constants import ResourceType
+from fixtures import random_simulator, set_up_game
+import snapshot
+import unittest
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.game = set_up_game(random_simulator(4))
+        player = self.game.players[1]
+        settlement_vertex = next(v for v, catan_vertex in self.game.map.catan_vertices.items()
+                                 if catan_vertex.has_building(player))
+        player.build_city(self.game.map, settlement_vertex)
+        player.add_development_card(DevelopmentCard())
+        player.gain(ResourceType.ORE, 300)
+        self.game.map.move_robber(next(iter(self.game.map.catan_hexes)))
+        self.game.next_player()
+
+    def test_round_trip(self):
+        data = snapshot.encode(self.game)
+        self.assertEqual(len(data), 229)
+        for map_class in (None, BitboardCatanMap):
+            game = snapshot.decode(data, map_class)
+            self.assertEqual(snapshot.encode(game), data)
+            self.assertEqual(game.state_hash(), self.game.state_hash())
+            self.assertEqual(game.current_player.id, 1)
+            self.assertEqual(game.map.robber, self.game.map.robber)
+            for a, b in zip(game.players, self.game.players):
+                self.assertDictEqual(a.resources, b.resources)
+                self.assertEqual(len(a.settlements), len(b.settlements))
+                self.assertEqual(len(a.citys), len(b.citys))
+                self.assertSetEqual(game.map.legal_street_spots(a), self.game.map.legal_street_spots(b))
+            self.assertDictEqual(game.map.production, self.game.map.production)
+
+    def test_read(self):
+        view = snapshot.read(snapshot.encode(self.game))
+        topology = self.game.map.topology
+        self.assertEqual(view.robber, topology.hex_ids[self.game.map.robber])
+        self.assertEqual(len(view.vertices), topology.num_vertices)
+        self.assertEqual(sum(value >= 16 for value in view.vertices), 1)
+        self.assertEqual(sum(1 for value in view.edges if value), 8)
+        victory_points, development_cards, resources = view.players[1]
+        self.assertEqual(development_cards, 1)
+        self.assertEqual(resources[snapshot.RESOURCES.index(ResourceType.ORE)],
+                         self.game.players[1].resources[ResourceType.ORE])
+
+    def test_invalid(self):
+        data = snapshot.encode(self.game)
+        with self.assertRaises(ValueError):
+            snapshot.read(b"XXXX" + data[4:])
+        with self.assertRaises(ValueError):
+            snapshot.read(data[:4] + bytes([snapshot.VERSION + 1]) + data[5:])
+        with self.assertRaises(ValueError):
+            snapshot.read(data[:-1])
+
+    def test_not_standard_board(self):
+        data = snapshot.encode(self.game)
+        view = snapshot.read(data)
+        fields = list(snapshot.HEADER.unpack_from(data))
+        # One hex less
+        fields[7] -= 1
+        data = b"".join([snapshot.HEADER.pack(*fields), view.hex_resources[1:], view.hex_tokens[1:],
+                         view.vertices, view.edges, data[-4 * snapshot.PLAYER.size:]])
+        self.assertEqual(len(snapshot.read(data).hex_resources), 18)
+        with self.assertRaisesRegex(ValueError, "standard board"):
+            snapshot.decode(data)
+
+    def test_hexes_are_copied(self):
+        hexes = self.game.map.catan_hexes
+        game = CatanGame(self.game.players, hexes=hexes)
+        hex = next(h for h in hexes if h != self.game.map.robber)
+        game.map.move_robber(hex)
+        self.assertFalse(hexes[hex].has_robber)
+        self.assertIsNot(game.map.catan_hexes[hex], hexes[hex])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+from events import Event, EventType, GameHistory
+from fixtures import set_up_game
+from sync import SyncLog, decode_delta, decode_events, encode_delta, encode_events
+import random
+import snapshot
+import unittest
+
+
+class TestSync(unittest.TestCase):
+
+    def setUp(self):
+        self.game = set_up_game()
+        self.history = GameHistory(self.game, checkpoint_interval=0)
+        self.sync = SyncLog(self.history, max_deltas=4)
+        self.rng = random.Random(0)
+
+    def action(self):
+        """Rolls the dice and ends the turn as one delta."""
+        self.history.roll(self.rng.randint(1, 6) + self.rng.randint(1, 6))
+        self.history.end_turn()
+        return self.sync.commit()
+
+    def test_encoding(self):
+        events = [Event(EventType.ROLL, 0, 0, 7), Event(EventType.GAIN, 3, 2, -1),
+                  Event(EventType.GAIN, 15, 4, 300), Event(EventType.STREET, 1, 71, 0),
+                  Event(EventType.ROBBER, 2, 18, -1), Event(EventType.CARD, 0, 0, 0),
+                  Event(EventType.SETTLEMENT, 1, 53, 2), Event(EventType.TURN, 1, 2, 0),
+                  Event(EventType.STATE, 0, 2, 0), Event(EventType.SETTLEMENT, 0, 40000, -70000)]
+        self.assertEqual(decode_events(encode_events(events)), events)
+        self.assertEqual(decode_delta(encode_delta(123456, events)), (123456, events))
+        # Street and turn events take 2 bytes
+        self.assertEqual(len(encode_events(events[3:4] + events[7:8])), 4)
+
+    def test_deltas(self):
+        mirror = snapshot.decode(snapshot.encode(self.game))
+        mirror_history = GameHistory(mirror, checkpoint_interval=0)
+        self.assertIsNone(self.sync.commit())
+        for expected in range(1, 10):
+            sequence, events = decode_delta(self.action())
+            self.assertEqual(sequence, expected)
+            for event in events:
+                mirror_history.apply(event)
+            self.assertEqual(snapshot.encode(mirror), snapshot.encode(self.game))
+
+    def test_resync(self):
+        deltas = [self.action() for _ in range(6)]
+        self.assertEqual(self.sync.since(6), [])
+        self.assertEqual(self.sync.since(3), deltas[3:])
+        self.assertEqual(self.sync.since(2), deltas[2:])
+        # Older deltas are gone, a snapshot is needed
+        self.assertIsNone(self.sync.since(1))
+        self.assertIsNone(self.sync.since(7))
+        sequence, data = self.sync.snapshot()
+        self.assertEqual(sequence, 6)
+        self.assertIs(self.sync.snapshot()[1], data)
+        self.assertEqual(data, snapshot.encode(self.game))
+        self.action()
+        self.assertEqual(self.sync.snapshot()[0], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+from topology import BoardTopology, get_topology
+from hex import Hex, Edge, Vertex, E
+import unittest
+
+
+class TestBoardTopology(unittest.TestCase):
+
+    def setUp(self):
+        hexes = [Hex(q, r, -q - r) for q in range(-2, 3)
+                 for r in range(max(-2, -q - 2), min(2, -q + 2) + 1)]
+        self.topology = BoardTopology(hexes)
+
+    def test_sizes(self):
+        self.assertEqual(self.topology.num_hexes, 19)
+        self.assertEqual(self.topology.num_edges, 72)
+        self.assertEqual(self.topology.num_vertices, 54)
+
+    def test_matches_coordinates(self):
+        t = self.topology
+        for i, vertex in enumerate(t.vertices):
+            self.assertEqual({t.vertices[j] for j in t.vertex_vertices[i]},
+                             {v for v in vertex.get_adjacent_vertices() if v in t.vertex_ids})
+            self.assertEqual({t.edges[j] for j in t.vertex_edges[i]},
+                             {e for e in vertex.get_adjacent_edges() if e in t.edge_ids})
+        for i, edge in enumerate(t.edges):
+            self.assertEqual({t.edges[j] for j in t.edge_edges[i]},
+                             {e for e in edge.get_adjacent_edges() if e in t.edge_ids})
+
+    def test_border(self):
+        t = self.topology
+        corner = t.vertex_ids[Vertex(Hex(0, -2, 2), "N")]
+        self.assertEqual(len(t.vertex_vertices[corner]), 2)
+        self.assertEqual(len(t.vertex_hexes[corner]), 1)
+        center = t.edge_ids[Edge(Hex(0, 0, 0), E)]
+        self.assertEqual(len(t.edge_edges[center]), 4)
+        self.assertEqual(len(t.edge_hexes[center]), 2)
+
+    def test_shared(self):
+        hexes = self.topology.hexes
+        self.assertIs(get_topology(hexes), get_topology(list(hexes)))
+        self.assertIsNot(get_topology(hexes), get_topology(hexes[::-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
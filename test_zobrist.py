@@ -0,0 +1,82 @@
+from catan import Player
+from catan_bitboard import BitboardCatanMap
+from catan_constants import ResourceType, STREET_COST
+from hex import Hex, Edge, Vertex, NE
+from fixtures import random_simulator, set_up_game
+from zobrist import TranspositionTable, game_hash, map_hash, zobrist_key, resource_key, SETTLEMENT, STREET
+import unittest
+
+
+class TestZobrist(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = random_simulator()
+        self.game = self.simulator.new_game(0)
+        self.map = self.game.map
+
+    def test_keys(self):
+        self.assertEqual(zobrist_key(SETTLEMENT, 3, 1, 2), zobrist_key(SETTLEMENT, 3, 1, 2))
+        self.assertNotEqual(zobrist_key(SETTLEMENT, 3, 1, 2), zobrist_key(SETTLEMENT, 3, 2, 1))
+        self.assertLess(zobrist_key(SETTLEMENT, 3, 1, 2), 1 << 64)
+        self.assertEqual(Player(0, "Nara", "red").zobrist, 0)
+
+    def test_negative_counts(self):
+        keys = {resource_key(p, r, count) for p in range(4) for r in range(1, 6) for count in range(-3, 4)}
+        # All distinct, plus the key 0 of holding nothing
+        self.assertEqual(len(keys), 4 * 5 * 6 + 1)
+        self.assertNotEqual(resource_key(0, 1, -1), zobrist_key(STREET, 2, 0, -1))
+        self.assertLess(resource_key(0, 1, -1), 1 << 64)
+
+    def test_incremental_matches_full(self):
+        h = self.game.state_hash()
+        self.assertEqual(h, game_hash(self.game))
+        self.simulator.setup(self.game)
+        self.assertNotEqual(self.game.state_hash(), h)
+        self.assertEqual(self.game.state_hash(), game_hash(self.game))
+        agent = self.simulator.agents[0]
+        for _ in range(30):
+            player = self.game.current_player
+            self.game.distribute_resources(self.game.rng.randint(2, 12))
+            self.simulator.build(self.game, player, agent)
+            self.map.move_robber(self.game.rng.choice(list(self.map.catan_hexes)))
+            self.game.next_player()
+            self.assertEqual(self.game.state_hash(), game_hash(self.game))
+
+    def test_undo_restores_hash(self):
+        player = self.game.players[0]
+        h = self.game.state_hash()
+        vertex = Vertex(Hex(0, 0, 0), "N")
+        edge = Edge(Hex(0, 0, 0), NE)
+        player.build_settlement(self.map, vertex)
+        player.build_street(self.map, edge)
+        player.gain(ResourceType.BRICK, 2)
+        player.gain(ResourceType.LUMBER)
+        player.pay(STREET_COST)
+        self.assertNotEqual(self.game.state_hash(), h)
+        player.gain(ResourceType.BRICK, -1)
+        self.map.remove_street(edge)
+        self.map.remove_settlement(vertex)
+        self.assertEqual(self.game.state_hash(), h)
+
+    def test_bitboard_map(self):
+        game = set_up_game(random_simulator(map_class=BitboardCatanMap), 1)
+        self.assertEqual(game.map.zobrist, map_hash(game.map))
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_lru(self):
+        table = TranspositionTable(2)
+        table.store(1, "a")
+        table.store(2, "b")
+        self.assertEqual(table.get(1), "a")
+        table.store(3, "c")
+        self.assertEqual(len(table), 2)
+        self.assertNotIn(2, table)
+        self.assertIn(1, table)
+        self.assertIsNone(table.get(2))
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Precomputed board topology. Assigns dense integer ids to the hexes, edges
+and vertices of a board and stores all adjacency relations between them as
+integer tables, so graph queries on a fixed board are plain index lookups."""
+from __future__ import annotations
+from typing import Iterable
+from hex import Hex, Edge, Vertex
+
+
+class BoardTopology:
+    """Adjacency tables of a board, computed once from its hexes.
+
+    Ids are assigned in the iteration order of the given hexes, edges and
+    vertices in the order they are first reached from a hex. Neighbor tables
+    only contain elements that are part of the board."""
+
+    def __init__(self, hexes: Iterable[Hex]) -> None:
+        self.hexes: list[Hex] = list(hexes)
+        self.edges: list[Edge] = []
+        self.vertices: list[Vertex] = []
+        self.hex_ids: dict[Hex, int] = {}
+        self.edge_ids: dict[Edge, int] = {}
+        self.vertex_ids: dict[Vertex, int] = {}
+
+        for hex in self.hexes:
+            self.hex_ids[hex] = len(self.hex_ids)
+        for hex in self.hexes:
+            for edge in hex.get_adjacent_edges():
+                if edge not in self.edge_ids:
+                    self.edge_ids[edge] = len(self.edges)
+                    self.edges.append(edge)
+        for hex in self.hexes:
+            for vertex in hex.get_adjacent_vertices():
+                if vertex not in self.vertex_ids:
+                    self.vertex_ids[vertex] = len(self.vertices)
+                    self.vertices.append(vertex)
+
+        self.hex_edges = self._table(self.hexes, Hex.get_adjacent_edges, self.edge_ids)
+        self.hex_vertices = self._table(self.hexes, Hex.get_adjacent_vertices, self.vertex_ids)
+        self.edge_hexes = self._table(self.edges, Edge.get_adjacent_hexes, self.hex_ids)
+        self.edge_edges = self._table(self.edges, Edge.get_adjacent_edges, self.edge_ids)
+        self.edge_vertices = self._table(self.edges, Edge.get_adjacent_vertices, self.vertex_ids)
+        self.vertex_hexes = self._table(self.vertices, Vertex.get_adjacent_hexes, self.hex_ids)
+        self.vertex_edges = self._table(self.vertices, Vertex.get_adjacent_edges, self.edge_ids)
+        self.vertex_vertices = self._table(self.vertices, Vertex.get_adjacent_vertices, self.vertex_ids)
+
+    @property
+    def num_hexes(self) -> int:
+        return len(self.hexes)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.vertices)
+
+    @staticmethod
+    def _table(elements, get_adjacent, ids: dict) -> tuple[tuple[int, ...], ...]:
+        return tuple(tuple(ids[neighbor] for neighbor in get_adjacent(element) if neighbor in ids)
+                     for element in elements)
+
+
+MAX_CACHED_TOPOLOGIES = 8
+_topologies: dict[tuple[Hex, ...], BoardTopology] = {}
+
+
+def get_topology(hexes: Iterable[Hex]) -> BoardTopology:
+    """Returns the shared topology of a board. Topologies are never modified
+    after creation, so all maps on the same hexes can use one instance."""
+    key = tuple(hexes)
+    topology = _topologies.get(key)
+    if topology is None:
+        if len(_topologies) >= MAX_CACHED_TOPOLOGIES:
+            del _topologies[next(iter(_topologies))]
+        topology = _topologies[key] = BoardTopology(key)
+    return topology
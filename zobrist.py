@@ -0,0 +1,125 @@
+"""Zobrist hashing of the game state and a transposition table keyed on it.
+
+Every feature of the state (a resource on a hex, a building on a vertex, a
+resource count of a player, ...) has a fixed random 64-bit key, and the hash
+of a state is the XOR of the keys of its features. A build or a resource
+change only XORs out the old and XORs in the new keys, so CatanMap and
+Player keep their hashes up to date in O(1).
+
+Keys are derived from the feature itself via splitmix64 instead of a seeded
+RNG, so they are the same in every process and need no table size limits."""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Hashable
+
+HEX_RESOURCE = 1
+HEX_TOKEN = 2
+ROBBER = 3
+SETTLEMENT = 4
+STREET = 5
+RESOURCE = 6
+DEVELOPMENT_CARDS = 7
+TURN = 8
+
+_MASK = (1 << 64) - 1
+_FIELD = (1 << 16) - 1
+
+
+def _splitmix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def zobrist_key(kind: int, a: int = 0, b: int = 0, c: int = 0) -> int:
+    """Returns the key of a feature. a, b and c are small ints such as ids,
+    player ids, resource values or counts. Each is packed into 16 bits in
+    two's complement, so counts from -32768 to 32767 get distinct keys; a
+    resource count drops below 0 when pay runs ahead of gain."""
+    return _splitmix64(kind << 48 | (a & _FIELD) << 32 | (b & _FIELD) << 16 | (c & _FIELD))
+
+
+def resource_key(player_id: int, resource_value: int, count: int) -> int:
+    """Key of a player holding count resources of a type. Holding nothing
+    has key 0, so a new player has hash 0."""
+    return zobrist_key(RESOURCE, player_id, resource_value, count) if count else 0
+
+
+def development_cards_key(player_id: int, count: int) -> int:
+    return zobrist_key(DEVELOPMENT_CARDS, player_id, count) if count else 0
+
+
+def map_hash(map) -> int:
+    """Computes the hash of a CatanMap from scratch."""
+    topology = map.topology
+    h = 0
+    for hex, catan_hex in map.catan_hexes.items():
+        hex_id = topology.hex_ids[hex]
+        h ^= zobrist_key(HEX_RESOURCE, hex_id, catan_hex.resource_type.value)
+        h ^= zobrist_key(HEX_TOKEN, hex_id, catan_hex.number_token)
+        if catan_hex.has_robber:
+            h ^= zobrist_key(ROBBER, hex_id)
+    for vertex, catan_vertex in map.catan_vertices.items():
+        if catan_vertex.has_building():
+            building = catan_vertex.building
+            h ^= zobrist_key(SETTLEMENT, topology.vertex_ids[vertex], building.player.id,
+                             building.resource_factor)
+    for edge, catan_edge in map.catan_edges.items():
+        if catan_edge.has_building():
+            h ^= zobrist_key(STREET, topology.edge_ids[edge], catan_edge.building.player.id)
+    return h
+
+
+def player_hash(player) -> int:
+    """Computes the hash of a Player from scratch."""
+    h = development_cards_key(player.id, len(player.development_cards))
+    for resource_type, count in player.resources.items():
+        h ^= resource_key(player.id, resource_type.value, count)
+    return h
+
+
+def game_hash(game) -> int:
+    """Computes the hash of a CatanGame from scratch, see CatanGame.state_hash."""
+    h = map_hash(game.map) ^ zobrist_key(TURN, game.current_player.id)
+    for player in game.players:
+        h ^= player_hash(player)
+    return h
+
+
+class TranspositionTable:
+    """Bounded mapping from state hashes to search results. When full, the
+    least recently used entry is evicted."""
+
+    def __init__(self, max_size: int = 1 << 16) -> None:
+        self.max_size = max_size
+        self.entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.entries.get(key, self)
+        if entry is self:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key: Hashable, value: Any) -> None:
+        entries = self.entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0